@@ -1,12 +1,36 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from backend.routes import datasets, processing
+from backend.services.review_queue import (
+    ReviewWorker,
+    get_review_queue,
+    review_worker_available,
+)
 from config.settings import settings
 import logging
 
 logging.basicConfig(level=settings.log_level)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Qur'an Recitation Dataset Curator", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The LLM review worker drains the queue filled by normalization
+    stop = asyncio.Event()
+    worker = None
+    if review_worker_available():
+        worker = asyncio.create_task(ReviewWorker(get_review_queue()).run(stop))
+        logger.info("Started LLM review worker")
+    yield
+    if worker is not None:
+        stop.set()
+        await worker
+
+
+app = FastAPI(
+    title="Qur'an Recitation Dataset Curator", version="1.0.0", lifespan=lifespan
+)
 
 app.include_router(datasets.router, prefix="/datasets", tags=["datasets"])
 app.include_router(processing.router, prefix="/processing", tags=["processing"])
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 
 class DatasetDownloadRequest(BaseModel):
@@ -18,15 +18,56 @@ class NormalizeRequest(BaseModel):
 class NormalizeResponse(BaseModel):
     status: str
     normalized: List[str]
+    processed: int = 0
+    skipped: int = 0  # Unchanged since the last run with the same rules
+    failed: int = 0
 
 
 class OrganizeAudioRequest(BaseModel):
     audio_dir: str
 
 
+class AudioCollision(BaseModel):
+    target: str  # reciter/surah/ayah path inside organized_dir
+    sources: List[str]  # The kept source first
+
+
 class OrganizeAudioResponse(BaseModel):
     status: str
     organized_dir: str
+    placed: int = 0
+    unchanged: int = 0  # Same size and mtime as when last placed
+    duplicates: int = 0  # Identical copies of an already placed ayah
+    unrecognized: int = 0  # Names without a reciter, surah and ayah
+    collisions: List[AudioCollision] = []
+
+
+class ConformAudioRequest(BaseModel):
+    audio_dir: str
+
+
+class ConformAudioResponse(BaseModel):
+    status: str
+    sample_rate: int
+    conformed: int
+    already: int  # Already at the target rate and channel layout
+    unsupported: int  # Not integer PCM WAV (e.g. MP3, FLAC)
+    failed: int
+
+
+class TrimAudioRequest(BaseModel):
+    audio_dir: str
+
+
+class TrimAudioResponse(BaseModel):
+    status: str
+    trimmed: int
+    unchanged: int  # No silence to cut, or trimmed by an earlier run
+    unsupported: int
+    failed: int
+    original_hours: float
+    trimmed_hours: float
+    hours_saved: float
 
 
 class ExtractMetadataRequest(BaseModel):
@@ -35,7 +76,7 @@ class ExtractMetadataRequest(BaseModel):
 
 class ExtractMetadataResponse(BaseModel):
     status: str
-    metadata: str  # Path to metadata.json
+    metadata: str  # Path to metadata.jsonl
 
 
 class ConvertJsonlRequest(BaseModel):
@@ -53,6 +94,8 @@ class MetadataEntry(BaseModel):
     surah: int
     ayah: int
     duration: float
+    original_duration: Optional[float] = None  # Before silence trimming
+    trimmed_duration: Optional[float] = None  # After silence trimming
     sampling_rate: int
     source: str
     transcript: str
@@ -63,3 +106,76 @@ class JsonlEntry(BaseModel):
     audio_path: str
     transcript: str
     metadata: Dict[str, Any]
+
+
+class ReviewStatusResponse(BaseModel):
+    enabled: bool  # False when no review worker is running to drain the queue
+    pending: int
+    in_progress: int
+    done: int
+    failed: int
+    depth: int  # Jobs not yet reviewed (pending + in progress)
+    total: int
+    changed: int  # Reviewed ayat where the LLM suggested a change
+
+
+class ReviewSuggestion(BaseModel):
+    file: str
+    ayah: str  # "surah:ayah" or the row number in the file
+    text: str
+    suggestion: str
+    diff: str
+
+
+class ReviewSuggestionsResponse(BaseModel):
+    status: str
+    suggestions: List[ReviewSuggestion]
+
+
+class ReferenceValidateRequest(BaseModel):
+    transcript: str  # CSV with surah/ayah columns, or one ayah per line
+    limit: int = 100  # Number of worst-matching ayat to return
+
+
+class AyahDistance(BaseModel):
+    surah: int
+    ayah: int
+    distance: int  # Character-level edit distance to the reference
+    reference_length: int
+    cer: float
+
+
+class ReferenceValidateResponse(BaseModel):
+    status: str
+    ayat: int
+    exact: int
+    missing: int  # Rows whose (surah, ayah) does not exist
+    cer: float
+    worst: List[AyahDistance]
+
+
+class ShardRequest(BaseModel):
+    jsonl: str  # Path to dataset.jsonl
+    output_dir: Optional[str] = None  # Defaults to data/processed/shards
+
+
+class ShardResponse(BaseModel):
+    status: str
+    shards: List[str]
+    index: str  # Path to index.json with per-member byte offsets
+    records: int
+    skipped: int  # Records whose audio file could not be read
+
+
+class ParquetExportRequest(BaseModel):
+    jsonl: str  # Path to dataset.jsonl
+    output_path: Optional[str] = None  # Defaults to data/processed/dataset.parquet
+    include_audio: Optional[bool] = None  # Defaults to parquet_include_audio
+
+
+class ParquetExportResponse(BaseModel):
+    status: str
+    path: str
+    records: int
+    row_groups: int  # One or more per (reciter, surah)
+    skipped: int  # Records whose audio file could not be read
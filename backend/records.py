@@ -0,0 +1,57 @@
+import json
+from dataclasses import dataclass, fields
+from typing import Any, Optional
+
+try:
+    import orjson
+except ImportError:  # Standard library fallback, same output
+    orjson = None
+
+# Hot-path record types for the metadata and JSONL stages. The pydantic
+# models in backend.models stay the API schema; these skip per-record
+# validation and serialize straight to bytes.
+
+
+@dataclass(slots=True, kw_only=True)
+class MetadataRecord:
+    # Same fields, in the same order, as models.MetadataEntry
+    reciter: str
+    surah: int
+    ayah: int
+    duration: float
+    original_duration: Optional[float] = None  # Before silence trimming
+    trimmed_duration: Optional[float] = None  # After silence trimming
+    sampling_rate: int
+    source: str
+    transcript: str
+    audio_path: str
+
+
+METADATA_FIELDS = tuple(field.name for field in fields(MetadataRecord))
+
+
+def dumps_line(obj: MetadataRecord | dict[str, Any]) -> bytes:
+    # One compact UTF-8 JSON document followed by a newline
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    if isinstance(obj, MetadataRecord):
+        obj = {name: getattr(obj, name) for name in METADATA_FIELDS}
+    line = json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+    return (line + "\n").encode("utf-8")
+
+
+def loads(data: bytes | str) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def jsonl_line(item: dict[str, Any], audio_path: str) -> bytes:
+    # The document models.JsonlEntry describes: everything besides the audio
+    # path and transcript goes under "metadata"
+    metadata = {k: v for k, v in item.items() if k not in ("audio_path", "transcript")}
+    return dumps_line(
+        {
+            "audio_path": audio_path,
+            "transcript": item["transcript"],
+            "metadata": metadata,
+        }
+    )
@@ -1,15 +1,39 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from backend.models import (
     NormalizeRequest,
     NormalizeResponse,
     OrganizeAudioRequest,
     OrganizeAudioResponse,
+    ConformAudioRequest,
+    ConformAudioResponse,
+    TrimAudioRequest,
+    TrimAudioResponse,
     ExtractMetadataRequest,
     ExtractMetadataResponse,
     ConvertJsonlRequest,
     ConvertJsonlResponse,
+    ShardRequest,
+    ShardResponse,
+    ParquetExportRequest,
+    ParquetExportResponse,
+    ReviewStatusResponse,
+    ReviewSuggestionsResponse,
+    ReferenceValidateRequest,
+    ReferenceValidateResponse,
 )
-from backend.services import normalizer, audio_handler, converter
+from backend.services import (
+    normalizer,
+    audio_handler,
+    converter,
+    reference,
+    conform,
+    shards,
+    columnar,
+    trimmer,
+)
+from config.settings import settings
+from backend.services.review_queue import get_review_queue, review_worker_running
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,23 +43,60 @@ router = APIRouter()
 @router.post("/normalize", response_model=NormalizeResponse)
 async def normalize_transcripts(request: NormalizeRequest):
     try:
-        normalized = await normalizer.normalize_transcripts(request.transcripts)
-        return NormalizeResponse(status="success", normalized=normalized)
+        report = await normalizer.run_normalization(request.transcripts)
+        return NormalizeResponse(status="success", **report)
     except Exception as e:
         logger.error(f"Normalization failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/validate-reference", response_model=ReferenceValidateResponse)
+async def validate_reference(request: ReferenceValidateRequest):
+    try:
+        report = await asyncio.to_thread(
+            reference.validate_transcript, request.transcript
+        )
+        worst = sorted(report.pop("results"), key=lambda r: r["cer"], reverse=True)
+        return ReferenceValidateResponse(
+            status="success", worst=worst[: request.limit], **report
+        )
+    except Exception as e:
+        logger.error(f"Reference validation failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/organize-audio", response_model=OrganizeAudioResponse)
 async def organize_audio(request: OrganizeAudioRequest):
     try:
-        organized_dir = await audio_handler.organize_audio(request.audio_dir)
-        return OrganizeAudioResponse(status="success", organized_dir=organized_dir)
+        report = await audio_handler.run_audio_organization(request.audio_dir)
+        return OrganizeAudioResponse(status="success", **report)
     except Exception as e:
         logger.error(f"Audio organization failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/conform-audio", response_model=ConformAudioResponse)
+async def conform_audio(request: ConformAudioRequest):
+    try:
+        report = await conform.conform_audio(request.audio_dir)
+        return ConformAudioResponse(
+            status="success", sample_rate=settings.target_sample_rate, **report
+        )
+    except Exception as e:
+        logger.error(f"Audio conforming failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/trim-audio", response_model=TrimAudioResponse)
+async def trim_audio(request: TrimAudioRequest):
+    try:
+        report = await trimmer.trim_audio(request.audio_dir)
+        return TrimAudioResponse(status="success", **report)
+    except Exception as e:
+        logger.error(f"Silence trimming failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.post("/extract-metadata", response_model=ExtractMetadataResponse)
 async def extract_metadata(request: ExtractMetadataRequest):
     try:
@@ -56,3 +117,54 @@ async def convert_to_jsonl(request: ConvertJsonlRequest):
     except Exception as e:
         logger.error(f"JSONL conversion failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/shard", response_model=ShardResponse)
+async def shard_dataset(request: ShardRequest):
+    try:
+        report = await asyncio.to_thread(
+            shards.write_shards, request.jsonl, request.output_dir
+        )
+        return ShardResponse(status="success", **report)
+    except Exception as e:
+        logger.error(f"Sharding failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/export-parquet", response_model=ParquetExportResponse)
+async def export_parquet(request: ParquetExportRequest):
+    try:
+        report = await asyncio.to_thread(
+            columnar.write_parquet,
+            request.jsonl,
+            request.output_path,
+            request.include_audio,
+        )
+        return ParquetExportResponse(status="success", **report)
+    except Exception as e:
+        logger.error(f"Parquet export failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/review/status", response_model=ReviewStatusResponse)
+async def review_status():
+    try:
+        return ReviewStatusResponse(
+            enabled=settings.review_enabled and review_worker_running(),
+            **get_review_queue().progress(),
+        )
+    except Exception as e:
+        logger.error(f"Review status failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/review/suggestions", response_model=ReviewSuggestionsResponse)
+async def review_suggestions(
+    limit: int = 100, offset: int = 0, changed_only: bool = True
+):
+    try:
+        suggestions = get_review_queue().suggestions(limit, offset, changed_only)
+        return ReviewSuggestionsResponse(status="success", suggestions=suggestions)
+    except Exception as e:
+        logger.error(f"Review suggestions failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
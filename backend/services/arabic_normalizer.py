@@ -0,0 +1,179 @@
+import re
+from dataclasses import dataclass
+from functools import partial
+from operator import methodcaller
+from typing import Iterable, Iterator
+
+
+def _chars(*ranges: tuple[int, int]) -> list[str]:
+    return [chr(c) for start, end in ranges for c in range(start, end + 1)]
+
+
+def _char_class(chars) -> str:
+    # Render characters as a compact regex class body of contiguous ranges
+    codes = sorted(ord(c) for c in chars)
+    parts = []
+    start = prev = codes[0]
+    for code in codes[1:] + [None]:
+        if code is not None and code == prev + 1:
+            prev = code
+            continue
+        parts.append(
+            f"\\u{start:04x}" if start == prev else f"\\u{start:04x}-\\u{prev:04x}"
+        )
+        if code is not None:
+            start = prev = code
+    return "".join(parts)
+
+
+# Harakat, shadda, sukun, superscript alef and the small orthographic letters
+# of the Uthmani script (small waw/ya, high meem, dotless khah sukun, ...)
+DIACRITICS = _chars(
+    (0x064B, 0x065F), (0x0670, 0x0670), (0x06DF, 0x06E8), (0x06EA, 0x06ED)
+)
+# Pause (waqf) signs, end-of-ayah and section markers, honorific ligatures,
+# and verse numbers: typeset annotations that are not recited
+ANNOTATIONS = _chars(
+    (0x0600, 0x0605),
+    (0x0610, 0x061A),
+    (0x0660, 0x0669),
+    (0x06D6, 0x06DE),
+    (0x06E9, 0x06E9),
+    (0x06F0, 0x06F9),
+)
+TATWEEL = "\u0640"
+ALEF_VARIANTS = {"آ": "ا", "أ": "ا", "إ": "ا", "ٱ": "ا"}
+HAMZA_CARRIERS = {"ؤ": "و", "ئ": "ي"}
+YA_VARIANTS = {"ى": "ي", "ی": "ي"}
+WHITESPACE = "\t\n\r\f\v\u00a0\u202f\u205f\u3000" + "".join(_chars((0x2000, 0x200A)))
+OTHER_SPACES = re.compile(f"[{WHITESPACE}]")
+SPACE_RUNS = re.compile(" {2,}")
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    version: str
+    strip_diacritics: bool = False
+    strip_annotations: bool = False
+    strip_tatweel: bool = False
+    unify_alef: bool = False
+    unify_hamza: bool = False
+    unify_ya: bool = False
+    arabic_only: bool = True
+    collapse_whitespace: bool = False
+
+
+# Rule sets are immutable once published: change behaviour by adding a new
+# version so fingerprints of earlier outputs stay meaningful.
+RULE_SETS = {
+    rules.version: rules
+    for rules in [
+        # The original regex: drop everything outside the Arabic block
+        RuleSet("legacy-v1"),
+        # Uthmani transcripts for ASR: keep full vocalisation, drop marks
+        # that are not recited and normalise spacing
+        RuleSet(
+            "uthmani-v1",
+            strip_annotations=True,
+            strip_tatweel=True,
+            collapse_whitespace=True,
+        ),
+        # Undiacritised, orthographically unified text for search and joins
+        RuleSet(
+            "plain-v1",
+            strip_diacritics=True,
+            strip_annotations=True,
+            strip_tatweel=True,
+            unify_alef=True,
+            unify_hamza=True,
+            unify_ya=True,
+            collapse_whitespace=True,
+        ),
+    ]
+}
+DEFAULT_RULES = "uthmani-v1"
+
+
+def _collapse_spaces(text: str) -> str:
+    # Deleting marks that stood between spaces leaves runs behind
+    if "  " in text:
+        text = SPACE_RUNS.sub(" ", text)
+    return text.strip()
+
+
+class Normalizer:
+    # Rules are compiled once into at most one str.translate table and one
+    # combined deletion regex. Sparse deletions (annotations, tatweel, foreign
+    # characters) share a single negated character class, which the regex
+    # engine scans at C speed; the translate table is only built for dense
+    # per-letter rules (diacritics and letter unification), where it beats
+    # any regex. The steps a rule set needs are bound once, so normalize()
+    # makes no per-call rule checks.
+
+    def __init__(self, rules: str | RuleSet = DEFAULT_RULES):
+        if isinstance(rules, str):
+            if rules not in RULE_SETS:
+                raise ValueError(
+                    f"Unknown normalizer rules {rules!r}, expected one of {sorted(RULE_SETS)}"
+                )
+            rules = RULE_SETS[rules]
+        self.rules = rules
+        self.version = rules.version
+        self.table = self._build_table(rules)
+        self.pattern = self._build_pattern(rules)
+        self.steps = []
+        if self.table is not None:
+            self.steps.append(methodcaller("translate", self.table))
+        if rules.collapse_whitespace and self.table is None:
+            # Whitespace variants are folded into plain spaces by the table
+            # when there is one, otherwise by a (rarely matching) regex
+            self.steps.append(partial(OTHER_SPACES.sub, " "))
+        if self.pattern is not None:
+            self.steps.append(partial(self.pattern.sub, ""))
+        if rules.collapse_whitespace:
+            self.steps.append(_collapse_spaces)
+
+    @staticmethod
+    def _build_table(rules: RuleSet) -> dict[int, str | None] | None:
+        mapping: dict[str, str | None] = {}
+        if rules.strip_diacritics:
+            mapping.update(dict.fromkeys(DIACRITICS))
+        if rules.unify_alef:
+            mapping.update(ALEF_VARIANTS)
+        if rules.unify_hamza:
+            mapping.update(HAMZA_CARRIERS)
+        if rules.unify_ya:
+            mapping.update(YA_VARIANTS)
+        if not mapping:
+            return None
+        if rules.collapse_whitespace:
+            mapping.update(dict.fromkeys(WHITESPACE, " "))
+        return str.maketrans(mapping)
+
+    @staticmethod
+    def _build_pattern(rules: RuleSet) -> re.Pattern | None:
+        drop = set(TATWEEL if rules.strip_tatweel else "")
+        if rules.strip_annotations:
+            drop.update(ANNOTATIONS)
+        spaces = " " if rules.collapse_whitespace else "\\s"
+        if rules.arabic_only:
+            # A single negated class of the Arabic letters we keep lets the
+            # regex engine scan unaffected runs at C speed
+            kept = [c for c in _chars((0x0600, 0x06FF)) if c not in drop]
+            other = f"[^{_char_class(kept)}{spaces}]"
+        elif drop:
+            other = f"[{_char_class(drop)}]"
+        else:
+            other = None
+        # One character per match: sre only uses its fast charset scan for
+        # an unrepeated class, and "+" halves throughput on clean text
+        return re.compile(other) if other else None
+
+    def normalize(self, text: str) -> str:
+        for step in self.steps:
+            text = step(text)
+        return text
+
+    def normalize_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            yield self.normalize(line)
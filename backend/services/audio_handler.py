@@ -1,22 +1,256 @@
 import os
+import json
 import shutil
+import asyncio
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from backend.services.fingerprints import file_sha256
+from backend.services.reference import ayah_number
 from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+PLACEMENT_MODES = ("hardlink", "reflink", "symlink", "copy")
+# Each mode falls back along this chain when the filesystem refuses it
+# (cross-device links, no copy-on-write support, no symlink permission)
+FALLBACKS = {
+    "hardlink": ("hardlink", "reflink", "copy"),
+    "reflink": ("reflink", "copy"),
+    "symlink": ("symlink", "copy"),
+    "copy": ("copy",),
+}
+FICLONE = 0x40049409  # Linux ioctl: share the source's extents copy-on-write
 
-async def organize_audio(audio_dir: str) -> str:
+
+def _reflink(src: str, dst: str) -> None:
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def _place(mode: str, src: str, dst: str) -> None:
+    if mode == "hardlink":
+        os.link(src, dst)
+    elif mode == "reflink":
+        _reflink(src, dst)
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+    else:
+        shutil.copy2(src, dst)
+
+
+def place_file(src: str, dst: str, mode: str, unsupported: set[str]) -> str:
+    # Hardlinks and reflinks take no extra space and no data I/O. Hardlinks
+    # share the inode with the raw file, so edit organized audio by writing a
+    # new file rather than in place. The new entry is created beside dst and
+    # renamed over it, so re-runs replace earlier placements atomically.
+    # Modes that fail are recorded in `unsupported` and not retried.
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        return "existing"
+    tmp_path = f"{dst}.tmp"
+    for candidate in FALLBACKS[mode]:
+        if candidate in unsupported and candidate != "copy":
+            continue
+        if os.path.lexists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            _place(candidate, src, tmp_path)
+        except (OSError, ImportError) as e:
+            if candidate == "copy":
+                raise
+            logger.info(f"{candidate} unavailable for {dst} ({e}), falling back")
+            unsupported.add(candidate)
+            continue
+        os.replace(tmp_path, dst)
+        return candidate
+    raise OSError(f"Could not place {src}")
+
+
+def reciter_key(name: str) -> str:
+    # Reciter spelling used in audio names, where "_" separates the fields
+    return str(name).strip().replace("_", "-").replace("/", "-")
+
+
+def parse_audio_path(path: str) -> tuple[str, int, int] | None:
+    # (reciter, surah, ayah) from reciter_surah_ayah.ext, the organized
+    # reciter/surah/ayah.ext layout, or EveryAyah-style reciter/SSSAAA.ext
+    stem = os.path.splitext(os.path.basename(path))[0]
+    parent = os.path.dirname(path)
+    parts = stem.rsplit("_", 2)
+    if len(parts) == 3 and parts[0] and parts[1].isdigit() and parts[2].isdigit():
+        parsed = parts[0], int(parts[1]), int(parts[2])
+    elif stem.isdigit() and os.path.basename(parent).isdigit():
+        reciter = os.path.basename(os.path.dirname(parent))
+        parsed = reciter, int(os.path.basename(parent)), int(stem)
+    elif len(stem) == 6 and stem.isdigit():
+        parsed = os.path.basename(parent), int(stem[:3]), int(stem[3:])
+    else:
+        return None
+    if not parsed[0] or ayah_number(parsed[1], parsed[2]) is None:
+        return None
+    return parsed
+
+
+def layout_path(reciter: str, surah: int, ayah: int, ext: str) -> str:
+    return os.path.join(reciter, f"{surah:03d}", f"{ayah:03d}{ext.lower()}")
+
+
+def _scan_dir(path: str, exclude: str) -> tuple[list[tuple[str, int, int]], list[str]]:
+    files, subdirs = [], []
+    extensions = tuple(settings.audio_extensions)
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                if os.path.abspath(entry.path) != exclude:
+                    subdirs.append(entry.path)
+            elif entry.name.lower().endswith(extensions) and entry.is_file():
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime_ns))
+    return files, subdirs
+
+
+def scan_audio(
+    audio_dir: str, pool: ThreadPoolExecutor, exclude: str | None = None
+) -> list[tuple[str, int, int]]:
+    # Directories are listed concurrently: each finished listing submits its
+    # subdirectories, so wide reciter trees on network or cold storage do not
+    # wait on one directory at a time. `exclude` (the organized tree) is
+    # never descended into.
+    exclude = os.path.abspath(exclude) if exclude else ""
+    found = []
+    pending = {pool.submit(_scan_dir, audio_dir, exclude)}
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            files, subdirs = future.result()
+            found.extend(files)
+            pending.update(
+                pool.submit(_scan_dir, subdir, exclude) for subdir in subdirs
+            )
+    return sorted(found)
+
+
+def _load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable audio manifest: {e}")
+        return {}
+
+
+def _save_manifest(path: str, manifest: dict) -> None:
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _organize(audio_dir: str, organized_dir: str) -> dict:
+    # The manifest maps each organized file to its source and the source's
+    # (size, mtime) at placement time. Re-runs place only new or changed
+    # sources; two different sources for one target are reported as a
+    # collision (or counted as duplicates when identical) and the existing
+    # placement is kept. Sources are only read when a collision needs their
+    # contents compared; the owner's sha256 is then kept in the manifest.
+    mode = settings.audio_placement_mode
+    if mode not in PLACEMENT_MODES:
+        raise ValueError(f"Unknown audio placement mode {mode!r}")
+    manifest_path = os.path.join(organized_dir, "manifest.json")
+    manifest = _load_manifest(manifest_path)
+    counts: Counter = Counter()
+    owners: dict[str, str] = {}
+    to_place, conflicts = [], []
+    unsupported: set[str] = set()
+
+    def place(item: tuple[str, str, int, int]) -> str:
+        target, src, _, _ = item
+        dst = os.path.join(organized_dir, target)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        return place_file(src, dst, mode, unsupported)
+
+    with ThreadPoolExecutor(max_workers=settings.audio_scan_workers) as pool:
+        for src, size, mtime_ns in scan_audio(audio_dir, pool, organized_dir):
+            parsed = parse_audio_path(src)
+            if parsed is None:
+                counts["unrecognized"] += 1
+                continue
+            target = layout_path(*parsed, os.path.splitext(src)[1])
+            entry = manifest.get(target)
+            owner = owners.get(target)
+            if owner is None and entry and os.path.exists(entry["source"]):
+                owner = entry["source"]
+            if owner is not None and owner != src:
+                conflicts.append((target, owner, src))
+                continue
+            owners[target] = src
+            if (
+                entry
+                and (entry["source"], entry["size"], entry["mtime_ns"])
+                == (src, size, mtime_ns)
+                and os.path.lexists(os.path.join(organized_dir, target))
+            ):
+                counts["unchanged"] += 1
+                continue
+            to_place.append((target, src, size, mtime_ns))
+
+        for (target, src, size, mtime_ns), placed in zip(
+            to_place, pool.map(place, to_place)
+        ):
+            manifest[target] = {
+                "source": src,
+                "size": size,
+                "mtime_ns": mtime_ns,
+                "mode": placed,
+            }
+            counts["placed"] += 1
+            counts[placed] += 1
+
+    collisions = []
+    for target, owner, src in conflicts:
+        entry = manifest.get(target, {})
+        if os.path.getsize(src) != os.path.getsize(owner):
+            # Different sizes settle it without reading either file
+            duplicate = False
+        elif entry.get("source") == owner:
+            if not entry.get("sha256"):
+                entry["sha256"] = file_sha256(owner)
+            duplicate = file_sha256(src) == entry["sha256"]
+        else:
+            duplicate = file_sha256(src) == file_sha256(owner)
+        if duplicate:
+            counts["duplicates"] += 1
+        else:
+            logger.warning(f"{src} collides with {owner} at {target}, keeping {owner}")
+            collisions.append({"target": target, "sources": [owner, src]})
+    _save_manifest(manifest_path, manifest)
+    return {
+        "placed": counts["placed"],
+        "unchanged": counts["unchanged"],
+        "duplicates": counts["duplicates"],
+        "unrecognized": counts["unrecognized"],
+        "modes": {m: counts[m] for m in PLACEMENT_MODES + ("existing",) if counts[m]},
+        "collisions": collisions,
+    }
+
+
+async def run_audio_organization(audio_dir: str) -> dict:
     organized_dir = os.path.join(settings.data_dir, "processed", "audio")
     os.makedirs(organized_dir, exist_ok=True)
+    report = await asyncio.to_thread(_organize, audio_dir, organized_dir)
+    logger.info(f"Organized audio into {organized_dir}: {report}")
+    return {"organized_dir": organized_dir, **report}
 
-    # Placeholder: assume audio files are in audio_dir, organize by reciter/surah/ayah.wav
-    # For now, copy all .wav files to organized_dir
-    for root, dirs, files in os.walk(audio_dir):
-        for file in files:
-            if file.endswith(".wav"):
-                src = os.path.join(root, file)
-                dst = os.path.join(organized_dir, file)
-                shutil.copy2(src, dst)
 
-    return organized_dir
+async def organize_audio(audio_dir: str) -> str:
+    report = await run_audio_organization(audio_dir)
+    return report["organized_dir"]
@@ -0,0 +1,163 @@
+import os
+import array
+import pyarrow as pa
+import pyarrow.parquet as pq
+from backend.records import loads
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality strings are dictionary encoded, in the file and in Arrow
+SCHEMA = pa.schema(
+    [
+        ("reciter", pa.dictionary(pa.int32(), pa.string())),
+        ("surah", pa.int16()),
+        ("ayah", pa.int16()),
+        ("transcript", pa.string()),
+        ("audio_path", pa.string()),
+        ("duration", pa.float64()),
+        ("original_duration", pa.float64()),
+        ("trimmed_duration", pa.float64()),
+        ("sampling_rate", pa.int32()),
+        ("source", pa.dictionary(pa.int32(), pa.string())),
+    ]
+)
+AUDIO_FIELD = pa.field("audio", pa.binary())
+TOP_LEVEL = ("transcript", "audio_path")  # Everything else is under "metadata"
+OFFSET_BITS = 48  # Partition entries pack ayah << OFFSET_BITS | byte offset
+
+
+def _partition_key(record: dict) -> tuple[str, int]:
+    meta = record.get("metadata", {})
+    return str(meta.get("reciter") or ""), int(meta.get("surah") or 0)
+
+
+def _partitions(jsonl_path: str) -> dict[tuple[str, int], array.array]:
+    # First pass: ayah and byte offset of every record, grouped by (reciter,
+    # surah), so the second pass can write each partition in ayah order
+    # without holding the dataset in memory
+    groups: dict[tuple[str, int], array.array] = {}
+    with open(jsonl_path, "rb") as f:
+        offset = 0
+        for line in f:
+            if line.strip():
+                record = loads(line)
+                ayah = int(record.get("metadata", {}).get("ayah") or 0)
+                groups.setdefault(_partition_key(record), array.array("Q")).append(
+                    ayah << OFFSET_BITS | offset
+                )
+            offset += len(line)
+    return groups
+
+
+def _audio_size(record: dict) -> int:
+    try:
+        return os.path.getsize(record.get("audio_path", ""))
+    except OSError:
+        return 0  # _table skips it
+
+
+def _batches(f, entries, rows_cap: int, bytes_cap: int | None):
+    # Records of one partition in row-group sized lists. With audio embedded
+    # a group also closes once its clips reach bytes_cap, so memory stays
+    # bounded by the cap rather than by the row count.
+    mask = (1 << OFFSET_BITS) - 1
+    rows, size = [], 0
+    for entry in entries:
+        f.seek(entry & mask)
+        record = loads(f.readline())
+        rows.append(record)
+        if bytes_cap is not None:
+            size += _audio_size(record)
+        if len(rows) >= rows_cap or (bytes_cap is not None and size >= bytes_cap):
+            yield rows
+            rows, size = [], 0
+    if rows:
+        yield rows
+
+
+def _table(records: list[dict], schema: pa.Schema) -> tuple[pa.Table, int]:
+    columns: dict[str, list] = {name: [] for name in schema.names}
+    skipped = 0
+    for record in records:
+        if "audio" in columns:
+            try:
+                with open(record.get("audio_path", ""), "rb") as audio:
+                    data = audio.read()
+            except OSError as e:
+                logger.warning(f"Skipping record without audio: {e}")
+                skipped += 1
+                continue
+            columns["audio"].append(data)
+        meta = record.get("metadata", {})
+        for name in SCHEMA.names:
+            columns[name].append(
+                record.get(name) if name in TOP_LEVEL else meta.get(name)
+            )
+    return pa.Table.from_pydict(columns, schema=schema), skipped
+
+
+def write_parquet(
+    jsonl_path: str,
+    output_path: str | None = None,
+    include_audio: bool | None = None,
+) -> dict:
+    # Columnar copy of dataset.jsonl. Rows are ordered by reciter, surah and
+    # ayah, and every row group holds a single (reciter, surah), so min/max
+    # statistics let readers skip whole row groups when filtering on either.
+    output_path = output_path or os.path.join(
+        settings.data_dir, "processed", "dataset.parquet"
+    )
+    if include_audio is None:
+        include_audio = settings.parquet_include_audio
+    schema = SCHEMA.append(AUDIO_FIELD) if include_audio else SCHEMA
+    groups = _partitions(jsonl_path)
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    size = max(1, settings.parquet_row_group_rows)
+    max_bytes = max(1, settings.parquet_row_group_bytes) if include_audio else None
+    records = skipped = row_groups = 0
+    writer = pq.ParquetWriter(
+        tmp_path,
+        schema,
+        compression=settings.parquet_compression,
+        use_dictionary=["reciter", "source"],
+        sorting_columns=[pq.SortingColumn(i) for i in range(3)],
+    )
+    try:
+        with open(jsonl_path, "rb") as f:
+            for key in sorted(groups):
+                entries = sorted(groups.pop(key))
+                for rows in _batches(f, entries, size, max_bytes):
+                    table, missing = _table(rows, schema)
+                    skipped += missing
+                    if table.num_rows:
+                        writer.write_table(table, row_group_size=size)
+                        records += table.num_rows
+                        row_groups += 1
+    finally:
+        writer.close()
+    os.replace(tmp_path, output_path)
+    logger.info(f"Wrote {records} records in {row_groups} row groups to {output_path}")
+    return {
+        "path": output_path,
+        "records": records,
+        "row_groups": row_groups,
+        "skipped": skipped,
+    }
+
+
+def read_dataset(
+    path: str,
+    columns: list[str] | None = None,
+    reciter: str | None = None,
+    surah: int | None = None,
+) -> pa.Table:
+    # Only the requested columns of the matching row groups are read
+    filters = [
+        (name, "=", value)
+        for name, value in (("reciter", reciter), ("surah", surah))
+        if value is not None
+    ]
+    return pq.read_table(path, columns=columns, filters=filters or None)
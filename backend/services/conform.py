@@ -0,0 +1,164 @@
+import os
+import math
+import wave
+import asyncio
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from backend.services.normalizer import get_process_pool
+from backend.services.probe import WAVE_FORMAT_PCM, AudioInfo, probe_many
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Windowed-sinc low-pass: zero crossings on each side of the centre tap (in
+# units of the slower of the two rates) and the Kaiser window shape
+FILTER_HALF_WIDTH = 10
+KAISER_BETA = 5.0
+BLOCK_OUTPUTS = 1 << 15  # Output samples computed per vectorized block
+
+
+def is_pcm_wav(info: AudioInfo | None) -> bool:
+    # What read_pcm can decode: integer PCM WAV. The wave module reads
+    # neither float nor WAVE_FORMAT_EXTENSIBLE files.
+    return (
+        info is not None
+        and info.format == "wav"
+        and info.format_tag == WAVE_FORMAT_PCM
+        and info.bit_depth in (8, 16, 24, 32)
+    )
+
+
+def read_pcm(path: str) -> tuple[np.ndarray, int]:
+    # Integer PCM WAV as float32 in [-1, 1], shape (frames, channels)
+    with wave.open(path, "rb") as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 1:
+        samples = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:
+        # Sign-extend packed 24-bit samples through the top of an int32
+        packed = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+        wide = np.zeros((len(packed), 4), np.uint8)
+        wide[:, 1:] = packed
+        samples = wide.view("<i4").ravel().astype(np.float32) / 2**31
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[width]
+        samples = np.frombuffer(raw, dtype).astype(np.float32) / 2 ** (8 * width - 1)
+    return samples.reshape(-1, channels), rate
+
+
+def write_pcm16(path: str, samples: np.ndarray, rate: int) -> None:
+    pcm = np.clip(np.round(samples * 32767), -32768, 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1 if pcm.ndim == 1 else pcm.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(pcm.tobytes())
+
+
+def _polyphase_filter(up: int, down: int) -> np.ndarray:
+    # Low-pass at the lower Nyquist of the two rates, split into `up` phases:
+    # phases[p, t] is tap p + up * t of the prototype filter
+    rate = max(up, down)
+    taps = 2 * FILTER_HALF_WIDTH * rate + 1
+    n = np.arange(taps) - (taps - 1) / 2
+    prototype = np.sinc(n / rate) * np.kaiser(taps, KAISER_BETA) * (up / rate)
+    per_phase = math.ceil(taps / up)
+    padded = np.zeros(per_phase * up, np.float64)
+    padded[:taps] = prototype
+    return padded.reshape(per_phase, up).T.astype(np.float32)
+
+
+def resample(x: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    # Rational polyphase resampling of a 1-D signal by up/down = dst/src.
+    # Only the taps that meet non-zero samples of the zero-stuffed signal are
+    # evaluated, and whole blocks of outputs are computed as one gather and
+    # one multiply-sum, without Python loops over samples.
+    if src_rate == dst_rate:
+        return x.astype(np.float32, copy=False)
+    g = math.gcd(src_rate, dst_rate)
+    up, down = dst_rate // g, src_rate // g
+    phases = _polyphase_filter(up, down)
+    per_phase = phases.shape[1]
+    delay = FILTER_HALF_WIDTH * max(up, down)  # Centre tap, upsampled domain
+    padded = np.concatenate(
+        [
+            np.zeros(per_phase, np.float32),
+            x.astype(np.float32),
+            np.zeros(per_phase, np.float32),
+        ]
+    )
+    n_out = math.ceil(len(x) * up / down)
+    offsets = np.arange(per_phase)
+    out = np.empty(n_out, np.float32)
+    for start in range(0, n_out, BLOCK_OUTPUTS):
+        n = np.arange(start, min(n_out, start + BLOCK_OUTPUTS))
+        j = n * down + delay  # Position in the upsampled, filtered signal
+        phase, base = j % up, j // up
+        window = padded[(base[:, None] - offsets[None, :]) + per_phase]
+        out[start : start + len(n)] = np.einsum("nt,nt->n", window, phases[phase])
+    return out
+
+
+def conform_file(path: str, target_rate: int, mono: bool) -> int:
+    # Runs in a pool process. The result replaces the file through a rename,
+    # so a hardlinked raw source is never modified.
+    samples, rate = read_pcm(path)
+    if mono and samples.shape[1] > 1:
+        samples = samples.mean(axis=1, keepdims=True)
+    channels = [
+        resample(samples[:, c], rate, target_rate) for c in range(samples.shape[1])
+    ]
+    output = channels[0] if len(channels) == 1 else np.stack(channels, axis=1)
+    tmp_path = f"{path}.tmp"
+    write_pcm16(tmp_path, output, target_rate)
+    os.replace(tmp_path, path)
+    return target_rate
+
+
+def _conform_all(paths: list[str], pool: ProcessPoolExecutor | None) -> dict:
+    target_rate = settings.target_sample_rate
+    mono = settings.conform_mono
+    counts = {"conformed": 0, "already": 0, "unsupported": 0, "failed": 0}
+    todo = []
+    for path, info in probe_many(paths).items():
+        # Anything but integer PCM WAV is left for an external decoder
+        if not is_pcm_wav(info):
+            counts["unsupported"] += 1
+        elif (
+            info.sample_rate == target_rate
+            and (info.channels == 1 or not mono)
+            and info.bit_depth == 16
+        ):
+            counts["already"] += 1
+        else:
+            todo.append(path)
+    if pool is not None:
+        futures = [pool.submit(conform_file, path, target_rate, mono) for path in todo]
+    for i, path in enumerate(todo):
+        try:
+            if pool is None:
+                conform_file(path, target_rate, mono)
+            else:
+                futures[i].result()
+            counts["conformed"] += 1
+        except Exception as e:
+            logger.error(f"Failed to conform {path}: {e}")
+            counts["failed"] += 1
+    return counts
+
+
+async def conform_audio(audio_dir: str) -> dict:
+    # Bring every clip under audio_dir to target_sample_rate (and mono), so
+    # training loaders never resample on the fly. Metadata extraction probes
+    # the conformed files and records their true rate.
+    paths = [
+        os.path.join(root, name)
+        for root, dirs, names in os.walk(audio_dir)
+        for name in sorted(names)
+        if name.lower().endswith(tuple(settings.audio_extensions))
+    ]
+    report = await asyncio.to_thread(_conform_all, paths, get_process_pool())
+    logger.info(f"Conformed audio in {audio_dir}: {report}")
+    return report
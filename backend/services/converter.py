@@ -1,9 +1,16 @@
 import os
 import json
-import wave
-from backend.models import MetadataEntry, JsonlEntry
+import asyncio
+import itertools
+from typing import Iterator
+from backend.records import MetadataRecord, dumps_line, jsonl_line, loads
 from config.settings import settings
-from backend.services.tts import generate_audio_from_text
+from backend.services.tts import TTSScheduler
+from backend.services.audio_handler import parse_audio_path, place_file
+from backend.services.probe import probe_file, probe_many
+from backend.services.trimmer import load_trim_manifest
+from backend.services.reference import FIRST_AYAH
+from backend.services.transcript_index import TranscriptIndex, get_transcript_index
 import logging
 
 logger = logging.getLogger(__name__)
@@ -11,110 +18,207 @@ logger = logging.getLogger(__name__)
 
 def get_audio_duration(file_path):
     try:
-        with wave.open(file_path, "rb") as wav_file:
-            frames = wav_file.getnframes()
-            rate = wav_file.getframerate()
-            return frames / float(rate)
+        return probe_file(file_path).duration
     except Exception as e:
         logger.warning(f"Could not get duration for {file_path}: {e}")
         return 0.0
 
 
-async def extract_metadata(files: list[str]) -> str:
-    metadata = []
-    processed_transcripts_dir = os.path.join(
-        settings.data_dir, "processed", "transcripts"
-    )
+METADATA_NAME = "metadata.jsonl"
+PROBE_BATCH = 1000  # Audio files probed per call while streaming metadata
+READ_CHUNK = 1 << 16  # Characters read at a time from a legacy metadata.json
+TTS_WINDOW = 256  # Metadata entries whose missing audio is synthesized together
+TTS_MAX_CHARS = 1000
+
+
+def _probed_entries(
+    batch: list[tuple[str, tuple[str, int, int]]],
+    trims: dict,
+    organized_dir: str,
+    transcripts: TranscriptIndex,
+) -> Iterator[MetadataRecord]:
+    # Headers are probed once, in parallel, and cached across runs
+    probes = probe_many([file_path for file_path, _ in batch])
+    for file_path, (reciter, surah, ayah) in batch:
+        info = probes.get(file_path)
+        duration = info.duration if info else 0.0
+        sampling_rate = info.sample_rate if info else 16000  # Assume if unreadable
+        trim = trims.get(os.path.relpath(os.path.abspath(file_path), organized_dir), {})
+        yield MetadataRecord(
+            reciter=reciter,
+            surah=surah,
+            ayah=ayah,
+            duration=duration,
+            original_duration=trim.get("original"),
+            trimmed_duration=trim.get("trimmed"),
+            sampling_rate=sampling_rate,
+            source="unknown",
+            transcript=transcripts.get(surah, ayah, reciter) or "",
+            audio_path=file_path,
+        )
 
-    # First, try to extract from audio files
+
+def _audio_entries(
+    files: list[str], transcripts: TranscriptIndex
+) -> Iterator[MetadataRecord]:
+    # reciter_surah_ayah.ext or the organized reciter/surah/ayah.ext, probed
+    # PROBE_BATCH files at a time so only one batch of results is held
+    organized_dir = os.path.abspath(
+        os.path.join(settings.data_dir, "processed", "audio")
+    )
+    trims = load_trim_manifest(organized_dir)
+    batch = []
     for file_path in files:
-        # Placeholder: extract from filename or audio
-        # Assume filename like reciter_surah_ayah.wav
-        basename = os.path.basename(file_path)
-        parts = basename.split("_")
-        if len(parts) >= 3:
-            try:
-                reciter = parts[0]
-                surah = int(parts[1])
-                ayah = int(parts[2].split(".")[0])
-                duration = get_audio_duration(file_path)
-                sampling_rate = 16000  # Assume
-                source = "unknown"
-                transcript = ""  # Would load from transcript file
-                audio_path = file_path
-                entry = MetadataEntry(
-                    reciter=reciter,
-                    surah=surah,
-                    ayah=ayah,
-                    duration=duration,
-                    sampling_rate=sampling_rate,
-                    source=source,
-                    transcript=transcript,
-                    audio_path=audio_path,
-                )
-                metadata.append(entry.dict())
-            except ValueError:
-                # Skip files that don't match the expected format (e.g., generated files)
-                continue
+        if not file_path.lower().endswith(tuple(settings.audio_extensions)):
+            continue
+        parsed = parse_audio_path(file_path)
+        # Skip files that don't match the expected format (e.g., generated files)
+        if parsed is None:
+            continue
+        batch.append((file_path, parsed))
+        if len(batch) == PROBE_BATCH:
+            yield from _probed_entries(batch, trims, organized_dir, transcripts)
+            batch = []
+    if batch:
+        yield from _probed_entries(batch, trims, organized_dir, transcripts)
+
+
+def _transcript_entries(transcripts: TranscriptIndex) -> Iterator[MetadataRecord]:
+    # Text-only datasets: one entry per ayah of the default text, to be
+    # voiced by TTS in convert_to_jsonl
+    for surah, ayah, transcript in transcripts.ayat():
+        n = FIRST_AYAH[surah - 1] + ayah
+        yield MetadataRecord(
+            reciter="generated",
+            surah=surah,
+            ayah=ayah,
+            duration=0,
+            sampling_rate=16000,
+            source="text_dataset",
+            transcript=transcript,
+            audio_path=f"data/processed/audio/generated_{n}.wav",
+        )
 
-    # If no metadata from audio, create from processed transcripts
-    if not metadata and os.path.exists(processed_transcripts_dir):
-        transcript_files = [
-            f
-            for f in os.listdir(processed_transcripts_dir)
-            if f.endswith(".txt") or f.endswith(".csv")
-        ]
-        for i, t_file in enumerate(transcript_files):
-            transcript_path = os.path.join(processed_transcripts_dir, t_file)
-            with open(transcript_path, "r", encoding="utf-8") as f:
-                transcript = f.read()
-            # Dummy metadata for text-only
-            entry = MetadataEntry(
-                reciter="generated",
-                surah=1,  # Default
-                ayah=i + 1,
-                duration=0,
-                sampling_rate=16000,
-                source="text_dataset",
-                transcript=transcript,
-                audio_path=f"data/processed/audio/generated_{i + 1}.wav",
-            )
-            metadata.append(entry.dict())
-
-    metadata_path = os.path.join(settings.data_dir, "processed", "metadata.json")
-    with open(metadata_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, ensure_ascii=False, indent=2)
 
+def _write_metadata(files: list[str], metadata_path: str) -> int:
+    # Each entry is written as soon as it is built, one JSON object per line.
+    # Transcripts are joined by (surah, ayah) through the persisted index,
+    # which is rebuilt at most once per run.
+    transcripts = get_transcript_index()
+    count = 0
+    tmp_path = metadata_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        for entry in _audio_entries(files, transcripts):
+            f.write(dumps_line(entry))
+            count += 1
+        # If no metadata from audio, create from processed transcripts
+        if not count:
+            for entry in _transcript_entries(transcripts):
+                f.write(dumps_line(entry))
+                count += 1
+    os.replace(tmp_path, metadata_path)
+    return count
+
+
+async def extract_metadata(files: list[str]) -> str:
+    # Streams entries to processed/metadata.jsonl (NDJSON), so memory stays
+    # flat however many clips there are
+    metadata_path = os.path.join(settings.data_dir, "processed", METADATA_NAME)
+    os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+    count = await asyncio.to_thread(_write_metadata, files, metadata_path)
+    logger.info(f"Wrote {count} metadata entries to {metadata_path}")
     return metadata_path
 
 
-async def convert_to_jsonl(metadata_path: str, audio_dir: str) -> str:
+def _iter_json_array(f, chunk_size: int = READ_CHUNK) -> Iterator[dict]:
+    # Decodes the items of a top-level JSON array one at a time from
+    # fixed-size reads, without loading the whole document
+    decoder = json.JSONDecoder()
+    buf, eof, opened = "", False, False
+    while True:
+        buf = buf.lstrip()
+        if not opened and buf:
+            if buf[0] != "[":
+                raise ValueError("metadata is not a JSON array")
+            buf, opened = buf[1:].lstrip(), True
+        if opened:
+            buf = buf.lstrip(",").lstrip()
+            if buf.startswith("]"):
+                return
+            try:
+                item, end = decoder.raw_decode(buf)
+            except json.JSONDecodeError:
+                # The next item is cut off at the end of the buffer
+                if eof:
+                    raise
+            else:
+                yield item
+                buf = buf[end:]
+                continue
+        if eof:
+            raise ValueError("metadata ends before the array is closed")
+        more = f.read(chunk_size)
+        eof = not more
+        buf += more
+
+
+def iter_metadata(metadata_path: str) -> Iterator[dict]:
+    # Entries of metadata.jsonl, one line at a time. A metadata.json array
+    # written by older versions is recognised by its leading "[" and decoded
+    # incrementally as well.
     with open(metadata_path, "r", encoding="utf-8") as f:
-        metadata = json.load(f)
+        legacy = f.read(READ_CHUNK).lstrip().startswith("[")
+        f.seek(0)
+        if legacy:
+            yield from _iter_json_array(f)
+            return
+    with open(metadata_path, "rb") as f:
+        for line in f:
+            if line.strip():
+                yield loads(line)
 
-    jsonl_path = os.path.join(settings.data_dir, "processed", "dataset.jsonl")
-    with open(jsonl_path, "w", encoding="utf-8") as f:
-        for item in metadata:
-            audio_path = item["audio_path"]
-            if not os.path.exists(audio_path):
-                # Generate audio from transcript
-                base_name = os.path.splitext(os.path.basename(audio_path))[0]
-                generated_audio = os.path.join(audio_dir, f"generated_{base_name}.mp3")
-                # Generate audio for longer text
-                short_text = item["transcript"][:1000]  # First 1000 chars
-                result = await generate_audio_from_text(short_text, generated_audio)
-                if result:
-                    audio_path = generated_audio
-                    item["audio_path"] = audio_path  # Update metadata
-            entry = JsonlEntry(
-                audio_path=audio_path,
-                transcript=item["transcript"],
-                metadata={
-                    k: v
-                    for k, v in item.items()
-                    if k not in ["audio_path", "transcript"]
-                },
-            )
-            f.write(json.dumps(entry.dict(), ensure_ascii=False) + "\n")
 
+async def _voice(
+    item: dict, audio_dir: str, tts: TTSScheduler, unsupported: set[str]
+) -> str:
+    # Audio path for the entry, generated from its transcript if missing
+    audio_path = item["audio_path"]
+    if os.path.exists(audio_path):
+        return audio_path
+    cached = await tts.synthesize(item["transcript"][:TTS_MAX_CHARS])
+    if cached is None:
+        return audio_path
+    base_name = os.path.splitext(os.path.basename(audio_path))[0]
+    generated_audio = os.path.join(
+        audio_dir, f"generated_{base_name}{tts.engine.extension}"
+    )
+    try:
+        place_file(cached, generated_audio, settings.audio_placement_mode, unsupported)
+    except OSError as e:
+        logger.error(f"Could not place generated audio {generated_audio}: {e}")
+        return audio_path
+    return generated_audio
+
+
+async def convert_to_jsonl(metadata_path: str, audio_dir: str) -> str:
+    # Entries are read a window at a time; missing audio in a window is
+    # synthesized concurrently (and at most once per text) before the
+    # window is written in order
+    jsonl_path = os.path.join(settings.data_dir, "processed", "dataset.jsonl")
+    os.makedirs(os.path.dirname(jsonl_path), exist_ok=True)
+    os.makedirs(audio_dir, exist_ok=True)
+    tts = TTSScheduler()
+    unsupported: set[str] = set()
+    try:
+        with open(jsonl_path, "wb") as f:
+            items = iter_metadata(metadata_path)
+            while window := list(itertools.islice(items, TTS_WINDOW)):
+                paths = await asyncio.gather(
+                    *(_voice(item, audio_dir, tts, unsupported) for item in window)
+                )
+                for item, audio_path in zip(window, paths):
+                    f.write(jsonl_line(item, audio_path))
+    finally:
+        tts.close()
+    logger.info(f"Text to speech for {jsonl_path}: {tts.stats}")
     return jsonl_path
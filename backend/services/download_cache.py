@@ -0,0 +1,92 @@
+import os
+import json
+import time
+import threading
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DownloadCache:
+    # Manifest of source URL -> validators and local files, persisted under
+    # data_dir/cache so re-runs can revalidate instead of re-downloading.
+    # Overlapping downloads share one instance (get_download_cache), and
+    # every write merges into the manifest as it is on disk, so concurrent
+    # requests never drop each other's entries.
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir or os.path.join(settings.data_dir, "cache")
+        self.manifest_path = os.path.join(self.cache_dir, "downloads.json")
+        self.lock = threading.Lock()
+        self.entries = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable download manifest: {e}")
+            return {}
+
+    def _write(self, source: str, entry: dict) -> None:
+        with self.lock:
+            self.entries = {**self._load(), source: entry}
+            self._save()
+
+    def _save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    def get(self, source: str) -> dict | None:
+        # Entries whose files were deleted or changed on disk are not usable
+        entry = self.entries.get(source)
+        if not entry:
+            return None
+        for path in entry.get("files", []):
+            if not os.path.exists(path):
+                return None
+        if "size" in entry and os.path.getsize(entry["files"][0]) != entry["size"]:
+            return None
+        return entry
+
+    def is_fresh(self, entry: dict) -> bool:
+        age = time.time() - entry.get("fetched_at", 0)
+        return age < settings.download_cache_ttl
+
+    def touch(self, source: str) -> None:
+        self._write(source, {**self.entries[source], "fetched_at": time.time()})
+
+    def put(self, source: str, files: list[str], **validators) -> None:
+        self._write(
+            source,
+            {
+                "files": files,
+                "fetched_at": time.time(),
+                **{k: v for k, v in validators.items() if v is not None},
+            },
+        )
+
+
+_caches: dict[str, DownloadCache] = {}
+
+
+def get_download_cache() -> DownloadCache:
+    cache_dir = os.path.join(settings.data_dir, "cache")
+    if cache_dir not in _caches:
+        _caches[cache_dir] = DownloadCache(cache_dir)
+    return _caches[cache_dir]
+
+
+def conditional_headers(entry: dict) -> dict:
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
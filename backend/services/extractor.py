@@ -1,85 +1,459 @@
 import os
-import requests
-import subprocess
-import glob
+import json
+import time
+import asyncio
+import hashlib
+import shutil
+import filecmp
+from collections import defaultdict
+from urllib.parse import urlsplit, urlunsplit
+import httpx
+from huggingface_hub import snapshot_download
+from backend.services.download_cache import (
+    DownloadCache,
+    conditional_headers,
+    get_download_cache,
+)
+from backend.services.hf_ingest import (
+    AUDIO_EXTENSIONS,
+    SHARD_EXTENSIONS,
+    ingest_snapshot,
+)
 from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Try different kaggle paths for cross-platform
+KAGGLE_CMDS = [
+    "kaggle",
+    "/home/adminuser/venv/bin/kaggle",
+    "/usr/local/bin/kaggle",
+]
 
-async def download_datasets(sources: list[str]) -> list[str]:
-    downloaded_files = []
-    raw_dir = os.path.join(settings.data_dir, "raw")
-    os.makedirs(raw_dir, exist_ok=True)
 
-    for source in sources:
+PART_META_SUFFIX = ".part.json"  # Validators of the response a .part came from
+
+
+class ChecksumMismatchError(Exception):
+    pass
+
+
+def _split_checksum(source: str) -> tuple[str, tuple[str, str] | None]:
+    # Optional checksum travels in the URL fragment, pip-style: ...#sha256=<hex>
+    parts = urlsplit(source)
+    checksum = None
+    if parts.fragment and "=" in parts.fragment:
+        algorithm, digest = parts.fragment.split("=", 1)
+        if algorithm.lower() in hashlib.algorithms_available:
+            checksum = (algorithm.lower(), digest.lower())
+    url = urlunsplit(parts._replace(fragment=""))
+    return url, checksum
+
+
+def _new_hashers(checksum: tuple[str, str] | None) -> dict:
+    hashers = {"sha256": hashlib.sha256()}
+    if checksum and checksum[0] != "sha256":
+        hashers[checksum[0]] = hashlib.new(checksum[0])
+    return hashers
+
+
+def _write_chunk(f, chunk: bytes, hashers: list) -> None:
+    f.write(chunk)
+    for hasher in hashers:
+        hasher.update(chunk)
+
+
+def _hash_file(path: str, hashers: list) -> None:
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(settings.download_chunk_size), b""):
+            for hasher in hashers:
+                hasher.update(block)
+
+
+def _source_host(source: str) -> str:
+    host = urlsplit(source).hostname or ""
+    return host.removeprefix("www.")
+
+
+def _staging_dir(raw_dir: str, source: str) -> str:
+    # Every source gets its own directory under raw/, so a download can only
+    # ever report (and later stages only ever see) that source's files.
+    url, _ = _split_checksum(source)
+    parts = urlsplit(url)
+    segments = [s for s in parts.path.split("/") if s]
+    if "kaggle.com" in source and len(segments) >= 3:
+        name = f"kaggle_{segments[1]}_{segments[2]}"
+    elif "huggingface.co" in source and len(segments) >= 3:
+        name = f"hf_{segments[1]}_{segments[2]}"
+    else:
+        digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:12]
+        name = f"{_source_host(url) or 'local'}_{digest}"
+    return os.path.join(raw_dir, name)
+
+
+def _list_files(directory: str) -> list[str]:
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        files.extend(
+            os.path.join(root, n)
+            for n in names
+            if not n.endswith((".part", PART_META_SUFFIX))
+        )
+    return sorted(files)
+
+
+def _merge_staged(incoming_dir: str, target_dir: str) -> list[str]:
+    # Move freshly extracted files into place, keeping only those that are new
+    # or whose content differs from what the previous download left behind.
+    changed = []
+    for src in _list_files(incoming_dir):
+        dst = os.path.join(target_dir, os.path.relpath(src, incoming_dir))
+        if (
+            os.path.exists(dst)
+            and os.path.getsize(dst) == os.path.getsize(src)
+            and filecmp.cmp(src, dst, shallow=False)
+        ):
+            continue
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        os.replace(src, dst)
+        changed.append(dst)
+    shutil.rmtree(incoming_dir, ignore_errors=True)
+    return changed
+
+
+def create_http_client() -> httpx.AsyncClient:
+    # One pooled keep-alive client is shared by every source in a batch
+    limits = httpx.Limits(
+        max_connections=settings.download_max_connections,
+        max_keepalive_connections=settings.download_max_connections,
+    )
+    return httpx.AsyncClient(
+        limits=limits,
+        timeout=settings.download_timeout,
+        follow_redirects=True,
+    )
+
+
+def _if_range(meta_path: str) -> str | None:
+    # Validator a resumed request must match, so the server sends the rest of
+    # the same representation or the whole new one. Weak ETags can't be used.
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    etag = meta.get("etag")
+    if etag and not etag.startswith("W/"):
+        return etag
+    return meta.get("last_modified")
+
+
+def _range_total(content_range: str | None) -> int | None:
+    # Complete length from a "bytes */1234" or "bytes 0-9/1234" header
+    _, _, total = (content_range or "").rpartition("/")
+    return int(total) if total.isdigit() else None
+
+
+def _discard_part(part_path: str) -> None:
+    for path in (part_path, part_path + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+async def _stream_download(
+    client: httpx.AsyncClient,
+    url: str,
+    filepath: str,
+    checksum: tuple[str, str] | None = None,
+    validators: dict | None = None,
+) -> dict | None:
+    # Stream into a .part file so memory stays flat; retries resume from the
+    # bytes already on disk with a Range request guarded by If-Range, using
+    # the validators stored next to the .part file. Returns None when the
+    # server answers a conditional request with 304 Not Modified. Chunks are
+    # hashed as they are written, so the file is never read back; only the
+    # prefix a resume starts from is read, and only when it was written
+    # before this call.
+    part_path = filepath + ".part"
+    meta_path = filepath + PART_META_SUFFIX
+    attempts = max(1, settings.download_retries)
+    attempt = 1
+    info = {}
+    hashers, hashed = _new_hashers(checksum), 0
+    while True:
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if_range = _if_range(meta_path) if offset else None
+        if offset and not if_range:
+            logger.info(f"No validator for the partial download of {url}, restarting")
+            _discard_part(part_path)
+            offset = 0
+        if offset:
+            headers = {"Range": f"bytes={offset}-", "If-Range": if_range}
+        else:
+            headers = dict(validators or {})
+        started = time.monotonic()
+        received = 0
         try:
-            if "kaggle.com" in source:
-                # Handle Kaggle dataset
-                parts = source.split("/")
-                if len(parts) >= 6 and parts[3] == "datasets":
-                    dataset = f"{parts[4]}/{parts[5]}"
-                    logger.info(f"Downloading Kaggle dataset: {dataset}")
-                    env = os.environ.copy()
-                    if settings.kaggle_api_key:
-                        env["KAGGLE_API_TOKEN"] = settings.kaggle_api_key
-                    # Try different kaggle paths for cross-platform
-                    kaggle_cmds = [
-                        "kaggle",
-                        "/home/adminuser/venv/bin/kaggle",
-                        "/usr/local/bin/kaggle",
-                    ]
-                    result = None
-                    for cmd in kaggle_cmds:
-                        try:
-                            result = subprocess.run(
-                                [
-                                    cmd,
-                                    "datasets",
-                                    "download",
-                                    dataset,
-                                    "-p",
-                                    raw_dir,
-                                    "--unzip",
-                                ],
-                                capture_output=True,
-                                text=True,
-                                env=env,
-                                timeout=60,  # Add timeout
-                            )
-                            if result.returncode == 0:
-                                break
-                        except FileNotFoundError:
-                            continue
-                        except subprocess.TimeoutExpired:
-                            continue
-                    if result and result.returncode != 0:
-                        logger.error(
-                            f"Failed to download Kaggle dataset: {result.stderr}"
+            async with client.stream("GET", url, headers=headers) as response:
+                if not offset and response.status_code == 304:
+                    return None
+                if offset and response.status_code == 416:
+                    total = _range_total(response.headers.get("Content-Range"))
+                    if total == offset:
+                        # Nothing left to fetch: the .part file is already complete
+                        break
+                    logger.info(
+                        f"Partial download of {url} has {offset} of {total} bytes, restarting"
+                    )
+                    _discard_part(part_path)
+                    continue
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    logger.info(f"Server sent the full file for {url}, restarting")
+                    offset = 0
+                info["etag"] = response.headers.get("ETag")
+                info["last_modified"] = response.headers.get("Last-Modified")
+                if not offset:
+                    with open(meta_path, "w", encoding="utf-8") as f:
+                        json.dump(
+                            {
+                                "etag": info["etag"],
+                                "last_modified": info["last_modified"],
+                            },
+                            f,
                         )
-                    if result.returncode == 0:
-                        # Find downloaded files
-                        files = glob.glob(os.path.join(raw_dir, "*"))
-                        downloaded_files.extend(files)
-                        logger.info(f"Downloaded Kaggle dataset files: {files}")
-                    else:
-                        logger.error(
-                            f"Failed to download Kaggle dataset: {result.stderr}"
+                if hashed != offset:
+                    hashers, hashed = _new_hashers(checksum), 0
+                    if offset:
+                        await asyncio.to_thread(
+                            _hash_file, part_path, list(hashers.values())
                         )
-                else:
-                    logger.error(f"Invalid Kaggle URL format: {source}")
-            else:
-                # General download
-                response = requests.get(source, timeout=30)
-                response.raise_for_status()
-                filename = source.split("/")[-1] or "downloaded_file"
-                filepath = os.path.join(raw_dir, filename)
-                with open(filepath, "wb") as f:
-                    f.write(response.content)
-                downloaded_files.append(filepath)
-                logger.info(f"Downloaded {source} to {filepath}")
+                        hashed = offset
+                with open(part_path, "ab" if offset else "wb") as f:
+                    async for chunk in response.aiter_bytes(
+                        settings.download_chunk_size
+                    ):
+                        await asyncio.to_thread(
+                            _write_chunk, f, chunk, list(hashers.values())
+                        )
+                        received += len(chunk)
+                        hashed += len(chunk)
+            elapsed = max(time.monotonic() - started, 1e-6)
+            logger.info(
+                f"Fetched {received} bytes of {url} at {received / elapsed:.0f} bytes/sec"
+                + (f" (resumed at byte {offset})" if offset else "")
+            )
+            break
+        except httpx.TransportError as e:
+            if attempt == attempts:
+                raise
+            attempt += 1
+            logger.warning(
+                f"Download of {url} interrupted ({e}), resuming (attempt {attempt}/{attempts})"
+            )
+
+    if hashed != os.path.getsize(part_path):
+        # Completed without a body (416 on an already whole .part file)
+        hashers = _new_hashers(checksum)
+        await asyncio.to_thread(_hash_file, part_path, list(hashers.values()))
+    info["sha256"] = hashers["sha256"].hexdigest()
+    if checksum:
+        algorithm, expected = checksum
+        actual = hashers[algorithm].hexdigest()
+        if actual != expected:
+            _discard_part(part_path)
+            raise ChecksumMismatchError(
+                f"{algorithm} mismatch for {url}: expected {expected}, got {actual}"
+            )
+
+    os.replace(part_path, filepath)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    info["size"] = os.path.getsize(filepath)
+    return info
+
+
+async def _run_kaggle(*args: str) -> tuple[int, str, str] | None:
+    env = os.environ.copy()
+    if settings.kaggle_api_key:
+        env["KAGGLE_API_TOKEN"] = settings.kaggle_api_key
+    result = None
+    for cmd in KAGGLE_CMDS:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                cmd,
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                env=env,
+            )
+        except FileNotFoundError:
+            continue
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                proc.communicate(), timeout=settings.kaggle_timeout
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            continue
+        result = (
+            proc.returncode,
+            stdout.decode(errors="replace"),
+            stderr.decode(errors="replace"),
+        )
+        if proc.returncode == 0:
+            break
+    return result
+
+
+async def _kaggle_version(dataset: str) -> str | None:
+    # The file listing (names, sizes, creation dates) changes whenever a new
+    # dataset version is published, so its hash serves as a version key.
+    result = await _run_kaggle("datasets", "files", dataset, "--csv")
+    if result is None or result[0] != 0:
+        return None
+    return hashlib.sha256(result[1].encode("utf-8")).hexdigest()
+
+
+async def _download_kaggle(
+    source: str, raw_dir: str, cache: DownloadCache
+) -> list[str]:
+    parts = source.split("/")
+    if not (len(parts) >= 6 and parts[3] == "datasets"):
+        logger.error(f"Invalid Kaggle URL format: {source}")
+        return []
+    dataset = f"{parts[4]}/{parts[5]}"
+    cached = cache.get(source)
+    if cached and cache.is_fresh(cached):
+        logger.info(f"Using cached Kaggle dataset {dataset}")
+        return cached["files"]
+    version = await _kaggle_version(dataset)
+    if cached and (version is None or version == cached.get("version")):
+        if version is None:
+            logger.warning(f"Could not check {dataset} version, using cached files")
+        else:
+            logger.info(f"Kaggle dataset {dataset} unchanged, using cached files")
+            cache.touch(source)
+        return cached["files"]
+
+    logger.info(f"Downloading Kaggle dataset: {dataset}")
+    target_dir = _staging_dir(raw_dir, source)
+    incoming_dir = os.path.join(target_dir, ".incoming")
+    shutil.rmtree(incoming_dir, ignore_errors=True)
+    os.makedirs(incoming_dir)
+    result = await _run_kaggle(
+        "datasets", "download", dataset, "-p", incoming_dir, "--unzip"
+    )
+    if result is None or result[0] != 0:
+        shutil.rmtree(incoming_dir, ignore_errors=True)
+        stderr = result[2] if result else "kaggle CLI not found or timed out"
+        logger.error(f"Failed to download Kaggle dataset: {stderr}")
+        return []
+    files = await asyncio.to_thread(_merge_staged, incoming_dir, target_dir)
+    logger.info(f"Downloaded Kaggle dataset files: {files}")
+    cache.put(source, _list_files(target_dir), version=version)
+    return files
+
+
+async def _download_huggingface(
+    source: str, raw_dir: str, cache: DownloadCache
+) -> list[str]:
+    segments = [s for s in urlsplit(source).path.split("/") if s]
+    if not (len(segments) >= 3 and segments[0] == "datasets"):
+        logger.error(f"Invalid HuggingFace URL format: {source}")
+        return []
+    repo_id = f"{segments[1]}/{segments[2]}"
+    cached = cache.get(source)
+    if cached and cache.is_fresh(cached):
+        logger.info(f"Using cached HuggingFace dataset {repo_id}")
+        return cached["files"]
+
+    logger.info(f"Fetching HuggingFace dataset snapshot: {repo_id}")
+    snapshot_dir = await asyncio.to_thread(
+        snapshot_download,
+        repo_id=repo_id,
+        repo_type="dataset",
+        cache_dir=os.path.join(settings.data_dir, "cache", "huggingface"),
+        token=settings.huggingface_api_key,
+        allow_patterns=[f"*{ext}" for ext in SHARD_EXTENSIONS]
+        + [f"*.{ext}" for ext in AUDIO_EXTENSIONS],
+    )
+    # Snapshot directories are named after the commit they were taken at
+    revision = os.path.basename(os.path.normpath(snapshot_dir))
+    if cached and cached.get("version") == revision:
+        logger.info(f"HuggingFace dataset {repo_id} unchanged, using cached files")
+        cache.touch(source)
+        return cached["files"]
+    files = await asyncio.to_thread(
+        ingest_snapshot, snapshot_dir, _staging_dir(raw_dir, source)
+    )
+    cache.put(source, files, version=revision)
+    return files
+
+
+async def _download_url(
+    client: httpx.AsyncClient, source: str, raw_dir: str, cache: DownloadCache
+) -> list[str]:
+    cached = cache.get(source)
+    if cached and cache.is_fresh(cached):
+        logger.info(f"Using cached download of {source}")
+        return cached["files"]
+
+    # General download, streamed to disk in chunks
+    url, checksum = _split_checksum(source)
+    filename = os.path.basename(urlsplit(url).path) or "downloaded_file"
+    target_dir = _staging_dir(raw_dir, source)
+    os.makedirs(target_dir, exist_ok=True)
+    filepath = os.path.join(target_dir, filename)
+    validators = conditional_headers(cached) if cached else None
+    info = await _stream_download(client, url, filepath, checksum, validators)
+    if info is None:
+        logger.info(f"{source} not modified, using cached {cached['files']}")
+        cache.touch(source)
+        return cached["files"]
+    logger.info(f"Downloaded {source} to {filepath} ({info['size']} bytes)")
+    cache.put(source, [filepath], **info)
+    return [filepath]
+
+
+async def download_datasets(
+    sources: list[str], client: httpx.AsyncClient | None = None
+) -> list[str]:
+    raw_dir = os.path.join(settings.data_dir, "raw")
+    os.makedirs(raw_dir, exist_ok=True)
+
+    # Sources run concurrently; a per-host semaphore keeps any single server
+    # from being hit with more than download_per_host_limit transfers at once.
+    host_limits = defaultdict(
+        lambda: asyncio.Semaphore(max(1, settings.download_per_host_limit))
+    )
+    cache = get_download_cache()
+    owns_client = client is None
+    if owns_client:
+        client = create_http_client()
+
+    async def fetch(source: str) -> list[str]:
+        try:
+            async with host_limits[_source_host(source)]:
+                if "kaggle.com" in source:
+                    return await _download_kaggle(source, raw_dir, cache)
+                if "huggingface.co/datasets/" in source:
+                    return await _download_huggingface(source, raw_dir, cache)
+                return await _download_url(client, source, raw_dir, cache)
         except Exception as e:
             logger.error(f"Failed to download {source}: {e}")
+            return []
+
+    try:
+        results = await asyncio.gather(*(fetch(source) for source in sources))
+    finally:
+        if owns_client:
+            await client.aclose()
 
+    downloaded_files = []
+    for files in results:
+        downloaded_files.extend(files)
     return downloaded_files
@@ -0,0 +1,65 @@
+import os
+import json
+import hashlib
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.download_chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FingerprintStore:
+    # Manifest of (input sha256, output version) -> output file, persisted
+    # under data_dir/cache so re-runs skip inputs whose normalized output is
+    # already on disk. The version covers everything that changes the output
+    # (rule set, text columns), so changing any of them reprocesses.
+
+    def __init__(self, cache_dir: str | None = None):
+        self.cache_dir = cache_dir or os.path.join(settings.data_dir, "cache")
+        self.manifest_path = os.path.join(self.cache_dir, "normalize.json")
+        self.entries = self._load()
+
+    def _load(self) -> dict:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            # A bad manifest only costs a full re-run, never the run itself
+            logger.warning(f"Ignoring unreadable fingerprint manifest: {e}")
+            return {}
+
+    def save(self) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.manifest_path)
+
+    @staticmethod
+    def key(sha256: str, version: str) -> str:
+        return f"{version}:{sha256}"
+
+    def is_current(self, sha256: str, version: str, output_path: str) -> bool:
+        # Outputs deleted or modified since they were recorded do not count
+        entry = self.entries.get(self.key(sha256, version))
+        return (
+            entry is not None
+            and entry["output"] == output_path
+            and os.path.exists(output_path)
+            and os.path.getsize(output_path) == entry["size"]
+        )
+
+    def put(self, sha256: str, version: str, output_path: str) -> None:
+        self.entries[self.key(sha256, version)] = {
+            "output": output_path,
+            "size": os.path.getsize(output_path),
+        }
@@ -0,0 +1,177 @@
+import os
+import csv
+import json
+import tarfile
+from typing import Iterator
+import pyarrow.parquet as pq
+from backend.services.audio_handler import reciter_key
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+SHARD_EXTENSIONS = (".parquet", ".jsonl", ".json", ".tar")
+# Hub metadata shipped next to the data shards; never rows
+METADATA_FILES = (
+    "dataset_info.json",
+    "dataset_infos.json",
+    "dataset_dict.json",
+    "state.json",
+)
+AUDIO_EXTENSIONS = ("wav", "mp3", "flac")
+TRANSCRIPT_FIELDS = ["key", "reciter", "surah", "ayah", "text", "audio_path"]
+
+# Column names seen in recitation datasets on the Hub, in order of preference
+FIELD_ALIASES = {
+    "reciter": ["reciter", "reciter_name", "qari", "speaker"],
+    "surah": ["surah", "surah_no", "sura", "chapter"],
+    "ayah": ["ayah", "ayah_no_surah", "aya", "verse"],
+}
+
+
+def iter_shard_rows(path: str) -> Iterator[dict]:
+    # Yield one row at a time; parquet is read in small record batches and tar
+    # archives are read as a stream, so a shard is never held in memory whole.
+    if path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=settings.hf_batch_rows):
+            yield from batch.to_pylist()
+    elif path.endswith((".jsonl", ".json")):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif path.endswith(".tar"):
+        # WebDataset layout: consecutive members sharing a key form one sample
+        sample = {}
+        with tarfile.open(path, mode="r|*") as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                name = os.path.basename(member.name)
+                key, _, ext = name.partition(".")
+                if sample and sample["__key__"] != key:
+                    yield sample
+                    sample = {}
+                sample["__key__"] = key
+                sample[ext] = tar.extractfile(member).read()
+        if sample:
+            yield sample
+
+
+def iter_snapshot_rows(snapshot_dir: str) -> Iterator[tuple[str, dict]]:
+    for root, dirs, files in os.walk(snapshot_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if not name.endswith(SHARD_EXTENSIONS) or name in METADATA_FILES:
+                continue
+            path = os.path.join(root, name)
+            logger.info(f"Reading HuggingFace shard {path}")
+            try:
+                for row in iter_shard_rows(path):
+                    yield path, row
+            except (OSError, ValueError, tarfile.TarError) as e:
+                # e.g. a pretty-printed .json that is not JSON Lines
+                logger.warning(f"Skipping the rest of unreadable shard {path}: {e}")
+
+
+def _audio_extension(data: bytes, hint: str | None = None) -> str:
+    if hint:
+        ext = os.path.splitext(hint)[1].lstrip(".").lower()
+        if ext in AUDIO_EXTENSIONS:
+            return ext
+    if data[:4] == b"RIFF":
+        return "wav"
+    if data[:4] == b"fLaC":
+        return "flac"
+    return "mp3"
+
+
+def _row_audio(row: dict, shard_path: str) -> tuple[bytes, str] | None:
+    for ext in AUDIO_EXTENSIONS:
+        if isinstance(row.get(ext), bytes):
+            return row[ext], ext
+    audio = row.get(settings.hf_audio_column)
+    if isinstance(audio, dict):
+        if audio.get("bytes"):
+            return audio["bytes"], _audio_extension(audio["bytes"], audio.get("path"))
+        audio = audio.get("path")
+    if isinstance(audio, str):
+        # JSONL shards reference audio files relative to the shard
+        path = os.path.join(os.path.dirname(shard_path), audio)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                data = f.read()
+            return data, _audio_extension(data, path)
+    return None
+
+
+def _row_fields(row: dict) -> dict:
+    if isinstance(row.get("json"), bytes):
+        row = {**json.loads(row["json"]), **row}
+    fields = {}
+    for field, aliases in FIELD_ALIASES.items():
+        fields[field] = next((row[a] for a in aliases if row.get(a) is not None), "")
+    text = next(
+        (row[c] for c in settings.hf_text_columns if row.get(c) is not None), None
+    )
+    if text is None and isinstance(row.get("txt"), bytes):
+        text = row["txt"].decode("utf-8")
+    fields["text"] = text or ""
+    return fields
+
+
+def _shard_dir(snapshot_dir: str, shard_path: str) -> str:
+    # Clips of each shard get their own directory, so equal ids in two
+    # splits never overwrite each other
+    rel = os.path.splitext(os.path.relpath(shard_path, snapshot_dir))[0]
+    return rel.replace(os.sep, "__")
+
+
+def ingest_snapshot(snapshot_dir: str, output_dir: str) -> list[str]:
+    # Write audio clips and a transcripts.csv into the raw layout row by row,
+    # so memory use is independent of the number of rows in the dataset.
+    audio_dir = os.path.join(output_dir, "audio")
+    os.makedirs(audio_dir, exist_ok=True)
+    transcripts_path = os.path.join(output_dir, "transcripts.csv")
+    tmp_path = transcripts_path + ".tmp"
+    written = []
+    rows = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TRANSCRIPT_FIELDS)
+        writer.writeheader()
+        for shard_path, row in iter_snapshot_rows(snapshot_dir):
+            fields = _row_fields(row)
+            key = str(row.get("__key__") or row.get("id") or f"row-{rows:06d}")
+            # Ids and labels become file names; keep them to one path segment
+            stem = reciter_key(key) or f"row-{rows:06d}"
+            if fields["reciter"]:
+                # The transcript joins on the spelling used in the audio name
+                fields["reciter"] = reciter_key(fields["reciter"])
+            audio_path = ""
+            audio = _row_audio(row, shard_path)
+            if audio:
+                data, ext = audio
+                surah, ayah = reciter_key(fields["surah"]), reciter_key(fields["ayah"])
+                if fields["reciter"] and surah and ayah:
+                    # Match the reciter_surah_ayah naming the converter parses
+                    name = f"{fields['reciter']}_{surah}_{ayah}.{ext}"
+                elif stem.isdigit():
+                    # A bare number would parse as an EveryAyah SSSAAA name
+                    name = f"row-{stem}.{ext}"
+                else:
+                    name = f"{stem}.{ext}"
+                shard_dir = os.path.join(
+                    audio_dir, _shard_dir(snapshot_dir, shard_path)
+                )
+                os.makedirs(shard_dir, exist_ok=True)
+                audio_path = os.path.join(shard_dir, name)
+                with open(audio_path, "wb") as audio_file:
+                    audio_file.write(data)
+                written.append(audio_path)
+            writer.writerow({"key": key, "audio_path": audio_path, **fields})
+            rows += 1
+    os.replace(tmp_path, transcripts_path)
+    written.append(transcripts_path)
+    logger.info(f"Ingested {rows} rows from {snapshot_dir} into {output_dir}")
+    return written
@@ -0,0 +1,125 @@
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(text: str, model: str, prompt_version: str) -> str:
+    payload = "\x1f".join([prompt_version, model, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    # SQLite store of LLM responses keyed by hash(text, model, prompt version),
+    # so re-running the pipeline over the same ayat makes no new API calls.
+    # Entries expire by age, and the least recently used ones are evicted when
+    # the store grows past llm_cache_max_mb. Eviction runs on open and again
+    # after every llm_cache_evict_every writes, so long-lived clients such as
+    # the review worker stay within bounds too.
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(settings.data_dir, "cache", "llm.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+        )
+        self.db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.unevicted = 0  # Entries written since the last eviction
+        self.evict()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get_many(self, keys: list[str]) -> dict[str, str]:
+        found = {}
+        now = time.time()
+        with self.lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self.db.execute(
+                    f"SELECT key, value FROM responses WHERE key IN ({marks})", chunk
+                ).fetchall()
+                found.update(rows)
+                self.db.execute(
+                    f"UPDATE responses SET accessed = ? WHERE key IN ({marks})",
+                    [now, *chunk],
+                )
+            self.db.commit()
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def put_many(self, items: dict[str, str]) -> None:
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, value, len(value.encode("utf-8")), now, now)
+                    for key, value in items.items()
+                ],
+            )
+            self.db.commit()
+            self.unevicted += len(items)
+            due = self.unevicted >= max(1, settings.llm_cache_evict_every)
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        max_age = settings.llm_cache_max_age_days * 86400
+        max_bytes = int(settings.llm_cache_max_mb * 1024 * 1024)
+        with self.lock:
+            self.unevicted = 0
+            removed = self.db.execute(
+                "DELETE FROM responses WHERE created < ?", (time.time() - max_age,)
+            ).rowcount
+            total = self.db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+            if total > max_bytes:
+                # Walk from least recently used until enough bytes are freed
+                excess = total - max_bytes
+                rows = self.db.execute(
+                    "SELECT key, size FROM responses ORDER BY accessed"
+                )
+                stale = []
+                for key, size in rows:
+                    if excess <= 0:
+                        break
+                    stale.append((key,))
+                    excess -= size
+                self.db.executemany("DELETE FROM responses WHERE key = ?", stale)
+                removed += len(stale)
+            self.db.commit()
+        if removed:
+            logger.info(f"Evicted {removed} LLM cache entries")
+        return removed
+
+    def stats(self) -> dict:
+        with self.lock:
+            entries, size = self.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": size,
+        }
@@ -0,0 +1,248 @@
+import json
+import time
+import random
+import asyncio
+import httpx
+from collections import deque
+from backend.services.llm_cache import LLMCache, cache_key
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Bump whenever SYSTEM_PROMPT or the request format changes, so cached
+# responses to the old prompt are not reused
+PROMPT_VERSION = "batch-v1"
+SYSTEM_PROMPT = (
+    "You are an expert in Arabic text normalization. Ensure the text is in "
+    "proper Arabic script. You receive a JSON object "
+    '{"ayat": [{"id": <int>, "text": <string>}, ...]}. Normalize the text of '
+    "every entry and reply with only a JSON object "
+    '{"results": [{"id": <int>, "text": <string>}, ...]} containing every id.'
+)
+
+
+class LLMError(Exception):
+    pass
+
+
+class TokenBucket:
+    # Smooths request starts to `rate` per second with bursts up to `capacity`
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class LLMClient:
+    # Async chat-completions client for OpenAI-compatible APIs (Groq). One
+    # pooled keep-alive connection set is shared by all requests; a semaphore
+    # bounds in-flight requests and a token bucket keeps under the provider's
+    # requests-per-minute quota. Many ayat are packed into one request.
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        base_url: str | None = None,
+        model: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        cache: LLMCache | None = None,
+    ):
+        self.api_key = api_key or settings.groq_api_key
+        self.base_url = (base_url or settings.groq_base_url).rstrip("/")
+        self.model = model or settings.groq_model
+        self.owns_client = http_client is None
+        self.http = http_client or httpx.AsyncClient(
+            timeout=settings.llm_timeout,
+            limits=httpx.Limits(
+                max_connections=settings.llm_concurrency,
+                max_keepalive_connections=settings.llm_concurrency,
+            ),
+        )
+        self.semaphore = asyncio.Semaphore(max(1, settings.llm_concurrency))
+        self.bucket = TokenBucket(
+            rate=settings.llm_requests_per_minute / 60.0,
+            capacity=max(1, settings.llm_concurrency),
+        )
+        self.stats = {"requests": 0, "retries": 0, "failures": 0}
+        # Wall time of recent HTTP attempts, for load tests and monitoring
+        self.latencies: deque[float] = deque(maxlen=10000)
+        self.owns_cache = cache is None and settings.llm_cache_enabled
+        self.cache = LLMCache() if self.owns_cache else cache
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        if self.owns_client:
+            await self.http.aclose()
+        if self.owns_cache:
+            self.cache.close()
+
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        retry_after = response.headers.get("Retry-After") if response else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        delay = min(settings.llm_backoff_max, settings.llm_backoff_base * 2**attempt)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def chat(self, messages: list[dict], max_tokens: int, **extra) -> str:
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": 0.0,
+            **extra,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+        url = f"{self.base_url}/chat/completions"
+        for attempt in range(settings.llm_max_retries + 1):
+            response = None
+            async with self.semaphore:
+                await self.bucket.acquire()
+                self.stats["requests"] += 1
+                started = time.perf_counter()
+                try:
+                    response = await self.http.post(url, json=payload, headers=headers)
+                    self.latencies.append(time.perf_counter() - started)
+                except httpx.TransportError as e:
+                    error = str(e) or type(e).__name__
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        if response.is_error:
+                            self.stats["failures"] += 1
+                            raise LLMError(
+                                f"HTTP {response.status_code} - {response.text}"
+                            )
+                        result = response.json()
+                        return result["choices"][0]["message"]["content"]
+                    error = f"HTTP {response.status_code}"
+            if attempt == settings.llm_max_retries:
+                break
+            delay = self._backoff(attempt, response)
+            self.stats["retries"] += 1
+            logger.info(f"LLM request failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        self.stats["failures"] += 1
+        raise LLMError(f"LLM request failed after {attempt + 1} attempts: {error}")
+
+    async def validate_batch(self, ayat: list[str]) -> tuple[list[str], list[bool]]:
+        # One request for the whole batch; entries the model drops or mangles
+        # fall back to their input text and are flagged False.
+        content = json.dumps(
+            {"ayat": [{"id": i, "text": text} for i, text in enumerate(ayat)]},
+            ensure_ascii=False,
+        )
+        reply = await self.chat(
+            [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": content},
+            ],
+            max_tokens=min(settings.llm_max_tokens, 256 + 2 * len(content)),
+            response_format={"type": "json_object"},
+        )
+        results = list(ayat)
+        answered = [False] * len(ayat)
+        try:
+            for item in json.loads(reply).get("results", []):
+                i = item.get("id")
+                if isinstance(i, int) and 0 <= i < len(ayat) and item.get("text"):
+                    results[i] = str(item["text"]).strip()
+                    answered[i] = True
+        except (ValueError, AttributeError) as e:
+            logger.warning(f"Unparseable LLM batch response: {e}")
+        if not all(answered):
+            logger.warning(
+                f"LLM reply left out {answered.count(False)} of {len(ayat)} ayat"
+            )
+        return results, answered
+
+    async def validate_many(self, ayat: list[str]) -> list[str]:
+        validated, _ = await self.validate_many_with_status(ayat)
+        return validated
+
+    async def validate_many_with_status(
+        self, ayat: list[str]
+    ) -> tuple[list[str], list[bool]]:
+        # Like validate_many, but also reports which entries actually got an
+        # answer (from the API or the cache) rather than the input fallback
+        validated = list(ayat)
+        ok_flags = [True] * len(ayat)
+        # Blank lines are passed through and repeated ayat are sent only once
+        pending = {}
+        for i, text in enumerate(ayat):
+            if text.strip():
+                pending.setdefault(text, []).append(i)
+        if self.cache is not None and pending:
+            keys = {
+                text: cache_key(text, self.model, PROMPT_VERSION) for text in pending
+            }
+            cached = self.cache.get_many(list(keys.values()))
+            for text in list(pending):
+                if keys[text] in cached:
+                    for i in pending.pop(text):
+                        validated[i] = cached[keys[text]]
+
+        async def run(batch: list[str]) -> tuple[list[str], list[bool]]:
+            try:
+                return await self.validate_batch(batch)
+            except Exception as e:
+                logger.warning(f"LLM validation failed for batch: {e}")
+                return batch, [False] * len(batch)  # Fallback to original text
+
+        batches = list(pack_batches(list(pending)))
+        results = await asyncio.gather(*(run(batch) for batch in batches))
+        fresh = {}
+        for batch, (outputs, answered) in zip(batches, results):
+            for text, output, ok in zip(batch, outputs, answered):
+                for i in pending[text]:
+                    validated[i] = output
+                    ok_flags[i] = ok
+                # Only answers the model actually gave are cached
+                if ok:
+                    fresh[cache_key(text, self.model, PROMPT_VERSION)] = output
+        if self.cache is not None:
+            if fresh:
+                self.cache.put_many(fresh)
+            logger.info(f"LLM cache: {self.cache.stats()}")
+        return validated, ok_flags
+
+
+def pack_batches(ayat: list[str]):
+    # Greedily fill each request up to llm_batch_size ayat / llm_batch_chars
+    batch: list[str] = []
+    chars = 0
+    for text in ayat:
+        if batch and (
+            len(batch) >= settings.llm_batch_size
+            or chars + len(text) > settings.llm_batch_chars
+        ):
+            yield batch
+            batch, chars = [], 0
+        batch.append(text)
+        chars += len(text)
+    if batch:
+        yield batch
@@ -1,93 +1,310 @@
 import os
 import re
-import requests
+import csv
+import asyncio
+import itertools
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Iterator
+from backend.services.arabic_normalizer import Normalizer, RuleSet
+from backend.services.fingerprints import FingerprintStore, file_sha256
+from backend.services.llm_client import LLMClient
+from backend.services.reference import AYAH_COLUMNS, SURAH_COLUMNS, column_index
+from backend.services.review_queue import (
+    ReviewQueue,
+    get_review_queue,
+    review_worker_running,
+)
 from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+ARABIC_LETTER = re.compile("[\u0621-\u064a]")
 
-async def validate_with_llm(text: str) -> str:
+
+async def validate_with_llm(text: str, client: LLMClient | None = None) -> str:
     if not settings.groq_api_key:
         logger.info("Groq API key not set, skipping LLM validation")
         return text
-    # Limit text to first 1000 chars to avoid API limits
-    text = text[:1000]
-    logger.info(f"LLM processing text of length {len(text)}")
-    # Chunk the text to avoid token limits, but process only first chunk to limit API usage
-    chunk_size = 1000
-    chunks = [text[i : i + chunk_size] for i in range(0, len(text), chunk_size)]
-    normalized_chunks = []
-    for chunk in chunks[:1]:  # Only process first chunk
-        logger.info(f"Processing chunk of length {len(chunk)}")
-        try:
-            response = requests.post(
-                "https://api.groq.com/openai/v1/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {settings.groq_api_key}",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": "llama-3.1-8b-instant",
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": f"You are an expert in Arabic text normalization. Ensure the text is in proper Arabic script. Normalize this Arabic text: {chunk}",
-                        },
-                    ],
-                    "max_tokens": 300,
-                    "temperature": 0.0,
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            result = response.json()
-            normalized = result["choices"][0]["message"]["content"].strip()
-            normalized_chunks.append(normalized)
-        except requests.exceptions.HTTPError as e:
-            logger.warning(
-                f"LLM validation failed for chunk (HTTP): {e.response.status_code} - {e.response.text}"
-            )
-            normalized_chunks.append(chunk)  # Fallback to original chunk
-        except Exception as e:
-            logger.warning(f"LLM validation failed for chunk: {e}")
-            normalized_chunks.append(chunk)  # Fallback to original chunk
-    return "".join(normalized_chunks)
+    # One ayah per line; lines are packed many to a request
+    ayat = text.splitlines()
+    logger.info(f"LLM processing {len(ayat)} lines ({len(text)} chars)")
+    if client is not None:
+        return "\n".join(await client.validate_many(ayat))
+    async with LLMClient() as client:
+        return "\n".join(await client.validate_many(ayat))
 
 
-async def normalize_transcripts(transcript_files: list[str]) -> list[str]:
-    normalized_files = []
+def _normalize_rows(
+    normalizer: Normalizer, rows: list[list[str]], columns: list[int] | None
+) -> list[list[str]]:
+    for row in rows:
+        targets = columns or [
+            i for i, value in enumerate(row) if ARABIC_LETTER.search(value)
+        ]
+        for i in targets:
+            if i < len(row):
+                row[i] = normalizer.normalize(row[i])
+    return rows
+
+
+_worker_normalizers: dict[RuleSet, Normalizer] = {}
+
+
+def _normalize_shard(
+    rules: RuleSet, rows: list[list[str]], columns: list[int] | None
+) -> list[list[str]]:
+    # Runs in a pool process; each process compiles a rule set only once
+    normalizer = _worker_normalizers.get(rules)
+    if normalizer is None:
+        normalizer = _worker_normalizers[rules] = Normalizer(rules)
+    return _normalize_rows(normalizer, rows, columns)
+
+
+_process_pool: ProcessPoolExecutor | None = None
+
+
+def get_process_pool() -> ProcessPoolExecutor | None:
+    # One pool sized to the cores is shared by every normalization request.
+    # "spawn" avoids forking a process that is running event loop threads.
+    global _process_pool
+    workers = settings.normalize_workers or os.cpu_count() or 1
+    if workers <= 1:
+        return None
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+def _shards(rows: Iterable[list[str]], size: int) -> Iterator[list[list[str]]]:
+    rows = iter(rows)
+    while shard := list(itertools.islice(rows, size)):
+        yield shard
+
+
+def _map_shards(
+    normalizer: Normalizer,
+    rows: Iterable[list[str]],
+    columns: list[int] | None,
+    pool: ProcessPoolExecutor | None,
+) -> Iterator[list[list[str]]]:
+    # Yield normalized row shards in input order. Shards go to the process
+    # pool with a bounded number in flight, so memory stays proportional to
+    # the window rather than the file.
+    shards = _shards(rows, max(1, settings.normalize_shard_rows))
+    first = next(shards, None)
+    if first is None:
+        return
+    second = next(shards, None)
+    if pool is None or second is None:
+        # Inputs smaller than one shard are not worth a round trip to the pool
+        for shard in itertools.chain([first], [second] if second else [], shards):
+            yield _normalize_rows(normalizer, shard, columns)
+        return
+    window = 2 * (settings.normalize_workers or os.cpu_count() or 1)
+    pending: deque[Future] = deque()
+    for shard in itertools.chain([first, second], shards):
+        pending.append(pool.submit(_normalize_shard, normalizer.rules, shard, columns))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def normalize_file(
+    file_path: str,
+    output_path: str,
+    normalizer: Normalizer,
+    pool: ProcessPoolExecutor | None = None,
+    review: ReviewQueue | None = None,
+) -> int:
+    # Stream row by row (CSV) or line by line (text), so memory stays bounded
+    # by the shard window rather than the file size. Normalized text is handed
+    # to the review queue as it is written, never awaited here. Output goes
+    # to a temporary file renamed into place, so readers never see a partial
+    # file and an interrupted run leaves the previous output intact.
+    tmp_path = f"{output_path}.tmp"
+    try:
+        count = _normalize_to(
+            file_path, tmp_path, output_path, normalizer, pool, review
+        )
+        os.replace(tmp_path, output_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return count
+
+
+def _normalize_to(
+    file_path: str,
+    tmp_path: str,
+    output_path: str,
+    normalizer: Normalizer,
+    pool: ProcessPoolExecutor | None,
+    review: ReviewQueue | None,
+) -> int:
+    is_csv = file_path.endswith(".csv")
+    newline = "" if is_csv else None
+    count = 0
+    surah_col = ayah_col = None
+    with open(file_path, "r", encoding="utf-8", newline=newline) as fin:
+        with open(tmp_path, "w", encoding="utf-8", newline=newline) as fout:
+            if is_csv:
+                # Only the configured text columns are normalized; delimiters,
+                # headers and the surah/ayah number columns pass through.
+                reader = csv.reader(fin)
+                writer = csv.writer(fout)
+                header = next(reader, None)
+                if header is None:
+                    return 0
+                columns = [
+                    i
+                    for i, name in enumerate(header)
+                    if name.strip().lower() in settings.transcript_text_columns
+                ]
+                if columns:
+                    writer.writerow(header)
+                    rows = reader
+                    surah_col = column_index(header, SURAH_COLUMNS)
+                    ayah_col = column_index(header, AYAH_COLUMNS)
+                else:
+                    logger.warning(
+                        f"No text column from {settings.transcript_text_columns} in "
+                        f"{file_path} header, normalizing columns that contain Arabic"
+                    )
+                    columns = None
+                    rows = itertools.chain([header], reader)
+                write_rows = writer.writerows
+            else:
+                columns = [0]
+                rows = ([line.rstrip("\r\n")] for line in fin)
+
+                def write_rows(shard):
+                    fout.writelines(row[0] + "\n" for row in shard)
+
+            for shard in _map_shards(normalizer, rows, columns, pool):
+                write_rows(shard)
+                if review is not None:
+                    review.enqueue(
+                        _review_items(
+                            output_path, shard, count, columns, surah_col, ayah_col
+                        )
+                    )
+                count += len(shard)
+    return count
+
+
+def _review_items(
+    file_path: str,
+    shard: list[list[str]],
+    start: int,
+    columns: list[int] | None,
+    surah_col: int | None,
+    ayah_col: int | None,
+):
+    # Ayat are identified as "surah:ayah" when the CSV has those columns,
+    # otherwise by their 1-based row number in the file
+    for n, row in enumerate(shard, start + 1):
+        if surah_col is not None and ayah_col is not None:
+            ayah = f"{row[surah_col]}:{row[ayah_col]}"
+        else:
+            ayah = str(n)
+        for i in columns or range(len(row)):
+            if i < len(row) and ARABIC_LETTER.search(row[i]):
+                yield file_path, ayah, row[i]
+
+
+def _output_version(normalizer: Normalizer) -> str:
+    # Everything besides the input bytes that determines the output
+    return f"{normalizer.version}|{','.join(settings.transcript_text_columns)}"
+
+
+def _output_name(file_path: str) -> str:
+    # Every source is staged in its own raw/<source>/ dir and several may
+    # hold a file of the same name (e.g. transcripts.csv from each HF
+    # dataset), so the staging path is kept in the output name
+    raw_dir = os.path.abspath(os.path.join(settings.data_dir, "raw"))
+    path = os.path.abspath(file_path)
+    if os.path.commonpath([raw_dir, path]) == raw_dir:
+        return os.path.relpath(path, raw_dir).replace(os.sep, "__")
+    return os.path.basename(file_path)
+
+
+async def run_normalization(transcript_files: list[str]) -> dict:
     processed_dir = os.path.join(settings.data_dir, "processed", "transcripts")
     os.makedirs(processed_dir, exist_ok=True)
+    normalizer = Normalizer(settings.normalizer_rules)
+    version = _output_version(normalizer)
+    pool = get_process_pool()
+    # LLM review happens in the background (see review_queue); normalization
+    # only enqueues, so its latency no longer depends on the remote API.
+    # Nothing is queued unless a worker is running to drain it.
+    review = None
+    if settings.review_enabled:
+        if review_worker_running():
+            review = get_review_queue()
+        else:
+            logger.info("LLM review worker is not running, skipping review")
+    # Inputs whose bytes and output version match a recorded run are skipped
+    fingerprints = FingerprintStore() if settings.normalize_incremental else None
 
-    for file_path in transcript_files:
+    async def normalize_one(
+        file_path: str, output_path: str | None
+    ) -> tuple[str | None, bool]:
+        if output_path is None:
+            logger.error(f"Not normalizing {file_path}: its output name is taken")
+            return None, False
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                text = f.read()
-
-            # Normalize to Uthmani: basic cleaning
-            normalized_text = text
-            # normalized_text = reshape(text)
-            # normalized_text = get_display(normalized_text)
-
-            # Remove non-Uthmani (placeholder, e.g., Warsh)
-            # Assume Uthmani is standard, remove variants if detected
-            # For now, basic cleaning: keep Arabic letters, diacritics, spaces
-            normalized_text = re.sub(
-                r"[^\u0600-\u06FF\u064B-\u065F\s]", "", normalized_text
-            )  # Remove non-Arabic
-
-            # LLM validation for advanced correction (log suggestion, keep basic)
-            llm_suggestion = await validate_with_llm(normalized_text)
-            logger.info(f"LLM suggestion for {file_path}: {llm_suggestion}")
-            # Note: LLM may refuse religious text; using basic normalization
-
-            output_path = os.path.join(processed_dir, os.path.basename(file_path))
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(normalized_text)
-
-            normalized_files.append(output_path)
+            sha256 = None
+            if fingerprints is not None:
+                sha256 = await asyncio.to_thread(file_sha256, file_path)
+                if fingerprints.is_current(sha256, version, output_path):
+                    logger.info(f"Skipping unchanged {file_path}")
+                    return output_path, True
+            # File I/O runs on a thread and the CPU work in the process pool,
+            # so the event loop keeps serving other requests meanwhile
+            count = await asyncio.to_thread(
+                normalize_file, file_path, output_path, normalizer, pool, review
+            )
+            if fingerprints is not None:
+                fingerprints.put(sha256, version, output_path)
+            logger.info(f"Normalized {count} rows of {file_path} into {output_path}")
+            return output_path, False
         except Exception as e:
             logger.error(f"Failed to normalize {file_path}: {e}")
+            return None, False
+
+    # Inputs are normalized concurrently, so two of them must never share an
+    # output (or its .tmp); later inputs that would are rejected
+    outputs: list[str | None] = []
+    taken: set[str] = set()
+    for file_path in transcript_files:
+        output_path = os.path.join(processed_dir, _output_name(file_path))
+        outputs.append(None if output_path in taken else output_path)
+        taken.add(output_path)
+    results = await asyncio.gather(
+        *(normalize_one(f, out) for f, out in zip(transcript_files, outputs))
+    )
+    if fingerprints is not None:
+        try:
+            fingerprints.save()
+        except Exception as e:
+            logger.warning(f"Could not save normalization fingerprints: {e}")
+    normalized = [path for path, _ in results if path]
+    skipped = sum(1 for path, was_skipped in results if path and was_skipped)
+    return {
+        "normalized": normalized,
+        "processed": len(normalized) - skipped,
+        "skipped": skipped,
+        "failed": len(results) - len(normalized),
+    }
 
-    return normalized_files
+
+async def normalize_transcripts(transcript_files: list[str]) -> list[str]:
+    report = await run_normalization(transcript_files)
+    return report["normalized"]
@@ -0,0 +1,273 @@
+import os
+import struct
+import sqlite3
+import threading
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+HEADER_BYTES = 64 * 1024  # Enough for ID3 padding before the first MP3 frame
+
+# MPEG audio frame header tables, indexed by the header's bit fields
+MP3_BITRATES = {
+    # (MPEG-1, layer) and (MPEG-2/2.5, layer) -> kbps by bitrate index
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+WAVE_FORMAT_PCM = 1  # Integer PCM; float is 3, WAVE_FORMAT_EXTENSIBLE 0xFFFE
+INDEX_VERSION = 2  # Bumped whenever AudioInfo gains a field
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}  # fmt: skip
+
+
+@dataclass(frozen=True)
+class AudioInfo:
+    format: str
+    duration: float
+    sample_rate: int
+    channels: int
+    bit_depth: int | None  # None for lossy formats
+    format_tag: int | None = None  # WAV fmt chunk format code, None otherwise
+
+
+def _probe_wav(f, size: int) -> AudioInfo:
+    header = f.read(12)
+    if header[:4] not in (b"RIFF", b"RF64") or header[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    fmt = None
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            raise ValueError("no data chunk")
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk)
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", f.read(16))
+            f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("data chunk before fmt chunk")
+            # Streamed or RF64 files leave the size unset; use the file size
+            data_size = min(chunk_size, size - f.tell())
+            tag, channels, sample_rate, _, block_align, bits = fmt
+            frames = data_size // block_align if block_align else 0
+            return AudioInfo(
+                "wav", frames / sample_rate, sample_rate, channels, bits, tag
+            )
+        else:
+            # Chunks are word aligned; skip without reading their payload
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _skip_id3(f) -> int:
+    header = f.read(10)
+    if header[:3] != b"ID3":
+        f.seek(0)
+        return 0
+    tag_size = 0
+    for byte in header[6:10]:  # Syncsafe integer: 7 bits per byte
+        tag_size = (tag_size << 7) | (byte & 0x7F)
+    start = 10 + tag_size + (10 if header[5] & 0x10 else 0)
+    f.seek(start)
+    return start
+
+
+def _probe_flac(f, size: int) -> AudioInfo:
+    _skip_id3(f)
+    if f.read(4) != b"fLaC":
+        raise ValueError("not a FLAC file")
+    block_header = f.read(4)
+    if not block_header or block_header[0] & 0x7F != 0:
+        raise ValueError("missing STREAMINFO block")
+    info = f.read(34)
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits depth - 1, 36 bits samples
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bit_depth = ((packed >> 36) & 0x1F) + 1
+    samples = packed & 0xFFFFFFFFF
+    duration = samples / sample_rate if sample_rate else 0.0
+    return AudioInfo("flac", duration, sample_rate, channels, bit_depth)
+
+
+def _probe_mp3(f, size: int) -> AudioInfo:
+    start = _skip_id3(f)
+    data = f.read(HEADER_BYTES)
+    # Find the first frame sync whose fields are all valid
+    for i in range(len(data) - 4):
+        if data[i] != 0xFF or data[i + 1] & 0xE0 != 0xE0:
+            continue
+        header = int.from_bytes(data[i : i + 4], "big")
+        version_bits = (header >> 19) & 0x3
+        layer = 4 - ((header >> 17) & 0x3)
+        bitrate_index = (header >> 12) & 0xF
+        rate_index = (header >> 10) & 0x3
+        if version_bits == 1 or layer == 4 or bitrate_index in (0, 15):
+            continue
+        if rate_index == 3:
+            continue
+        version = 1 if version_bits == 3 else 2
+        bitrate = MP3_BITRATES[(version, layer)][bitrate_index] * 1000
+        sample_rate = MP3_SAMPLE_RATES[version_bits][rate_index]
+        channels = 1 if (header >> 6) & 0x3 == 3 else 2
+        samples_per_frame = (
+            384 if layer == 1 else 1152 if layer == 2 or version == 1 else 576
+        )
+        # A Xing/Info (VBR) or VBRI header in the first frame has the frame
+        # count; otherwise the stream is constant bitrate
+        side_info = (
+            (32 if channels == 2 else 17)
+            if version == 1
+            else (17 if channels == 2 else 9)
+        )
+        xing = i + 4 + side_info
+        frames = None
+        if data[xing : xing + 4] in (b"Xing", b"Info"):
+            flags = int.from_bytes(data[xing + 4 : xing + 8], "big")
+            if flags & 0x1:
+                frames = int.from_bytes(data[xing + 8 : xing + 12], "big")
+        elif data[i + 36 : i + 40] == b"VBRI":
+            frames = int.from_bytes(data[i + 50 : i + 54], "big")
+        if frames:
+            duration = frames * samples_per_frame / sample_rate
+        else:
+            audio_bytes = size - start - i
+            duration = audio_bytes * 8 / bitrate
+        return AudioInfo("mp3", duration, sample_rate, channels, None)
+    raise ValueError("no MPEG audio frame found")
+
+
+def probe_file(path: str) -> AudioInfo:
+    # Reads only headers (and, for WAV, chunk headers); samples are never
+    # decoded. The format is sniffed from the content, since generated MP3s
+    # are sometimes saved with a .wav name.
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        magic = f.read(4)
+        f.seek(0)
+        if magic in (b"RIFF", b"RF64"):
+            return _probe_wav(f, size)
+        if magic == b"fLaC" or path.lower().endswith(".flac"):
+            return _probe_flac(f, size)
+        # Anything else must be MPEG audio frames, possibly behind an ID3 tag
+        return _probe_mp3(f, size)
+
+
+class ProbeIndex:
+    # SQLite sidecar of probe results keyed by (path, size, mtime), so files
+    # that have not changed since they were last probed are never reopened.
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(settings.data_dir, "cache", "probe.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        (version,) = self.db.execute("PRAGMA user_version").fetchone()
+        if version != INDEX_VERSION:
+            # Rows from an older layout lack fields; probe those files again
+            self.db.execute("DROP TABLE IF EXISTS probes")
+            self.db.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "format TEXT NOT NULL, duration REAL NOT NULL, sample_rate INTEGER NOT NULL, "
+            "channels INTEGER NOT NULL, bit_depth INTEGER, format_tag INTEGER)"
+        )
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def get_many(self, stats: dict[str, tuple[int, int]]) -> dict[str, AudioInfo]:
+        found = {}
+        paths = list(stats)
+        with self.lock:
+            for start in range(0, len(paths), 500):
+                chunk = paths[start : start + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self.db.execute(
+                    "SELECT path, size, mtime_ns, format, duration, sample_rate, "
+                    f"channels, bit_depth, format_tag FROM probes WHERE path IN ({marks})",
+                    chunk,
+                ).fetchall()
+                for path, size, mtime_ns, *info in rows:
+                    if stats[path] == (size, mtime_ns):
+                        found[path] = AudioInfo(*info)
+        return found
+
+    def put_many(self, items: dict[str, tuple[tuple[int, int], AudioInfo]]) -> None:
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        path,
+                        size,
+                        mtime_ns,
+                        info.format,
+                        info.duration,
+                        info.sample_rate,
+                        info.channels,
+                        info.bit_depth,
+                        info.format_tag,
+                    )
+                    for path, ((size, mtime_ns), info) in items.items()
+                ],
+            )
+            self.db.commit()
+
+
+_indexes: dict[str, ProbeIndex] = {}
+
+
+def get_probe_index() -> ProbeIndex:
+    path = os.path.join(settings.data_dir, "cache", "probe.sqlite3")
+    if path not in _indexes:
+        _indexes[path] = ProbeIndex(path)
+    return _indexes[path]
+
+
+def probe_many(
+    paths: list[str], index: ProbeIndex | None = None
+) -> dict[str, AudioInfo | None]:
+    # One stat per file decides whether the index entry is still valid; only
+    # new or changed files are opened, concurrently on a thread pool.
+    # Unreadable or unsupported files map to None.
+    index = index or get_probe_index()
+    results: dict[str, AudioInfo | None] = {}
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            logger.warning(f"Could not probe {path}: {e}")
+            results[path] = None
+            continue
+        stats[path] = (stat.st_size, stat.st_mtime_ns)
+    cached = index.get_many(stats)
+    results.update(cached)
+    missing = [path for path in stats if path not in cached]
+
+    def probe(path: str) -> AudioInfo | None:
+        try:
+            return probe_file(path)
+        except (OSError, ValueError, struct.error, ZeroDivisionError) as e:
+            logger.warning(f"Could not probe {path}: {e}")
+            return None
+
+    fresh = {}
+    if missing:
+        with ThreadPoolExecutor(max_workers=settings.probe_workers) as pool:
+            for path, info in zip(missing, pool.map(probe, missing)):
+                results[path] = info
+                if info is not None:
+                    fresh[path] = (stats[path], info)
+        index.put_many(fresh)
+    logger.info(f"Probed {len(missing)} audio files, {len(cached)} from the index")
+    return results
@@ -0,0 +1,325 @@
+import os
+import csv
+import mmap
+import bisect
+import struct
+import itertools
+from typing import Iterable, Iterator
+from backend.services.arabic_normalizer import Normalizer
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Number of ayat in each of the 114 surahs (Hafs numbering, 6236 in total)
+AYAH_COUNTS = (
+    7, 286, 200, 176, 120, 165, 206, 75, 129, 109, 123, 111, 43, 52, 99, 128,
+    111, 110, 98, 135, 112, 78, 118, 64, 77, 227, 93, 88, 69, 60, 34, 30, 73,
+    54, 45, 83, 182, 88, 75, 85, 54, 53, 89, 59, 37, 35, 38, 29, 18, 45, 60,
+    49, 62, 55, 78, 96, 29, 22, 24, 13, 14, 11, 11, 18, 12, 12, 30, 52, 52,
+    44, 28, 28, 20, 56, 40, 31, 50, 40, 46, 42, 29, 19, 36, 25, 22, 17, 19,
+    26, 30, 20, 15, 21, 11, 8, 8, 19, 5, 8, 8, 11, 11, 8, 3, 9, 5, 4, 7, 3,
+    6, 3, 5, 4, 5, 6,
+)  # fmt: skip
+FIRST_AYAH = tuple(itertools.accumulate(AYAH_COUNTS, initial=0))
+TOTAL_AYAT = FIRST_AYAH[-1]
+
+SURAH_COLUMNS = ("surah_no", "surah", "sura")
+AYAH_COLUMNS = ("ayah_no_surah", "ayah", "aya")
+VARIANT_COLUMNS = ("reciter", "variant", "riwayah", "riwaya")
+DEFAULT_VARIANT = ""  # Text used for any reciter without a variant of its own
+
+# Index file: fixed header, then TOTAL_AYAT + 1 little-endian uint32 byte
+# offsets into the UTF-8 text blob that follows. Ayah n of the mushaf lives
+# at blob[offsets[n]:offsets[n + 1]], so a lookup is two unpacks and a slice
+# of the memory map.
+MAGIC = b"QREF0001"
+HEADER = struct.Struct("<8sIIQd")  # magic, count, reserved, source size, mtime
+OFFSET = struct.Struct("<I")
+
+
+def column_index(header: list[str], names: tuple[str, ...]) -> int | None:
+    lowered = [name.strip().lower() for name in header]
+    return next((lowered.index(n) for n in names if n in lowered), None)
+
+
+def ayah_number(surah: int, ayah: int) -> int | None:
+    # 0-based position of (surah, ayah) in mushaf order
+    if 1 <= surah <= len(AYAH_COUNTS) and 1 <= ayah <= AYAH_COUNTS[surah - 1]:
+        return FIRST_AYAH[surah - 1] + ayah - 1
+    return None
+
+
+def _read_source(source_path: str) -> list[str]:
+    # Accepts Tanzil's "surah|ayah|text" export, a CSV with surah, ayah and
+    # text columns, or plain text with one ayah per line in mushaf order
+    ayat: list[str | None] = [None] * TOTAL_AYAT
+    with open(source_path, "r", encoding="utf-8-sig", newline="") as f:
+        first = f.readline()
+        f.seek(0)
+        if source_path.endswith(".csv"):
+            reader = csv.reader(f)
+            header = next(reader)
+            surah_col = column_index(header, SURAH_COLUMNS)
+            ayah_col = column_index(header, AYAH_COLUMNS)
+            text_col = column_index(header, tuple(settings.transcript_text_columns))
+            if None in (surah_col, ayah_col, text_col):
+                raise ValueError(f"{source_path} needs surah, ayah and text columns")
+            rows = ((r[surah_col], r[ayah_col], r[text_col]) for r in reader if r)
+        elif first.count("|") >= 2:
+            rows = (
+                line.rstrip("\r\n").split("|", 2)
+                for line in f
+                if line.strip() and not line.startswith("#")
+            )
+        else:
+            lines = [line.rstrip("\r\n") for line in f if line.strip()]
+            if len(lines) != TOTAL_AYAT:
+                raise ValueError(
+                    f"{source_path} has {len(lines)} lines, expected {TOTAL_AYAT}"
+                )
+            return lines
+        for surah, ayah, text in rows:
+            n = ayah_number(int(surah), int(ayah))
+            if n is None:
+                raise ValueError(f"{source_path}: no ayah {surah}:{ayah}")
+            ayat[n] = text.strip()
+    missing = ayat.count(None)
+    if missing:
+        raise ValueError(f"{source_path} is missing {missing} ayat")
+    return ayat
+
+
+def write_index(
+    ayat: list[str | None], index_path: str, source_size: int, source_mtime: float
+) -> str:
+    # Ayat without text are stored empty and read back as ""
+    blobs = [(text or "").encode("utf-8") for text in ayat]
+    offsets = itertools.accumulate((len(b) for b in blobs), initial=0)
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, TOTAL_AYAT, 0, source_size, source_mtime))
+        f.write(b"".join(OFFSET.pack(offset) for offset in offsets))
+        f.write(b"".join(blobs))
+    os.replace(tmp_path, index_path)
+    return index_path
+
+
+def build_reference_index(source_path: str, index_path: str) -> str:
+    ayat = _read_source(source_path)
+    stat = os.stat(source_path)
+    write_index(ayat, index_path, stat.st_size, stat.st_mtime)
+    logger.info(f"Built reference index {index_path} from {source_path}")
+    return index_path
+
+
+class ReferenceIndex:
+    # Read-only, memory-mapped view of an index built by build_reference_index.
+    # Only the pages of ayat actually looked up are ever read from disk.
+
+    def __init__(self, index_path: str):
+        self.path = index_path
+        with open(index_path, "rb") as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, _, self.source_size, self.source_mtime = HEADER.unpack_from(
+            self.map, 0
+        )
+        if magic != MAGIC or count != TOTAL_AYAT:
+            self.map.close()
+            raise ValueError(f"{index_path} is not a reference index")
+        self.blob_start = HEADER.size + OFFSET.size * (count + 1)
+
+    def close(self) -> None:
+        self.map.close()
+
+    def __len__(self) -> int:
+        return TOTAL_AYAT
+
+    def text_at(self, n: int) -> str:
+        start, end = (
+            OFFSET.unpack_from(self.map, HEADER.size + OFFSET.size * i)[0]
+            for i in (n, n + 1)
+        )
+        return self.map[self.blob_start + start : self.blob_start + end].decode("utf-8")
+
+    def get(self, surah: int, ayah: int) -> str | None:
+        n = ayah_number(surah, ayah)
+        return None if n is None else self.text_at(n)
+
+    def is_current(self, source_path: str) -> bool:
+        stat = os.stat(source_path)
+        return (stat.st_size, stat.st_mtime) == (self.source_size, self.source_mtime)
+
+
+_index: ReferenceIndex | None = None
+
+
+def get_reference_index() -> ReferenceIndex:
+    # Built on first use and rebuilt whenever the canonical text changes; an
+    # existing index keeps working if the source text is removed afterwards
+    global _index
+    source_path = settings.reference_text_path or os.path.join(
+        settings.data_dir, "reference", "quran-uthmani.txt"
+    )
+    index_path = os.path.join(settings.data_dir, "reference", "uthmani.idx")
+    has_source = os.path.exists(source_path)
+    if _index is not None:
+        if _index.path == index_path and (
+            not has_source or _index.is_current(source_path)
+        ):
+            return _index
+        _index.close()
+        _index = None
+    if not has_source and not os.path.exists(index_path):
+        raise FileNotFoundError(f"No reference text at {source_path}")
+    if has_source and not os.path.exists(index_path):
+        build_reference_index(source_path, index_path)
+    index = ReferenceIndex(index_path)
+    if has_source and not index.is_current(source_path):
+        index.close()
+        build_reference_index(source_path, index_path)
+        index = ReferenceIndex(index_path)
+    _index = index
+    return _index
+
+
+def edit_distance(a: str, b: str) -> int:
+    # Character-level Levenshtein distance with Myers' bit-parallel algorithm
+    # (Hyyrö's formulation): each column of the DP matrix is a pair of bit
+    # vectors held in Python ints, so the cost is one handful of big-int
+    # operations per character of the longer string instead of a full
+    # len(a) * len(b) table.
+    if len(a) < len(b):
+        a, b = b, a
+    m = len(b)
+    if m == 0:
+        return len(a)
+    peq: dict[str, int] = {}
+    for i, c in enumerate(b):
+        peq[c] = peq.get(c, 0) | (1 << i)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    for c in a:
+        eq = peq.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+    return score
+
+
+def edit_distances(pairs: Iterable[tuple[str, str]]) -> list[int]:
+    return [edit_distance(a, b) for a, b in pairs]
+
+
+def _mushaf_order(texts: Iterable[str]) -> Iterator[tuple[str, int, int, str]]:
+    # One ayah per non-empty row, starting at al-Fatiha 1
+    n = 0
+    for text in texts:
+        if not text:
+            continue
+        if n == TOTAL_AYAT:
+            logger.warning(f"Ignoring rows past the {TOTAL_AYAT} ayat of the mushaf")
+            return
+        surah = bisect.bisect_right(FIRST_AYAH, n)
+        yield DEFAULT_VARIANT, surah, n - FIRST_AYAH[surah - 1] + 1, text
+        n += 1
+
+
+def transcript_rows(file_path: str) -> Iterator[tuple[str, int, int, str]]:
+    # (variant, surah, ayah, text) of every ayah in a transcript. CSVs with
+    # surah/ayah columns are keyed by them, and by their reciter/variant
+    # column when there is one; anything else is read as one ayah per row or
+    # line in mushaf order. Blank lines and rows without valid numbers are
+    # skipped rather than shifting or failing the rest of the file.
+    with open(file_path, "r", encoding="utf-8-sig", newline="") as f:
+        if not file_path.endswith(".csv"):
+            yield from _mushaf_order(line.strip() for line in f)
+            return
+        reader = csv.reader(f)
+        header = next(reader, [])
+        surah_col = column_index(header, SURAH_COLUMNS)
+        ayah_col = column_index(header, AYAH_COLUMNS)
+        text_col = column_index(header, tuple(settings.transcript_text_columns))
+        variant_col = column_index(header, VARIANT_COLUMNS)
+        if text_col is None:
+            # Headerless: the whole row is the text
+            f.seek(0)
+            yield from _mushaf_order(
+                " ".join(cell.strip() for cell in row if cell.strip())
+                for row in csv.reader(f)
+            )
+            return
+        if surah_col is None or ayah_col is None:
+            yield from _mushaf_order(
+                row[text_col].strip() for row in reader if len(row) > text_col
+            )
+            return
+        for row in reader:
+            if len(row) <= max(surah_col, ayah_col, text_col):
+                continue
+            try:
+                surah, ayah = int(row[surah_col]), int(row[ayah_col])
+            except ValueError:
+                continue
+            text = row[text_col].strip()
+            if not text:
+                continue
+            variant = (
+                row[variant_col].strip()
+                if variant_col is not None and len(row) > variant_col
+                else DEFAULT_VARIANT
+            )
+            yield variant, surah, ayah, text
+
+
+def validate_transcript(
+    file_path: str, index: ReferenceIndex | None = None, rules: str | None = None
+) -> dict:
+    # Both sides go through the same normalizer so only real differences in
+    # the recited text count, not orthographic conventions
+    index = index or get_reference_index()
+    normalizer = Normalizer(rules or settings.normalizer_rules)
+    keys, pairs = [], []
+    missing = 0
+    for _, surah, ayah, text in transcript_rows(file_path):
+        reference = index.get(surah, ayah)
+        if reference is None:
+            missing += 1
+            continue
+        keys.append((surah, ayah))
+        pairs.append((normalizer.normalize(text), normalizer.normalize(reference)))
+    distances = edit_distances(pairs)
+    results = [
+        {
+            "surah": surah,
+            "ayah": ayah,
+            "distance": distance,
+            "reference_length": len(reference),
+            "cer": distance / max(1, len(reference)),
+        }
+        for (surah, ayah), (_, reference), distance in zip(keys, pairs, distances)
+    ]
+    exact = sum(1 for result in results if result["distance"] == 0)
+    total_chars = sum(result["reference_length"] for result in results)
+    logger.info(
+        f"Validated {len(results)} ayat of {file_path}: {exact} exact, "
+        f"{missing} not in the reference"
+    )
+    return {
+        "ayat": len(results),
+        "exact": exact,
+        "missing": missing,
+        "cer": sum(distances) / max(1, total_chars),
+        "results": results,
+    }
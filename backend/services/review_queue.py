@@ -0,0 +1,240 @@
+import os
+import time
+import sqlite3
+import asyncio
+import difflib
+import threading
+from typing import Iterable
+from backend.services.llm_client import LLMClient
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+
+def word_diff(text: str, suggestion: str) -> str:
+    # Only the changed words, as "- old" / "+ new" lines
+    return "\n".join(
+        line
+        for line in difflib.ndiff(text.split(), suggestion.split())
+        if line.startswith(("- ", "+ "))
+    )
+
+
+class ReviewQueue:
+    # Durable SQLite queue of ayat awaiting LLM review. Normalization only
+    # enqueues; a ReviewWorker drains the queue in the background and stores
+    # each suggestion with a word diff for later human review. Jobs are unique
+    # per (file, ayah, text), so re-running normalization over unchanged
+    # transcripts does not grow the queue.
+
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(settings.data_dir, "review", "queue.sqlite3")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id INTEGER PRIMARY KEY, file TEXT NOT NULL, ayah TEXT NOT NULL, "
+            "text TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL, "
+            "suggestion TEXT, diff TEXT, created REAL NOT NULL, updated REAL NOT NULL, "
+            "UNIQUE (file, ayah, text))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id)")
+        self.db.commit()
+
+    def close(self) -> None:
+        self.db.close()
+
+    def enqueue(self, items: Iterable[tuple[str, str, str]]) -> int:
+        now = time.time()
+        with self.lock:
+            before = self.db.total_changes
+            self.db.executemany(
+                "INSERT OR IGNORE INTO jobs "
+                "(file, ayah, text, status, attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, 0, ?, ?)",
+                [(file, ayah, text, PENDING, now, now) for file, ayah, text in items],
+            )
+            self.db.commit()
+            return self.db.total_changes - before
+
+    def claim(self, limit: int) -> list[sqlite3.Row]:
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, file, ayah, text, attempts FROM jobs "
+                "WHERE status = ? ORDER BY id LIMIT ?",
+                (PENDING, limit),
+            ).fetchall()
+            self.db.executemany(
+                "UPDATE jobs SET status = ?, updated = ? WHERE id = ?",
+                [(IN_PROGRESS, time.time(), row["id"]) for row in rows],
+            )
+            self.db.commit()
+        return rows
+
+    def complete(self, results: list[tuple[sqlite3.Row, str]]) -> None:
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "UPDATE jobs SET status = ?, suggestion = ?, diff = ?, updated = ? "
+                "WHERE id = ?",
+                [
+                    (
+                        DONE,
+                        suggestion,
+                        word_diff(row["text"], suggestion),
+                        now,
+                        row["id"],
+                    )
+                    for row, suggestion in results
+                ],
+            )
+            self.db.commit()
+
+    def retry_or_fail(self, rows: list[sqlite3.Row]) -> None:
+        now = time.time()
+        with self.lock:
+            self.db.executemany(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, updated = ? "
+                "WHERE id = ?",
+                [
+                    (
+                        FAILED
+                        if row["attempts"] + 1 >= settings.review_max_attempts
+                        else PENDING,
+                        now,
+                        row["id"],
+                    )
+                    for row in rows
+                ],
+            )
+            self.db.commit()
+
+    def recover(self) -> int:
+        # Jobs left in progress by a crashed or stopped worker go back to pending
+        with self.lock:
+            count = self.db.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (PENDING, IN_PROGRESS)
+            ).rowcount
+            self.db.commit()
+        return count
+
+    def progress(self) -> dict:
+        with self.lock:
+            counts = dict(
+                self.db.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            changed = self.db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = ? AND diff != ''", (DONE,)
+            ).fetchone()[0]
+        progress = {
+            status: counts.get(status, 0)
+            for status in (PENDING, IN_PROGRESS, DONE, FAILED)
+        }
+        progress["depth"] = progress[PENDING] + progress[IN_PROGRESS]
+        progress["total"] = sum(counts.values())
+        progress["changed"] = changed
+        return progress
+
+    def suggestions(
+        self, limit: int = 100, offset: int = 0, changed_only: bool = True
+    ) -> list[dict]:
+        query = "SELECT file, ayah, text, suggestion, diff FROM jobs WHERE status = ?"
+        if changed_only:
+            query += " AND diff != ''"
+        query += " ORDER BY id LIMIT ? OFFSET ?"
+        with self.lock:
+            rows = self.db.execute(query, (DONE, limit, offset)).fetchall()
+        return [dict(row) for row in rows]
+
+
+_queues: dict[str, ReviewQueue] = {}
+
+
+def get_review_queue() -> ReviewQueue:
+    # One shared connection per queue file, reused by routes and the worker
+    path = os.path.join(settings.data_dir, "review", "queue.sqlite3")
+    if path not in _queues:
+        _queues[path] = ReviewQueue(path)
+    return _queues[path]
+
+
+def review_worker_available() -> bool:
+    # Whether the API may start a worker: it needs an LLM API key
+    return bool(settings.review_worker_enabled and settings.groq_api_key)
+
+
+_running_workers = 0  # ReviewWorker.run loops active in this process
+
+
+def review_worker_running() -> bool:
+    # Whether queued ayat will actually be drained. The Streamlit app calls
+    # the services directly and never starts a worker, even with a key set.
+    return _running_workers > 0
+
+
+class ReviewWorker:
+    # Drains a ReviewQueue through the LLM at review_ayat_per_minute
+
+    def __init__(self, queue: ReviewQueue, client: LLMClient | None = None):
+        self.queue = queue
+        self.client = client
+
+    async def run_once(self) -> int:
+        rows = self.queue.claim(settings.review_batch_size)
+        if not rows:
+            return 0
+        suggestions, ok_flags = await self.client.validate_many_with_status(
+            [row["text"] for row in rows]
+        )
+        done = [(row, s) for row, s, ok in zip(rows, suggestions, ok_flags) if ok]
+        failed = [row for row, ok in zip(rows, ok_flags) if not ok]
+        self.queue.complete(done)
+        if failed:
+            self.queue.retry_or_fail(failed)
+        logger.info(f"Reviewed {len(done)} ayat, {len(failed)} to retry")
+        return len(rows)
+
+    async def run(self, stop: asyncio.Event | None = None) -> None:
+        global _running_workers
+        stop = stop or asyncio.Event()
+        recovered = self.queue.recover()
+        if recovered:
+            logger.info(f"Re-queued {recovered} interrupted review jobs")
+        owns_client = self.client is None
+        if owns_client:
+            self.client = LLMClient()
+        _running_workers += 1
+        try:
+            while not stop.is_set():
+                started = time.monotonic()
+                try:
+                    count = await self.run_once()
+                except Exception as e:
+                    logger.error(f"Review worker batch failed: {e}")
+                    count = 0
+                # Pace batches to the configured ayat-per-minute budget, and
+                # poll gently while the queue is empty
+                if count:
+                    budget = count * 60.0 / settings.review_ayat_per_minute
+                    delay = max(0.0, budget - (time.monotonic() - started))
+                else:
+                    delay = settings.review_poll_interval
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            _running_workers -= 1
+            if owns_client:
+                await self.client.aclose()
@@ -0,0 +1,166 @@
+import io
+import os
+import json
+import mmap
+import tarfile
+from typing import Iterator
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "index.json"
+
+
+def _sample_key(record: dict, n: int, seen: set[str]) -> str:
+    # WebDataset keys end at the first dot, so none may appear in the key
+    meta = record.get("metadata", {})
+    if {"reciter", "surah", "ayah"} <= meta.keys():
+        reciter = str(meta["reciter"]).replace(".", "-").replace("/", "-")
+        key = f"{reciter}_{int(meta['surah']):03d}_{int(meta['ayah']):03d}"
+    else:
+        key = f"{n:08d}"
+    if key in seen:
+        key = f"{key}_{n}"
+    seen.add(key)
+    return key
+
+
+class _ShardWriter:
+    # Appends members to uncompressed tar shards, rolling to a new shard past
+    # max_bytes, and records where each member's payload starts in its shard
+
+    def __init__(self, output_dir: str, max_bytes: int):
+        self.output_dir = output_dir
+        self.max_bytes = max_bytes
+        self.paths: list[str] = []
+        self.tar: tarfile.TarFile | None = None
+
+    def _roll(self) -> None:
+        self.close()
+        path = os.path.join(self.output_dir, f"shard-{len(self.paths):06d}.tar")
+        self.paths.append(path)
+        self.tar = tarfile.open(path, "w", format=tarfile.USTAR_FORMAT)
+
+    def add(self, members: list[tuple[str, bytes]]) -> list[tuple[int, int]]:
+        # Members of one sample always land in the same shard
+        size = sum(
+            tarfile.BLOCKSIZE + len(data) + tarfile.BLOCKSIZE for _, data in members
+        )
+        if self.tar is None or (
+            self.tar.offset and self.tar.offset + size > self.max_bytes
+        ):
+            self._roll()
+        spans = []
+        for name, data in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o644
+            header = info.tobuf(self.tar.format, self.tar.encoding, self.tar.errors)
+            spans.append((self.tar.offset + len(header), len(data)))
+            self.tar.addfile(info, io.BytesIO(data))
+        return spans
+
+    def close(self) -> None:
+        if self.tar is not None:
+            self.tar.close()
+            self.tar = None
+
+
+def write_shards(jsonl_path: str, output_dir: str | None = None) -> dict:
+    # Packs every dataset.jsonl record and its audio into WebDataset-style
+    # tar shards (<key>.<ext> + <key>.json per sample) of at most
+    # shard_max_bytes, plus index.json with the byte offsets of every member
+    # so a clip can be read straight out of the shard.
+    output_dir = output_dir or os.path.join(settings.data_dir, "processed", "shards")
+    os.makedirs(output_dir, exist_ok=True)
+    writer = _ShardWriter(output_dir, settings.shard_max_bytes)
+    entries, seen = {}, set()
+    skipped = 0
+    try:
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                audio_path = record.get("audio_path", "")
+                try:
+                    with open(audio_path, "rb") as audio:
+                        data = audio.read()
+                except OSError as e:
+                    logger.warning(f"Skipping record {n} without audio: {e}")
+                    skipped += 1
+                    continue
+                key = _sample_key(record, n, seen)
+                ext = os.path.splitext(audio_path)[1].lstrip(".").lower() or "bin"
+                payload = json.dumps(record, ensure_ascii=False).encode("utf-8")
+                audio_span, json_span = writer.add(
+                    [(f"{key}.{ext}", data), (f"{key}.json", payload)]
+                )
+                entries[key] = [len(writer.paths) - 1, ext, *audio_span, *json_span]
+    finally:
+        writer.close()
+    # Shards left over from an earlier, larger run are no longer indexed
+    current = {os.path.basename(p) for p in writer.paths}
+    for name in os.listdir(output_dir):
+        if name.startswith("shard-") and name.endswith(".tar") and name not in current:
+            os.remove(os.path.join(output_dir, name))
+    index_path = os.path.join(output_dir, INDEX_NAME)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"shards": [os.path.basename(p) for p in writer.paths], "entries": entries},
+            f,
+            ensure_ascii=False,
+        )
+    os.replace(tmp_path, index_path)
+    logger.info(f"Packed {len(entries)} samples into {len(writer.paths)} shards")
+    return {
+        "shards": writer.paths,
+        "index": index_path,
+        "records": len(entries),
+        "skipped": skipped,
+    }
+
+
+class ShardReader:
+    # Memory-maps shards on first use; get() returns the clip as a memoryview
+    # into the map, so reading a sample copies nothing. Release views before
+    # calling close().
+
+    def __init__(self, shard_dir: str):
+        self.shard_dir = shard_dir
+        with open(os.path.join(shard_dir, INDEX_NAME), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        self.shards = index["shards"]
+        self.entries = index["entries"]
+        self.maps: dict[int, mmap.mmap] = {}
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def keys(self) -> list[str]:
+        return list(self.entries)
+
+    def _map(self, shard: int) -> mmap.mmap:
+        if shard not in self.maps:
+            with open(os.path.join(self.shard_dir, self.shards[shard]), "rb") as f:
+                self.maps[shard] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.maps[shard]
+
+    def get(self, key: str) -> tuple[memoryview, dict]:
+        shard, _, audio_offset, audio_size, json_offset, json_size = self.entries[key]
+        view = memoryview(self._map(shard))
+        record = json.loads(bytes(view[json_offset : json_offset + json_size]))
+        return view[audio_offset : audio_offset + audio_size], record
+
+    def __iter__(self) -> Iterator[tuple[str, memoryview, dict]]:
+        # Shard by shard in file order, so reads are sequential
+        order = sorted(self.entries.items(), key=lambda item: (item[1][0], item[1][2]))
+        for key, _ in order:
+            yield (key, *self.get(key))
+
+    def close(self) -> None:
+        for shard_map in self.maps.values():
+            shard_map.close()
+        self.maps.clear()
@@ -0,0 +1,168 @@
+import os
+import csv
+import json
+from typing import Iterator
+from backend.services.reference import (
+    AYAH_COUNTS,
+    DEFAULT_VARIANT,
+    FIRST_AYAH,
+    TOTAL_AYAT,
+    ReferenceIndex,
+    ayah_number,
+    transcript_rows,
+    write_index,
+)
+from backend.services.audio_handler import reciter_key
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "index.json"
+
+
+def _transcript_files(transcripts_dir: str) -> list[str]:
+    if not os.path.isdir(transcripts_dir):
+        return []
+    return [
+        os.path.join(transcripts_dir, name)
+        for name in sorted(os.listdir(transcripts_dir))
+        if name.endswith((".txt", ".csv"))
+    ]
+
+
+def _stamp(files: list[str]) -> list[int]:
+    # Changes whenever a transcript is added, removed, resized or rewritten
+    stats = [os.stat(path) for path in files]
+    return [
+        len(stats),
+        sum(stat.st_size for stat in stats),
+        max((stat.st_mtime_ns for stat in stats), default=0),
+    ]
+
+
+def build_transcript_index(transcripts_dir: str, index_dir: str) -> dict:
+    # One reference-format index file per text variant, plus a manifest
+    # naming them. Where several files cover the same ayah, the first file
+    # in name order wins. Ayat with no default text take the first variant
+    # text seen, so text-only datasets keyed by reciter still expand.
+    files = _transcript_files(transcripts_dir)
+    variants: dict[str, list[str | None]] = {}
+    fallback: list[str | None] = [None] * TOTAL_AYAT
+    for file_path in files:
+        try:
+            for variant, surah, ayah, text in transcript_rows(file_path):
+                n = ayah_number(surah, ayah)
+                if n is None:
+                    continue
+                # Keyed by the spelling parse_audio_path gives reciters
+                variant = reciter_key(variant) if variant else DEFAULT_VARIANT
+                ayat = variants.setdefault(variant, [None] * TOTAL_AYAT)
+                if ayat[n] is None:
+                    ayat[n] = text
+                if fallback[n] is None:
+                    fallback[n] = text
+        except (OSError, ValueError, csv.Error) as e:
+            logger.warning(f"Skipping {file_path} in the transcript index: {e}")
+    if variants:
+        default = variants.setdefault(DEFAULT_VARIANT, [None] * TOTAL_AYAT)
+        for n, text in enumerate(default):
+            if text is None:
+                default[n] = fallback[n]
+    stamp = _stamp(files)
+    os.makedirs(index_dir, exist_ok=True)
+    names = {}
+    for i, (variant, ayat) in enumerate(sorted(variants.items())):
+        names[variant] = f"variant-{i:03d}.idx"
+        write_index(ayat, os.path.join(index_dir, names[variant]), stamp[1], 0.0)
+    for name in os.listdir(index_dir):
+        if name.startswith("variant-") and name not in names.values():
+            os.remove(os.path.join(index_dir, name))
+    manifest = {"stamp": stamp, "variants": names}
+    manifest_path = os.path.join(index_dir, MANIFEST_NAME)
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    logger.info(
+        f"Indexed {len(files)} transcript files into {len(names)} text variants"
+    )
+    return manifest
+
+
+class TranscriptIndex:
+    # Memory-mapped (surah, ayah) -> transcript lookup, one map per text
+    # variant. A reciter's own variant is preferred, then the variant
+    # configured for it in reciter_text_variants, then the default text.
+
+    def __init__(self, index_dir: str):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.stamp = manifest["stamp"]
+        self.variants = {
+            variant: ReferenceIndex(os.path.join(index_dir, name))
+            for variant, name in manifest["variants"].items()
+        }
+
+    def close(self) -> None:
+        for index in self.variants.values():
+            index.close()
+        self.variants.clear()
+
+    def get(self, surah: int, ayah: int, reciter: str | None = None) -> str | None:
+        n = ayah_number(surah, ayah)
+        if n is None:
+            return None
+        key = reciter_key(reciter) if reciter else None
+        configured = {
+            reciter_key(name): variant
+            for name, variant in settings.reciter_text_variants.items()
+        }
+        for variant in (key, configured.get(key or ""), DEFAULT_VARIANT):
+            index = self.variants.get(variant) if variant is not None else None
+            text = index.text_at(n) if index is not None else ""
+            if text:
+                return text
+        return None
+
+    def ayat(self, variant: str = DEFAULT_VARIANT) -> Iterator[tuple[int, int, str]]:
+        # (surah, ayah, text) of every ayah the variant has, in mushaf order
+        index = self.variants.get(variant)
+        if index is None:
+            return
+        for surah, count in enumerate(AYAH_COUNTS, 1):
+            for ayah in range(1, count + 1):
+                text = index.text_at(FIRST_AYAH[surah - 1] + ayah - 1)
+                if text:
+                    yield surah, ayah, text
+
+
+_index: TranscriptIndex | None = None
+
+
+def get_transcript_index() -> TranscriptIndex:
+    # Rebuilt only when the processed transcripts have changed since the
+    # persisted index was written
+    global _index
+    transcripts_dir = os.path.join(settings.data_dir, "processed", "transcripts")
+    index_dir = os.path.join(settings.data_dir, "cache", "transcripts")
+    stamp = _stamp(_transcript_files(transcripts_dir))
+    if _index is not None:
+        if _index.index_dir == index_dir and _index.stamp == stamp:
+            return _index
+        _index.close()
+        _index = None
+    index = None
+    if os.path.exists(os.path.join(index_dir, MANIFEST_NAME)):
+        try:
+            index = TranscriptIndex(index_dir)
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Rebuilding unreadable transcript index: {e}")
+    if index is None or index.stamp != stamp:
+        if index is not None:
+            index.close()
+        build_transcript_index(transcripts_dir, index_dir)
+        index = TranscriptIndex(index_dir)
+    _index = index
+    return _index
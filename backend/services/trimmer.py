@@ -0,0 +1,156 @@
+import os
+import json
+import wave
+import asyncio
+import numpy as np
+from backend.services.conform import is_pcm_wav, read_pcm
+from backend.services.probe import probe_many
+from config.settings import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+SILENCE_FLOOR_DB = -100.0  # Clips whose loudest frame is below this are left alone
+
+
+def trim_bounds(clips: list[np.ndarray], rate: int) -> list[tuple[int, int]]:
+    # Sample range to keep for each mono clip. All clips of a batch are padded
+    # into one (clips, frames, frame_length) array, so frame energies, the
+    # per-clip peak and the first/last loud frame are each one NumPy call.
+    frame = max(1, int(rate * settings.trim_frame_ms / 1000))
+    pad = int(rate * settings.trim_padding_ms / 1000)
+    lengths = np.array([len(clip) for clip in clips])
+    n_frames = max(1, int(np.ceil(lengths.max() / frame)))
+    batch = np.zeros((len(clips), n_frames * frame), np.float32)
+    for i, clip in enumerate(clips):
+        batch[i, : len(clip)] = clip
+    energy = np.mean(batch.reshape(len(clips), n_frames, frame) ** 2, axis=2)
+    db = 10 * np.log10(energy + 1e-12)
+    peak = db.max(axis=1)
+    loud = db > (peak + settings.trim_threshold_db)[:, None]
+    first = loud.argmax(axis=1)
+    last = n_frames - 1 - loud[:, ::-1].argmax(axis=1)
+    starts = np.maximum(0, first * frame - pad)
+    ends = np.minimum(lengths, (last + 1) * frame + pad)
+    silent = peak < SILENCE_FLOOR_DB
+    starts[silent] = 0
+    ends[silent] = lengths[silent]
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def _rewrite(path: str, start: int, end: int) -> None:
+    # Copies the kept frames byte for byte, so the sample format is unchanged;
+    # the rename leaves a hardlinked raw source untouched
+    with wave.open(path, "rb") as src:
+        params = src.getparams()
+        src.setpos(start)
+        frames = src.readframes(end - start)
+    tmp_path = f"{path}.tmp"
+    with wave.open(tmp_path, "wb") as dst:
+        dst.setparams(params)
+        dst.writeframes(frames)
+    os.replace(tmp_path, path)
+
+
+def _load_manifest(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable trim manifest: {e}")
+        return {}
+
+
+def load_trim_manifest(audio_dir: str) -> dict:
+    # Path relative to audio_dir -> {"original": seconds, "trimmed": seconds}
+    return _load_manifest(os.path.join(audio_dir, "trim.json"))
+
+
+def _trim_all(audio_dir: str) -> dict:
+    manifest_path = os.path.join(audio_dir, "trim.json")
+    manifest = _load_manifest(manifest_path)
+    paths = [
+        os.path.join(root, name)
+        for root, dirs, names in os.walk(audio_dir)
+        for name in sorted(names)
+        if name.lower().endswith(".wav")
+    ]
+    counts = {"trimmed": 0, "unchanged": 0, "unsupported": 0, "failed": 0}
+    todo = []
+    for path, info in probe_many(paths).items():
+        entry = manifest.get(os.path.relpath(path, audio_dir))
+        stat = os.stat(path) if info is not None else None
+        if not is_pcm_wav(info):
+            counts["unsupported"] += 1
+        elif entry and (entry["size"], entry["mtime_ns"]) == (
+            stat.st_size,
+            stat.st_mtime_ns,
+        ):
+            counts["unchanged"] += 1  # Trimmed by an earlier run
+        else:
+            todo.append((info.duration, path))
+    # Similar lengths share a batch, which keeps padding small
+    todo.sort()
+    size = max(1, settings.trim_batch_clips)
+    original = trimmed = 0.0
+    for i in range(0, len(todo), size):
+        clips, rates, batch = [], [], []
+        for _, path in todo[i : i + size]:
+            try:
+                samples, rate = read_pcm(path)
+            except Exception as e:
+                logger.error(f"Failed to read {path} for trimming: {e}")
+                counts["failed"] += 1
+                continue
+            clips.append(samples.mean(axis=1))
+            rates.append(rate)
+            batch.append(path)
+        # Bounds are computed per sample rate within the batch
+        for rate in set(rates):
+            members = [j for j, r in enumerate(rates) if r == rate]
+            bounds = trim_bounds([clips[j] for j in members], rate)
+            for j, (start, end) in zip(members, bounds):
+                path, length = batch[j], len(clips[j])
+                try:
+                    if (start, end) != (0, length):
+                        _rewrite(path, start, end)
+                        counts["trimmed"] += 1
+                    else:
+                        counts["unchanged"] += 1
+                except Exception as e:
+                    logger.error(f"Failed to trim {path}: {e}")
+                    counts["failed"] += 1
+                    continue
+                stat = os.stat(path)
+                manifest[os.path.relpath(path, audio_dir)] = {
+                    "original": length / rate,
+                    "trimmed": (end - start) / rate,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                }
+                original += length / rate
+                trimmed += (end - start) / rate
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return {
+        **counts,
+        "original_hours": original / 3600,
+        "trimmed_hours": trimmed / 3600,
+        "hours_saved": (original - trimmed) / 3600,
+    }
+
+
+async def trim_audio(audio_dir: str) -> dict:
+    # Optional stage after organize_audio: cut leading and trailing silence
+    # from PCM WAV clips in place. Durations before and after are kept in
+    # audio_dir/trim.json for extract_metadata.
+    report = await asyncio.to_thread(_trim_all, audio_dir)
+    logger.info(
+        f"Trimmed {report['trimmed']} clips in {audio_dir}, "
+        f"saving {report['hours_saved']:.2f} hours"
+    )
+    return report
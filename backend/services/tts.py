@@ -1,17 +1,138 @@
+import os
+import wave
 import asyncio
+import hashlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from gtts import gTTS
+from config.settings import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+class TTSEngine(ABC):
+    # Turns text into an audio file. synthesize() blocks and runs on a worker
+    # thread of the scheduler's pool.
+    name = ""
+    extension = ""
+
+    @abstractmethod
+    def synthesize(self, text: str, lang: str, output_path: str) -> None: ...
+
+
+class GTTSEngine(TTSEngine):
+    name = "gtts"
+    extension = ".mp3"
+
+    def synthesize(self, text: str, lang: str, output_path: str) -> None:
+        gTTS(text=text, lang=lang, slow=False).save(output_path)
+
+
+class StubEngine(TTSEngine):
+    # Offline engine for tests and dry runs: silent 16 kHz PCM WAV whose
+    # length grows with the text, roughly like speech
+    name = "stub"
+    extension = ".wav"
+    rate = 16000
+    seconds_per_char = 0.06
+
+    def synthesize(self, text: str, lang: str, output_path: str) -> None:
+        frames = int(self.rate * max(0.5, len(text) * self.seconds_per_char))
+        with wave.open(output_path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(self.rate)
+            f.writeframes(b"\0" * frames * 2)
+
+
+ENGINES = {engine.name: engine for engine in (GTTSEngine, StubEngine)}
+
+
+def get_engine(name: str | None = None) -> TTSEngine:
+    name = name or settings.tts_engine
+    if name not in ENGINES:
+        raise ValueError(
+            f"Unknown TTS engine {name!r}, expected one of {list(ENGINES)}"
+        )
+    return ENGINES[name]()
+
+
+def tts_cache_key(text: str, lang: str, engine: str) -> str:
+    payload = "\x1f".join([engine, lang, text])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSScheduler:
+    # Synthesizes on a bounded thread pool into a content-addressed cache,
+    # data/cache/tts/<key[:2]>/<key><ext> with key = hash(text, lang, engine),
+    # so a text is only ever voiced once per engine. Concurrent requests for
+    # the same text within a run share one synthesis.
+
+    def __init__(
+        self,
+        engine: TTSEngine | None = None,
+        cache_dir: str | None = None,
+        workers: int | None = None,
+    ):
+        self.engine = engine or get_engine()
+        self.cache_dir = cache_dir or os.path.join(settings.data_dir, "cache", "tts")
+        self.pool = ThreadPoolExecutor(
+            max_workers=max(1, workers or settings.tts_workers)
+        )
+        self.inflight: dict[str, asyncio.Task] = {}
+        self.stats = {"synthesized": 0, "cached": 0, "deduplicated": 0, "failed": 0}
+
+    def close(self) -> None:
+        self.pool.shutdown(wait=True)
+
+    def cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.engine.extension)
+
+    def _render(self, text: str, lang: str, path: str) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            self.engine.synthesize(text, lang, tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def _synthesize(self, text: str, lang: str, path: str) -> str | None:
+        if os.path.exists(path):
+            self.stats["cached"] += 1
+            return path
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self.pool, self._render, text, lang, path)
+        except Exception as e:
+            logger.error(f"Failed to generate audio with {self.engine.name}: {e}")
+            self.stats["failed"] += 1
+            return None
+        self.stats["synthesized"] += 1
+        return path
+
+    async def synthesize(self, text: str, lang: str = "ar") -> str | None:
+        # Path of the cached audio for text, or None if synthesis failed
+        key = tts_cache_key(text, lang, self.engine.name)
+        task = self.inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._synthesize(text, lang, self.cache_path(key))
+            )
+            self.inflight[key] = task
+            # Later requests for the text find it in the cache instead
+            task.add_done_callback(lambda _: self.inflight.pop(key, None))
+        else:
+            self.stats["deduplicated"] += 1
+        return await asyncio.shield(task)
+
+
 async def generate_audio_from_text(text: str, output_path: str, lang: str = "ar"):
+    # One-off synthesis without the cache; pipelines should use TTSScheduler
     try:
-        loop = asyncio.get_event_loop()
-        tts = await loop.run_in_executor(
-            None, lambda: gTTS(text=text, lang=lang, slow=False)
-        )
-        await loop.run_in_executor(None, tts.save, output_path)
+        await asyncio.to_thread(GTTSEngine().synthesize, text, lang, output_path)
         logger.info(f"Generated audio: {output_path}")
         return output_path
     except Exception as e:
@@ -15,6 +15,62 @@ class Settings(BaseSettings):
     aws_secret_access_key: Optional[str] = None
     s3_bucket_name: Optional[str] = None
     cerebras_model: str = "llama-3.1-8b-instant"
+    download_chunk_size: int = 1024 * 1024
+    download_timeout: float = 30.0
+    download_retries: int = 3
+    download_max_connections: int = 20
+    download_per_host_limit: int = 4
+    kaggle_timeout: float = 60.0
+    download_cache_ttl: float = 3600.0
+    hf_batch_rows: int = 64
+    hf_audio_column: str = "audio"
+    hf_text_columns: list[str] = ["text", "transcript", "transcription", "sentence"]
+    normalizer_rules: str = "uthmani-v1"
+    transcript_text_columns: list[str] = ["ayah_ar", "text", "transcript", "arabic"]
+    normalize_workers: int = 0  # 0 uses every core
+    normalize_shard_rows: int = 2000
+    normalize_incremental: bool = True
+    groq_base_url: str = "https://api.groq.com/openai/v1"
+    groq_model: str = "llama-3.1-8b-instant"
+    llm_timeout: float = 30.0
+    llm_concurrency: int = 4
+    llm_requests_per_minute: float = 30.0
+    llm_max_retries: int = 5
+    llm_backoff_base: float = 1.0
+    llm_backoff_max: float = 30.0
+    llm_batch_size: int = 40
+    llm_batch_chars: int = 4000
+    llm_max_tokens: int = 8192
+    llm_cache_enabled: bool = True
+    llm_cache_max_age_days: float = 90.0
+    llm_cache_max_mb: float = 256.0
+    llm_cache_evict_every: int = 1000  # Entries written between evictions
+    audio_placement_mode: str = "hardlink"  # hardlink, reflink, symlink or copy
+    audio_extensions: list[str] = [".wav", ".mp3", ".flac"]
+    audio_scan_workers: int = 8
+    probe_workers: int = 8
+    target_sample_rate: int = 16000
+    conform_mono: bool = True
+    trim_enabled: bool = False
+    trim_threshold_db: float = -40.0  # Relative to the clip's loudest frame
+    trim_frame_ms: float = 25.0
+    trim_padding_ms: float = 150.0  # Silence kept before and after speech
+    trim_batch_clips: int = 32
+    tts_engine: str = "gtts"  # gtts, or stub for offline runs
+    tts_workers: int = 4
+    shard_max_bytes: int = 1024 * 1024 * 1024
+    parquet_row_group_rows: int = 100_000
+    parquet_include_audio: bool = False
+    parquet_row_group_bytes: int = 256 * 1024 * 1024  # Audio per row group
+    parquet_compression: str = "zstd"
+    reference_text_path: Optional[str] = None  # data/reference/quran-uthmani.txt
+    reciter_text_variants: dict[str, str] = {}  # Reciter -> transcript variant
+    review_enabled: bool = True
+    review_worker_enabled: bool = True
+    review_batch_size: int = 200
+    review_ayat_per_minute: float = 1200.0
+    review_poll_interval: float = 5.0
+    review_max_attempts: int = 3
 
     model_config = {
         "env_file": "config/.env",
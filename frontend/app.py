@@ -7,10 +7,17 @@ import asyncio
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 from backend.services.extractor import download_datasets
-from backend.services.normalizer import normalize_transcripts
+from backend.services.normalizer import run_normalization
 from backend.services.audio_handler import organize_audio
-from backend.services.converter import extract_metadata, convert_to_jsonl
+from backend.services.conform import conform_audio
+from backend.services.trimmer import trim_audio
+from backend.services.converter import (
+    extract_metadata,
+    convert_to_jsonl,
+    iter_metadata,
+)
 from backend.services.export import export_data
+from backend.services.probe import probe_many
 from config.settings import settings
 
 st.title("Qur'an Recitation Dataset Curator")
@@ -49,18 +56,18 @@ if page == "Process Data":
                     st.error("Download failed. Check KAGGLE_API_KEY and network.")
                     st.stop()
 
-                # Step 2: Normalize (auto-detect)
+                # Step 2: Normalize (only the files this download produced)
                 raw_dir = "data/raw"
                 if os.path.exists(raw_dir):
-                    text_files = [
-                        os.path.join(raw_dir, f)
-                        for f in os.listdir(raw_dir)
-                        if f.endswith((".txt", ".csv"))
-                    ]
+                    text_files = [f for f in files if f.endswith((".txt", ".csv"))]
                     st.write(f"Found text files: {text_files}")
                     if text_files:
-                        normalized = asyncio.run(normalize_transcripts(text_files))
-                        st.write(f"Normalized: {normalized}")
+                        report = asyncio.run(run_normalization(text_files))
+                        normalized = report["normalized"]
+                        st.write(
+                            f"Normalized: {normalized} ({report['processed']} "
+                            f"processed, {report['skipped']} unchanged)"
+                        )
 
                         # Check processed transcripts
                         processed_transcripts = "data/processed/transcripts"
@@ -71,17 +78,28 @@ if page == "Process Data":
                         # Step 3: Organize Audio
                         organized_dir = asyncio.run(organize_audio(raw_dir))
                         st.write(f"Audio organized: {organized_dir}")
+                        conformed = asyncio.run(conform_audio(organized_dir))
+                        st.write(
+                            f"Audio conformed to {settings.target_sample_rate} Hz: "
+                            f"{conformed}"
+                        )
+                        if settings.trim_enabled:
+                            trimmed = asyncio.run(trim_audio(organized_dir))
+                            st.write(
+                                f"Trimmed silence from {trimmed['trimmed']} clips, "
+                                f"saving {trimmed['hours_saved']:.2f} hours"
+                            )
 
                         # Step 4: Extract Metadata
                         processed_audio = "data/processed/audio"
                         default_files = []
                         if os.path.exists(processed_audio):
+                            # Organized as reciter/surah/ayah.ext
                             default_files.extend(
-                                [
-                                    os.path.join(processed_audio, f)
-                                    for f in os.listdir(processed_audio)
-                                    if f.endswith(".wav")
-                                ]
+                                os.path.join(root, f)
+                                for root, dirs, names in os.walk(processed_audio)
+                                for f in sorted(names)
+                                if f.endswith(tuple(settings.audio_extensions))
                             )
                         if os.path.exists(processed_transcripts):
                             default_files.extend(
@@ -97,12 +115,9 @@ if page == "Process Data":
                             st.write(f"Metadata extracted: {metadata_path}")
 
                             # Check metadata content
-                            import json
-
                             if os.path.exists(metadata_path):
-                                with open(metadata_path, "r", encoding="utf-8") as f:
-                                    metadata = json.load(f)
-                                st.write(f"Metadata entries: {len(metadata)}")
+                                count = sum(1 for _ in iter_metadata(metadata_path))
+                                st.write(f"Metadata entries: {count}")
 
                             # Step 5: Convert to JSONL
                             jsonl_path = asyncio.run(
@@ -181,11 +196,13 @@ elif page == "View Data":
         try:
             raw_dir = "data/raw"
             if os.path.exists(raw_dir):
-                return [
-                    f
-                    for f in os.listdir(raw_dir)
-                    if os.path.isfile(os.path.join(raw_dir, f))
-                ]
+                # Each source downloads into its own subdirectory of raw/
+                return sorted(
+                    os.path.relpath(os.path.join(root, f), raw_dir)
+                    for root, dirs, names in os.walk(raw_dir)
+                    for f in names
+                    if not f.endswith(".part")
+                )
             return []
         except Exception as e:
             st.error(f"Error loading raw files: {e}")
@@ -268,11 +285,12 @@ elif page == "View Data":
         try:
             audio_dir = "data/processed/audio"
             if os.path.exists(audio_dir):
-                return [
-                    f
-                    for f in os.listdir(audio_dir)
-                    if f.endswith(".wav") or f.endswith(".mp3")
-                ]
+                return sorted(
+                    os.path.relpath(os.path.join(root, f), audio_dir)
+                    for root, dirs, names in os.walk(audio_dir)
+                    for f in names
+                    if f.endswith(tuple(settings.audio_extensions))
+                )
             return []
         except Exception as e:
             st.error(f"Error loading audio files: {e}")
@@ -300,28 +318,15 @@ elif page == "View Data":
                 )
                 file_size = os.path.getsize(audio_path)
                 st.write(f"File size: {file_size} bytes")
-                # Try to get duration
-                try:
-                    if selected_audio.endswith(".mp3"):
-                        from mutagen.mp3 import MP3
-
-                        audio = MP3(audio_path)
-                        duration = audio.info.length
-                    elif selected_audio.endswith(".wav"):
-                        import wave
-
-                        with wave.open(audio_path, "rb") as wav:
-                            frames = wav.getnframes()
-                            rate = wav.getframerate()
-                            duration = frames / float(rate)
-                    else:
-                        duration = None
-                    if duration:
-                        st.write(f"Duration: {duration:.2f} seconds")
-                    else:
-                        st.write("Duration: Unable to determine")
-                except Exception as e:
-                    st.write(f"Duration: Unable to determine ({e})")
+                # Header probe, cached by (path, size, mtime) across reruns
+                info = probe_many([audio_path])[audio_path]
+                if info:
+                    st.write(
+                        f"Duration: {info.duration:.2f} seconds, "
+                        f"{info.sample_rate} Hz, {info.channels} channel(s)"
+                    )
+                else:
+                    st.write("Duration: Unable to determine")
         else:
             st.info("No audio files found.")
 
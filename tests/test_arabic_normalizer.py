@@ -0,0 +1,26 @@
+import pytest
+from backend.services.arabic_normalizer import RULE_SETS, Normalizer
+
+AYAH = "ذَٰلِكَ ٱلْكِتَٰبُ لَا رَيْبَ ۛ فِيهِ ۛ هُدًۭى لِّلْمُتَّقِينَ ٢"
+
+
+def test_legacy_rules_match_original_regex():
+    normalizer = Normalizer("legacy-v1")
+    assert normalizer.normalize("abc بِسْمِ 123\tٱللَّهِ") == " بِسْمِ \tٱللَّهِ"
+
+
+def test_uthmani_rules_keep_diacritics_and_drop_annotations():
+    normalizer = Normalizer("uthmani-v1")
+    assert normalizer.normalize(f"  {AYAH} ـ") == "ذَٰلِكَ ٱلْكِتَٰبُ لَا رَيْبَ فِيهِ هُدًۭى لِّلْمُتَّقِينَ"
+
+
+def test_plain_rules_unify_letters():
+    normalizer = Normalizer("plain-v1")
+    assert normalizer.normalize(AYAH) == "ذلك الكتب لا ريب فيه هدي للمتقين"
+    assert normalizer.normalize("أَإِآ سُئِلَ مُؤْمِن") == "ااا سيل مومن"
+
+
+def test_rule_sets_are_versioned():
+    assert all(Normalizer(v).version == v for v in RULE_SETS)
+    with pytest.raises(ValueError):
+        Normalizer("unknown-v0")
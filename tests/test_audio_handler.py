@@ -0,0 +1,111 @@
+import os
+import pytest
+from unittest.mock import patch
+from backend.services import audio_handler
+from backend.services.audio_handler import (
+    parse_audio_path,
+    place_file,
+    run_audio_organization,
+)
+
+WAV = b"RIFF" + b"\0" * 64
+
+
+@pytest.fixture
+def raw_audio(tmp_path):
+    raw = tmp_path / "raw"
+    (raw / "hf" / "audio").mkdir(parents=True)
+    (raw / "everyayah" / "husary").mkdir(parents=True)
+    (raw / "hf" / "audio" / "alafasy_1_1.wav").write_bytes(WAV)
+    (raw / "hf" / "audio" / "abdul_basit_2_255.flac").write_bytes(b"fLaC")
+    (raw / "everyayah" / "husary" / "001001.mp3").write_bytes(b"ID3")
+    (raw / "hf" / "notes.txt").write_text("ignored")
+    return raw
+
+
+def test_parse_audio_path():
+    assert parse_audio_path("a/abdul_basit_2_255.wav") == ("abdul_basit", 2, 255)
+    assert parse_audio_path("audio/husary/001/007.mp3") == ("husary", 1, 7)
+    assert parse_audio_path("husary/114006.mp3") == ("husary", 114, 6)
+    assert parse_audio_path("generated_generated_1.wav") is None
+    assert parse_audio_path("alafasy_1_8.wav") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["hardlink", "symlink", "copy"])
+async def test_organize_audio_layout_and_modes(tmp_path, raw_audio, mode):
+    with patch.multiple(
+        "backend.services.audio_handler.settings",
+        data_dir=str(tmp_path),
+        audio_placement_mode=mode,
+    ):
+        report = await run_audio_organization(str(raw_audio))
+        rerun = await run_audio_organization(str(raw_audio))
+
+    organized = report["organized_dir"]
+    src = raw_audio / "hf" / "audio" / "alafasy_1_1.wav"
+    dst = os.path.join(organized, "alafasy", "001", "001.wav")
+    assert report["placed"] == 3
+    assert (rerun["placed"], rerun["unchanged"]) == (0, 3)
+    assert os.path.exists(os.path.join(organized, "abdul_basit", "002", "255.flac"))
+    assert os.path.exists(os.path.join(organized, "husary", "001", "001.mp3"))
+    assert open(dst, "rb").read() == WAV
+    assert os.path.islink(dst) == (mode == "symlink")
+    assert os.path.samefile(src, dst) == (mode != "copy")
+
+
+@pytest.mark.asyncio
+async def test_changed_sources_and_collisions(tmp_path, raw_audio):
+    other = raw_audio / "mirror"
+    other.mkdir()
+    (other / "alafasy_1_1.wav").write_bytes(WAV)
+    (other / "husary_1_1.mp3").write_bytes(b"ID3 different take")
+    with patch("backend.services.audio_handler.settings.data_dir", str(tmp_path)):
+        first = await run_audio_organization(str(raw_audio))
+        (raw_audio / "hf" / "audio" / "abdul_basit_2_255.flac").write_bytes(b"fLaC2")
+        second = await run_audio_organization(str(raw_audio))
+
+    assert (first["placed"], first["duplicates"]) == (3, 1)
+    assert [c["target"] for c in first["collisions"]] == ["husary/001/001.mp3"]
+    assert (second["placed"], second["unchanged"]) == (1, 2)
+    assert len(second["collisions"]) == 1
+
+
+def test_falls_back_to_copy_when_links_fail(tmp_path, raw_audio):
+    src = str(raw_audio / "hf" / "audio" / "alafasy_1_1.wav")
+    unsupported = set()
+    with (
+        patch("os.link", side_effect=OSError(18, "Invalid cross-device link")),
+        patch(
+            "backend.services.audio_handler._reflink",
+            side_effect=OSError(95, "Operation not supported"),
+        ),
+    ):
+        first = place_file(src, str(tmp_path / "a.wav"), "hardlink", unsupported)
+        second = place_file(src, str(tmp_path / "b.wav"), "hardlink", unsupported)
+
+    assert (first, second) == ("copy", "copy")
+    assert unsupported == {"hardlink", "reflink"}
+    assert (tmp_path / "b.wav").read_bytes() == WAV
+
+
+@pytest.mark.asyncio
+async def test_placement_reads_sources_only_for_collisions(tmp_path, raw_audio):
+    other = raw_audio / "mirror"
+    other.mkdir()
+    (other / "alafasy_1_1.wav").write_bytes(WAV)
+    (other / "husary_1_1.mp3").write_bytes(b"ID3 different take")
+    with (
+        patch("backend.services.audio_handler.settings.data_dir", str(tmp_path)),
+        patch(
+            "backend.services.audio_handler.file_sha256",
+            wraps=audio_handler.file_sha256,
+        ) as sha256,
+    ):
+        await run_audio_organization(str(raw_audio))
+        # Only the same-sized alafasy pair is hashed: owner and duplicate
+        assert sha256.call_count == 2
+        sha256.reset_mock()
+        await run_audio_organization(str(raw_audio))
+        # The owner's hash was kept in the manifest
+        assert sha256.call_count == 1
@@ -0,0 +1,99 @@
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+from unittest.mock import patch
+from backend.services.columnar import read_dataset, write_parquet
+
+
+def _dataset(tmp_path):
+    records = []
+    # Out of order on purpose: the export sorts by reciter, surah, ayah
+    for reciter, surah, ayah in [
+        ("minshawi", 2, 2),
+        ("alafasy", 1, 2),
+        ("minshawi", 2, 1),
+        ("alafasy", 1, 1),
+        ("alafasy", 2, 1),
+    ]:
+        audio = tmp_path / f"{reciter}_{surah}_{ayah}.wav"
+        audio.write_bytes(f"{reciter}{surah}{ayah}".encode())
+        records.append(
+            {
+                "audio_path": str(audio),
+                "transcript": f"آية {surah}:{ayah}",
+                "metadata": {
+                    "reciter": reciter,
+                    "surah": surah,
+                    "ayah": ayah,
+                    "duration": 1.5,
+                    "sampling_rate": 16000,
+                    "source": "unknown",
+                },
+            }
+        )
+    records.append(
+        {
+            "audio_path": str(tmp_path / "missing.wav"),
+            "transcript": "",
+            "metadata": {"reciter": "alafasy", "surah": 1, "ayah": 3},
+        }
+    )
+    path = tmp_path / "dataset.jsonl"
+    path.write_text(
+        "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_parquet_row_groups_follow_reciter_and_surah(tmp_path):
+    report = write_parquet(_dataset(tmp_path), str(tmp_path / "dataset.parquet"))
+    assert (report["records"], report["row_groups"], report["skipped"]) == (6, 3, 0)
+
+    parquet = pq.ParquetFile(report["path"])
+    assert parquet.schema_arrow.field("reciter").type == pa.dictionary(
+        pa.int32(), pa.string()
+    )
+    groups = []
+    for i in range(parquet.metadata.num_row_groups):
+        group = parquet.metadata.row_group(i)
+        reciter, surah = (group.column(c).statistics for c in (0, 1))
+        assert (reciter.min, surah.min) == (reciter.max, surah.max)
+        groups.append((reciter.min, surah.min, group.num_rows))
+    assert groups == [("alafasy", 1, 3), ("alafasy", 2, 1), ("minshawi", 2, 2)]
+
+    table = read_dataset(
+        report["path"], columns=["ayah", "transcript"], reciter="minshawi", surah=2
+    )
+    assert table.column_names == ["ayah", "transcript"]
+    assert table.to_pydict() == {"ayah": [1, 2], "transcript": ["آية 2:1", "آية 2:2"]}
+
+
+def test_parquet_embeds_audio(tmp_path):
+    jsonl = _dataset(tmp_path)
+    with patch("backend.services.columnar.settings.parquet_row_group_rows", 1):
+        report = write_parquet(jsonl, str(tmp_path / "audio.parquet"), True)
+    assert (report["records"], report["skipped"]) == (5, 1)
+    assert report["row_groups"] == 5
+
+    rows = read_dataset(
+        report["path"], columns=["audio"], reciter="alafasy"
+    ).to_pylist()
+    assert [row["audio"] for row in rows] == [b"alafasy11", b"alafasy12", b"alafasy21"]
+
+
+def test_parquet_audio_row_groups_are_capped_by_bytes(tmp_path):
+    jsonl = _dataset(tmp_path)
+    # alafasy clips are 9 bytes and minshawi clips 10, so a 10 byte cap
+    # closes alafasy groups every 2 clips and minshawi groups after each one
+    with patch("backend.services.columnar.settings.parquet_row_group_bytes", 10):
+        report = write_parquet(jsonl, str(tmp_path / "audio.parquet"), True)
+        plain = write_parquet(jsonl, str(tmp_path / "plain.parquet"), False)
+    assert (report["records"], report["skipped"]) == (5, 1)
+    # The missing alafasy/1 clip leaves an empty batch that is not written
+    sizes = [
+        pq.ParquetFile(report["path"]).metadata.row_group(i).num_rows
+        for i in range(report["row_groups"])
+    ]
+    assert sizes == [2, 1, 1, 1]
+    assert plain["row_groups"] == 3
@@ -0,0 +1,52 @@
+import struct
+import wave
+import numpy as np
+import pytest
+from unittest.mock import patch
+from backend.services.conform import conform_audio, resample, write_pcm16
+
+
+def _raw_wav(path, tag, rate=48000, frames=4800):
+    # 32-bit mono header with a format code the wave module can't read
+    fmt = struct.pack("<HHIIHH", tag, 1, rate, rate * 4, 4, 32)
+    if tag == 0xFFFE:
+        fmt += struct.pack("<HHI", 22, 32, 4) + struct.pack("<H", 1) + b"\0" * 14
+    data = b"\0" * frames * 4
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    body += b"data" + struct.pack("<I", len(data)) + data
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+
+def test_resample_preserves_tone():
+    rate = 44100
+    t = np.arange(rate) / rate
+    # 440 Hz survives; 12 kHz is above the new Nyquist and must be removed
+    x = np.sin(2 * np.pi * 440 * t) + 0.5 * np.sin(2 * np.pi * 12000 * t)
+
+    y = resample(x, rate, 16000)
+
+    assert len(y) == 16000
+    expected = np.sin(2 * np.pi * 440 * np.arange(16000) / 16000)
+    assert np.abs(y[100:-100] - expected[100:-100]).max() < 0.01
+
+
+@pytest.mark.asyncio
+async def test_conform_audio_downmixes_and_resamples(tmp_path):
+    t = np.arange(48000) / 48000
+    tone = 0.5 * np.sin(2 * np.pi * 440 * t)
+    write_pcm16(str(tmp_path / "stereo.wav"), np.stack([tone, tone], axis=1), 48000)
+    write_pcm16(str(tmp_path / "ready.wav"), tone[:16000], 16000)
+    (tmp_path / "clip.mp3").write_bytes(b"\xff\xfb\x90\x44" + b"\0" * 1000)
+    # Float and WAVE_FORMAT_EXTENSIBLE files can't be decoded, not failures
+    _raw_wav(tmp_path / "float.wav", 3)
+    _raw_wav(tmp_path / "extensible.wav", 0xFFFE)
+
+    with (
+        patch("backend.services.conform.settings.data_dir", str(tmp_path)),
+        patch("backend.services.conform.get_process_pool", return_value=None),
+    ):
+        report = await conform_audio(str(tmp_path))
+
+    assert report == {"conformed": 1, "already": 1, "unsupported": 3, "failed": 0}
+    with wave.open(str(tmp_path / "stereo.wav"), "rb") as f:
+        assert (f.getframerate(), f.getnchannels(), f.getnframes()) == (16000, 1, 16000)
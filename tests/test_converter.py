@@ -0,0 +1,70 @@
+import io
+import json
+import wave
+import pytest
+from unittest.mock import patch
+from backend.services.converter import (
+    _iter_json_array,
+    convert_to_jsonl,
+    extract_metadata,
+    iter_metadata,
+)
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    with patch("backend.services.converter.settings.data_dir", str(tmp_path)):
+        yield tmp_path
+
+
+def _wav(path, rate=16000, frames=8000):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\0" * frames * 2)
+    return str(path)
+
+
+@pytest.mark.asyncio
+async def test_extract_metadata_streams_ndjson(tmp_path):
+    audio = tmp_path / "processed" / "audio"
+    files = [_wav(audio / "husary" / "001" / f"{ayah:03d}.wav") for ayah in (1, 2)]
+    with patch("backend.services.converter.PROBE_BATCH", 1):
+        metadata_path = await extract_metadata(files + [str(tmp_path / "notes.txt")])
+
+    assert metadata_path.endswith("metadata.jsonl")
+    with open(metadata_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 2
+    entries = list(iter_metadata(metadata_path))
+    assert [(e["reciter"], e["surah"], e["ayah"]) for e in entries] == [
+        ("husary", 1, 1),
+        ("husary", 1, 2),
+    ]
+    assert entries[0]["duration"] == pytest.approx(0.5)
+
+    jsonl_path = await convert_to_jsonl(metadata_path, str(audio))
+    with open(jsonl_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["audio_path"] for r in records] == files
+
+
+def test_legacy_metadata_json_is_read_incrementally(tmp_path):
+    entries = [
+        {"reciter": "r", "surah": 1, "ayah": i, "transcript": "بِسْمِ ٱللَّهِ ]"}
+        for i in range(1, 50)
+    ]
+    legacy = tmp_path / "metadata.json"
+    legacy.write_text(
+        json.dumps(entries, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    assert list(iter_metadata(str(legacy))) == entries
+
+    # Items split across reads of a few characters each
+    text = json.dumps(entries, ensure_ascii=False, indent=2)
+    assert list(_iter_json_array(io.StringIO(text), chunk_size=7)) == entries
+    assert list(_iter_json_array(io.StringIO(" [ ] "))) == []
+    with pytest.raises(ValueError):
+        list(_iter_json_array(io.StringIO(text[:-20]), chunk_size=7))
@@ -1,28 +1,48 @@
+import asyncio
+import hashlib
+import json
+import os
+import httpx
 import pytest
-from unittest.mock import patch, MagicMock
-from backend.services.extractor import download_datasets
+from unittest.mock import patch
+from backend.services import extractor
+from backend.services.extractor import _staging_dir, download_datasets
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    with patch("backend.services.extractor.settings.data_dir", str(tmp_path)):
+        yield tmp_path
+
+
+def _client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
 
 @pytest.mark.asyncio
 async def test_download_general_url_success():
     sources = ["https://example.com/data.zip"]
-    mock_response = MagicMock()
-    mock_response.content = b"fake data"
-    mock_response.raise_for_status.return_value = None
-    with patch("backend.services.extractor.requests.get", return_value=mock_response):
-        files = await download_datasets(sources)
+
+    def handler(request):
+        return httpx.Response(200, content=b"fake data")
+
+    async with _client(handler) as client:
+        files = await download_datasets(sources, client=client)
         assert len(files) == 1
         assert "data.zip" in files[0]
+        with open(files[0], "rb") as f:
+            assert f.read() == b"fake data"
 
 
 @pytest.mark.asyncio
 async def test_download_general_url_failure():
     sources = ["https://example.com/data.zip"]
-    with patch(
-        "backend.services.extractor.requests.get",
-        side_effect=Exception("Download failed"),
-    ):
-        files = await download_datasets(sources)
+
+    def handler(request):
+        raise Exception("Download failed")
+
+    async with _client(handler) as client:
+        files = await download_datasets(sources, client=client)
         assert len(files) == 0
 
 
@@ -31,3 +51,221 @@ async def test_download_kaggle_placeholder():
     sources = ["https://kaggle.com/datasets/example/quran"]
     files = await download_datasets(sources)
     assert len(files) == 0  # Placeholder, no actual download
+
+
+def _partial(tmp_path, source, data, etag=None):
+    raw_dir = (
+        tmp_path / "raw" / os.path.basename(_staging_dir(str(tmp_path / "raw"), source))
+    )
+    raw_dir.mkdir(parents=True)
+    (raw_dir / "data.zip.part").write_bytes(data)
+    if etag:
+        (raw_dir / "data.zip.part.json").write_text(
+            json.dumps({"etag": etag, "last_modified": None})
+        )
+    return raw_dir
+
+
+@pytest.mark.asyncio
+async def test_download_resumes_partial_file(tmp_path):
+    source = "https://example.com/data.zip"
+    raw_dir = _partial(tmp_path, source, b"fake ", etag='"v1"')
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(
+            (request.headers.get("Range"), request.headers.get("If-Range"))
+        )
+        return httpx.Response(206, content=b"data")
+
+    async with _client(handler) as client:
+        files = await download_datasets([source], client=client)
+    assert seen_headers == [("bytes=5-", '"v1"')]
+    assert (raw_dir / "data.zip").read_bytes() == b"fake data"
+    assert not (raw_dir / "data.zip.part").exists()
+    assert not (raw_dir / "data.zip.part.json").exists()
+    assert files == [os.path.join(str(raw_dir), "data.zip")]
+
+
+@pytest.mark.asyncio
+async def test_download_without_validator_restarts(tmp_path):
+    source = "https://example.com/data.zip"
+    raw_dir = _partial(tmp_path, source, b"stale")
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("Range"))
+        return httpx.Response(200, content=b"new data")
+
+    async with _client(handler) as client:
+        await download_datasets([source], client=client)
+    assert seen_headers == [None]
+    assert (raw_dir / "data.zip").read_bytes() == b"new data"
+
+
+@pytest.mark.asyncio
+async def test_download_416_completes_only_matching_part(tmp_path):
+    source = "https://example.com/data.zip"
+    raw_dir = _partial(tmp_path, source, b"whole", etag='"v1"')
+
+    def handler(request):
+        return httpx.Response(416, headers={"Content-Range": "bytes */5"})
+
+    async with _client(handler) as client:
+        await download_datasets([source], client=client)
+    assert (raw_dir / "data.zip").read_bytes() == b"whole"
+
+
+@pytest.mark.asyncio
+async def test_download_416_with_other_length_restarts(tmp_path):
+    source = "https://example.com/data.zip"
+    raw_dir = _partial(tmp_path, source, b"longer than the file", etag='"v1"')
+    seen_headers = []
+
+    def handler(request):
+        seen_headers.append(request.headers.get("Range"))
+        if request.headers.get("Range"):
+            return httpx.Response(416, headers={"Content-Range": "bytes */3"})
+        return httpx.Response(200, content=b"new", headers={"ETag": '"v2"'})
+
+    async with _client(handler) as client:
+        await download_datasets([source], client=client)
+    assert seen_headers == ["bytes=20-", None]
+    assert (raw_dir / "data.zip").read_bytes() == b"new"
+
+
+@pytest.mark.asyncio
+async def test_download_checksum_mismatch(tmp_path):
+    digest = hashlib.sha256(b"expected").hexdigest()
+
+    def handler(request):
+        return httpx.Response(200, content=b"corrupted")
+
+    async with _client(handler) as client:
+        files = await download_datasets(
+            [f"https://example.com/data.zip#sha256={digest}"], client=client
+        )
+    assert files == []
+    assert not list((tmp_path / "raw").rglob("data.zip"))
+
+
+@pytest.mark.asyncio
+async def test_download_concurrency_limited_per_host(tmp_path):
+    in_flight = {"now": 0, "peak": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, content=b"x")
+
+    sources = [f"https://example.com/file{i}.bin" for i in range(6)]
+    with patch("backend.services.extractor.settings.download_per_host_limit", 2):
+        async with _client(handler) as client:
+            files = await download_datasets(sources, client=client)
+    assert len(files) == 6
+    assert in_flight["peak"] == 2
+
+
+@pytest.mark.asyncio
+async def test_download_revalidates_cached_file():
+    requests_seen = []
+
+    def handler(request):
+        requests_seen.append(request.headers.get("If-None-Match"))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=b"fake data", headers={"ETag": '"v1"'})
+
+    sources = ["https://example.com/data.zip"]
+    with patch("backend.services.extractor.settings.download_cache_ttl", 0):
+        async with _client(handler) as client:
+            first = await download_datasets(sources, client=client)
+            second = await download_datasets(sources, client=client)
+    assert requests_seen == [None, '"v1"']
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_download_fresh_cache_skips_network():
+    calls = []
+
+    def handler(request):
+        calls.append(request.url)
+        return httpx.Response(200, content=b"fake data")
+
+    sources = ["https://example.com/data.zip"]
+    async with _client(handler) as client:
+        first = await download_datasets(sources, client=client)
+        second = await download_datasets(sources, client=client)
+    assert len(calls) == 1
+    assert first == second
+
+
+@pytest.mark.asyncio
+async def test_kaggle_download_reports_only_changed_files():
+    payloads = [
+        {"quran.csv": "v1", "readme.txt": "same"},
+        {"quran.csv": "v2", "readme.txt": "same"},
+    ]
+    versions = iter(["version-1", "version-2"])
+
+    async def fake_kaggle(*args):
+        if args[1] == "files":
+            return 0, next(versions), ""
+        target = args[args.index("-p") + 1]
+        for name, text in payloads.pop(0).items():
+            with open(os.path.join(target, name), "w") as f:
+                f.write(text)
+        return 0, "", ""
+
+    sources = ["https://www.kaggle.com/datasets/example/quran"]
+    with patch("backend.services.extractor._run_kaggle", side_effect=fake_kaggle):
+        with patch("backend.services.extractor.settings.download_cache_ttl", 0):
+            first = await download_datasets(sources)
+            second = await download_datasets(sources)
+    assert sorted(os.path.basename(f) for f in first) == ["quran.csv", "readme.txt"]
+    assert [os.path.basename(f) for f in second] == ["quran.csv"]
+    assert "kaggle_example_quran" in second[0]
+
+
+@pytest.mark.asyncio
+async def test_overlapping_downloads_keep_each_others_cache_entries(tmp_path):
+    async def handler(request):
+        # Both requests are in flight before either finishes
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, content=request.url.path.encode())
+
+    sources = ["https://a.example.com/one.zip", "https://b.example.com/two.zip"]
+    async with _client(handler) as client:
+        await asyncio.gather(
+            *(download_datasets([source], client=client) for source in sources)
+        )
+
+    with open(tmp_path / "cache" / "downloads.json", encoding="utf-8") as f:
+        assert sorted(json.load(f)) == sources
+
+
+@pytest.mark.asyncio
+async def test_download_hashes_while_streaming(tmp_path):
+    digest = hashlib.sha256(b"fake data").hexdigest()
+    source = f"https://example.com/data.zip#sha256={digest}"
+    fresh = "https://example.com/fresh.zip"
+    _partial(tmp_path, source, b"fake ", etag='"v1"')
+
+    def handler(request):
+        if request.headers.get("Range"):
+            return httpx.Response(206, content=b"data")
+        return httpx.Response(200, content=b"fresh")
+
+    with patch(
+        "backend.services.extractor._hash_file", wraps=extractor._hash_file
+    ) as hash_file:
+        async with _client(handler) as client:
+            files = await download_datasets([source], client=client)
+            assert len(files) == 1
+            # Only the prefix left by an earlier run is read back
+            assert hash_file.call_count == 1
+            await download_datasets([fresh], client=client)
+            assert hash_file.call_count == 1
@@ -0,0 +1,144 @@
+import os
+import csv
+import io
+import json
+import tarfile
+import pyarrow as pa
+import pyarrow.parquet as pq
+from backend.services.audio_handler import parse_audio_path
+from backend.services.hf_ingest import ingest_snapshot, iter_shard_rows
+
+WAV_BYTES = b"RIFF\x24\x00\x00\x00WAVEfmt "
+
+
+def _read_transcripts(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_ingest_parquet_snapshot(tmp_path):
+    snapshot = tmp_path / "snapshot" / "data"
+    snapshot.mkdir(parents=True)
+    table = pa.table(
+        {
+            "audio": [
+                {"bytes": WAV_BYTES, "path": "a.wav"},
+                {"bytes": WAV_BYTES, "path": "b.wav"},
+            ],
+            "text": ["بِسْمِ ٱللَّهِ", "ٱلْحَمْدُ لِلَّهِ"],
+            "reciter": ["alafasy", "alafasy"],
+            "surah": [1, 1],
+            "ayah": [1, 2],
+        }
+    )
+    pq.write_table(table, snapshot / "train-00000.parquet", row_group_size=1)
+
+    files = ingest_snapshot(str(tmp_path / "snapshot"), str(tmp_path / "out"))
+
+    clip = tmp_path / "out" / "audio" / "data__train-00000" / "alafasy_1_2.wav"
+    assert clip.read_bytes() == WAV_BYTES
+    rows = _read_transcripts(tmp_path / "out" / "transcripts.csv")
+    assert [r["text"] for r in rows] == ["بِسْمِ ٱللَّهِ", "ٱلْحَمْدُ لِلَّهِ"]
+    assert rows[1]["audio_path"] in files
+    assert files[-1].endswith("transcripts.csv")
+
+
+def test_ingest_jsonl_with_relative_audio(tmp_path):
+    snapshot = tmp_path / "snapshot"
+    (snapshot / "clips").mkdir(parents=True)
+    (snapshot / "clips" / "x.flac").write_bytes(b"fLaC0000")
+    with open(snapshot / "train.jsonl", "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "x", "audio": "clips/x.flac", "sentence": "قُلْ"}))
+        f.write("\n")
+
+    ingest_snapshot(str(snapshot), str(tmp_path / "out"))
+
+    clip = tmp_path / "out" / "audio" / "train" / "x.flac"
+    assert clip.read_bytes() == b"fLaC0000"
+    rows = _read_transcripts(tmp_path / "out" / "transcripts.csv")
+    assert rows[0]["text"] == "قُلْ"
+
+
+def test_tar_shard_groups_members_by_key(tmp_path):
+    shard = tmp_path / "shard-000.tar"
+    with tarfile.open(shard, "w") as tar:
+        for name, data in [
+            ("0001.wav", WAV_BYTES),
+            ("0001.txt", "نص".encode("utf-8")),
+            ("0002.mp3", b"ID3"),
+            ("0002.json", json.dumps({"surah": 2, "ayah": 1}).encode("utf-8")),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    rows = list(iter_shard_rows(str(shard)))
+
+    assert [r["__key__"] for r in rows] == ["0001", "0002"]
+    assert rows[0]["txt"] == "نص".encode("utf-8")
+    assert rows[1]["mp3"] == b"ID3"
+
+
+def test_unlabelled_rows_do_not_look_like_everyayah_names(tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    table = pa.table(
+        {
+            "audio": [{"bytes": WAV_BYTES, "path": None}] * 2,
+            "reciter": [None, "abdul_basit"],
+            "surah": [None, 1],
+            "ayah": [None, 2],
+            "text": ["قُلْ", "ٱلْحَمْدُ لِلَّهِ"],
+        }
+    )
+    pq.write_table(table, snapshot / "train.parquet")
+
+    files = ingest_snapshot(str(snapshot), str(tmp_path / "out"))
+
+    names = [os.path.basename(path) for path in files[:-1]]
+    assert names == ["row-000000.wav", "abdul-basit_1_2.wav"]
+    assert parse_audio_path(files[0]) is None
+    rows = _read_transcripts(tmp_path / "out" / "transcripts.csv")
+    assert rows[1]["reciter"] == parse_audio_path(files[1])[0] == "abdul-basit"
+
+
+def test_metadata_json_and_bad_shards_do_not_stop_ingest(tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    table = pa.table({"audio": [{"bytes": WAV_BYTES, "path": None}], "text": ["قُلْ"]})
+    pq.write_table(table, snapshot / "train.parquet")
+    # Pretty-printed JSON: Hub metadata, and a .json that is not JSON Lines
+    info = json.dumps({"default": {"features": {}}}, indent=2)
+    (snapshot / "dataset_infos.json").write_text(info, encoding="utf-8")
+    (snapshot / "extra.json").write_text(info, encoding="utf-8")
+
+    files = ingest_snapshot(str(snapshot), str(tmp_path / "out"))
+
+    assert len(files) == 2
+    rows = _read_transcripts(tmp_path / "out" / "transcripts.csv")
+    assert [r["text"] for r in rows] == ["قُلْ"]
+
+
+def test_ids_are_cleaned_and_kept_apart_per_shard(tmp_path):
+    snapshot = tmp_path / "snapshot"
+    snapshot.mkdir()
+    for split, data in [("train", WAV_BYTES), ("test", WAV_BYTES + b"2")]:
+        table = pa.table(
+            {
+                "audio": [{"bytes": data, "path": None}] * 2,
+                "id": ["clips/a", "b"],
+                "text": ["قُلْ", "قُلْ"],
+            }
+        )
+        pq.write_table(table, snapshot / f"{split}.parquet")
+
+    files = ingest_snapshot(str(snapshot), str(tmp_path / "out"))
+
+    audio = [os.path.relpath(path, tmp_path / "out" / "audio") for path in files[:-1]]
+    assert audio == [
+        os.path.join("test", "clips-a.wav"),
+        os.path.join("test", "b.wav"),
+        os.path.join("train", "clips-a.wav"),
+        os.path.join("train", "b.wav"),
+    ]
+    assert (tmp_path / "out" / "audio" / "test" / "b.wav").read_bytes() != WAV_BYTES
@@ -0,0 +1,169 @@
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from backend.services.llm_cache import LLMCache
+from backend.services.llm_client import LLMClient
+from tools.fake_groq import create_app
+
+
+def _reply(results):
+    content = json.dumps({"results": results}, ensure_ascii=False)
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+def _echo(request):
+    ayat = json.loads(json.loads(request.content)["messages"][1]["content"])["ayat"]
+    return _reply([{"id": a["id"], "text": a["text"] + "!"} for a in ayat])
+
+
+@pytest.fixture(autouse=True)
+def fast_limits(tmp_path):
+    with patch.multiple(
+        "backend.services.llm_client.settings",
+        data_dir=str(tmp_path),
+        llm_backoff_base=0.0,
+        llm_requests_per_minute=60000.0,
+        llm_batch_size=10,
+    ):
+        yield
+
+
+def _client(handler):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return LLMClient(api_key="test", http_client=http)
+
+
+@pytest.mark.asyncio
+async def test_validate_many_packs_ayat_into_batches():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _echo(request)
+
+    client = _client(handler)
+    ayat = [f"آية {i}" for i in range(25)] + [""]
+    results = await client.validate_many(ayat)
+
+    assert len(calls) == 3
+    assert results[:2] == ["آية 0!", "آية 1!"]
+    assert results[-1] == ""
+    assert json.loads(calls[0].content)["response_format"] == {"type": "json_object"}
+
+
+@pytest.mark.asyncio
+async def test_retries_on_rate_limit_then_succeeds():
+    responses = [httpx.Response(429), httpx.Response(503)]
+
+    def handler(request):
+        return responses.pop(0) if responses else _echo(request)
+
+    client = _client(handler)
+    assert await client.validate_many(["نص"]) == ["نص!"]
+    assert client.stats == {"requests": 3, "retries": 2, "failures": 0}
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_input_when_retries_exhausted():
+    client = _client(lambda request: httpx.Response(500))
+    with patch("backend.services.llm_client.settings.llm_max_retries", 2):
+        assert await client.validate_many(["نص"]) == ["نص"]
+    assert client.stats["failures"] == 1
+    assert client.stats["requests"] == 3
+
+
+@pytest.mark.asyncio
+async def test_cached_ayat_make_no_new_requests():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _echo(request)
+
+    ayat = ["قُلْ هُوَ ٱللَّهُ أَحَدٌ", "قُلْ هُوَ ٱللَّهُ أَحَدٌ", "ٱللَّهُ ٱلصَّمَدُ"]
+    first = _client(handler)
+    assert await first.validate_many(ayat) == [a + "!" for a in ayat]
+    await first.aclose()
+    second = _client(handler)
+    assert await second.validate_many(ayat) == [a + "!" for a in ayat]
+
+    assert len(calls) == 1
+    assert second.cache.stats()["hits"] == 2
+    assert second.stats["requests"] == 0
+
+
+@pytest.mark.asyncio
+async def test_ayat_left_out_of_the_reply_are_not_ok_or_cached():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        ayat = json.loads(json.loads(request.content)["messages"][1]["content"])
+        # The model always drops one of the ayat
+        return _reply(
+            [
+                {"id": a["id"], "text": a["text"] + "!"}
+                for a in ayat["ayat"]
+                if a["text"] != "آخر"
+            ]
+        )
+
+    client = _client(handler)
+    validated, ok = await client.validate_many_with_status(["نص", "آخر"])
+    assert (validated, ok) == (["نص!", "آخر"], [True, False])
+
+    validated, ok = await client.validate_many_with_status(["نص", "آخر"])
+    assert ok == [True, False]
+    assert len(calls) == 2  # Only "آخر" is asked again
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"))
+    cache.put_many({"a": "x" * 600, "b": "y" * 600})
+    cache.get_many(["a"])
+    with patch("backend.services.llm_cache.settings.llm_cache_max_mb", 0.001):
+        assert cache.evict() == 1
+    assert cache.get_many(["a", "b"]) == {"a": "x" * 600}
+
+
+@pytest.mark.asyncio
+async def test_against_fake_groq_with_injected_errors():
+    app = create_app(latency=0.0, jitter=0.0, rate_limit_rate=0.3, seed=1)
+    http = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+    client = LLMClient(
+        api_key="test", base_url="http://fake/openai/v1", http_client=http
+    )
+    ayat = [f"بِسْمِ ٱللَّهِ {i}" for i in range(30)]
+
+    results = await client.validate_many(ayat)
+
+    assert results == ["بسم الله"] * 30
+    assert client.stats["retries"] == app.state.stats["rate_limited"] > 0
+    assert len(client.latencies) == client.stats["requests"]
+
+
+def test_cache_evicts_periodically_while_open(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"))
+    with patch.multiple(
+        "backend.services.llm_cache.settings",
+        llm_cache_max_mb=0.001,
+        llm_cache_evict_every=2,
+    ):
+        cache.put_many({"a": "x" * 600})
+        assert cache.stats()["entries"] == 1
+        # The second write reaches llm_cache_evict_every and trims the store
+        cache.put_many({"b": "y" * 600})
+    assert cache.stats()["entries"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_stats_are_logged_after_each_run(caplog):
+    client = _client(_echo)
+    with caplog.at_level("INFO", logger="backend.services.llm_client"):
+        await client.validate_many(["نص"])
+        await client.validate_many(["نص"])
+    await client.aclose()
+    logged = [r.message for r in caplog.records if r.message.startswith("LLM cache")]
+    assert len(logged) == 2
+    assert "'hits': 1" in logged[-1] and "'misses': 1" in logged[-1]
@@ -1,6 +1,21 @@
+import os
+import csv
 import pytest
 from unittest.mock import patch, mock_open
-from backend.services.normalizer import normalize_transcripts
+from concurrent.futures import ProcessPoolExecutor
+from backend.services.arabic_normalizer import Normalizer
+from backend.services.normalizer import (
+    normalize_file,
+    normalize_transcripts,
+    run_normalization,
+)
+
+
+@pytest.fixture(autouse=True)
+def no_review_queue():
+    # The review queue is covered in test_review_queue; keep these tests off disk
+    with patch("backend.services.normalizer.settings.review_enabled", False):
+        yield
 
 
 @pytest.mark.asyncio
@@ -12,15 +27,123 @@ async def test_normalize_transcripts_success():
             "backend.services.normalizer.os.path.join",
             return_value="data/processed/transcripts/transcript1.txt",
         ):
-            with patch("backend.services.normalizer.os.makedirs"):
+            with (
+                patch("backend.services.normalizer.os.makedirs"),
+                patch("backend.services.normalizer.os.replace"),
+                patch(
+                    "backend.services.normalizer.settings.normalize_incremental", False
+                ),
+            ):
                 files = await normalize_transcripts(transcript_files)
                 assert len(files) == 1
                 assert "transcript1.txt" in files[0]
 
 
 @pytest.mark.asyncio
-async def test_normalize_transcripts_failure():
+async def test_normalize_transcripts_failure(tmp_path):
     transcript_files = ["data/raw/transcript1.txt"]
-    with patch("builtins.open", side_effect=Exception("File not found")):
+    with (
+        patch("backend.services.normalizer.settings.data_dir", str(tmp_path)),
+        patch("backend.services.normalizer.settings.normalize_incremental", False),
+        patch("builtins.open", side_effect=Exception("File not found")),
+    ):
         files = await normalize_transcripts(transcript_files)
         assert len(files) == 0
+
+
+@pytest.mark.asyncio
+async def test_unreadable_fingerprint_manifest_is_ignored(tmp_path):
+    source = tmp_path / "quran.txt"
+    source.write_text("بسم الله\n", encoding="utf-8")
+    (tmp_path / "cache").mkdir()
+    (tmp_path / "cache" / "normalize.json").write_text("{not json", encoding="utf-8")
+    with patch("backend.services.normalizer.settings.data_dir", str(tmp_path)):
+        report = await run_normalization([str(source)])
+    assert (report["processed"], report["failed"]) == (1, 0)
+
+
+@pytest.mark.asyncio
+async def test_normalize_csv_keeps_structured_columns(tmp_path):
+    source = tmp_path / "quran.csv"
+    source.write_text(
+        "surah_no,ayah_no_surah,ayah_ar,ayah_en\n"
+        '2,2,"ذَٰلِكَ ٱلْكِتَٰبُ لَا رَيْبَ ۛ فِيهِ ۛ","This is the Book, no doubt"\n',
+        encoding="utf-8",
+    )
+    with patch("backend.services.normalizer.settings.data_dir", str(tmp_path)):
+        files = await normalize_transcripts([str(source)])
+
+    with open(files[0], encoding="utf-8", newline="") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["surah_no", "ayah_no_surah", "ayah_ar", "ayah_en"]
+    assert rows[1] == [
+        "2",
+        "2",
+        "ذَٰلِكَ ٱلْكِتَٰبُ لَا رَيْبَ فِيهِ",
+        "This is the Book, no doubt",
+    ]
+
+
+def test_parallel_normalization_preserves_row_order(tmp_path):
+    source = tmp_path / "quran.txt"
+    lines = [f"آية {i} ذَٰلِكَ ٱلْكِتَٰبُ ۛ لَا رَيْبَ abc" for i in range(50)]
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    normalizer = Normalizer("plain-v1")
+    serial_path = tmp_path / "serial.txt"
+    parallel_path = tmp_path / "parallel.txt"
+
+    serial_count = normalize_file(str(source), str(serial_path), normalizer)
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        with patch("backend.services.normalizer.settings.normalize_shard_rows", 7):
+            parallel_count = normalize_file(
+                str(source), str(parallel_path), normalizer, pool
+            )
+
+    assert serial_count == parallel_count == 50
+    assert parallel_path.read_text(encoding="utf-8") == serial_path.read_text(
+        encoding="utf-8"
+    )
+    assert parallel_path.read_text(encoding="utf-8").startswith("اية ذلك الكتب لا ريب")
+
+
+@pytest.mark.asyncio
+async def test_rerun_skips_unchanged_inputs(tmp_path):
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("بِسْمِ ٱللَّهِ\n", encoding="utf-8")
+    second.write_text("ٱلْحَمْدُ لِلَّهِ\n", encoding="utf-8")
+    inputs = [str(first), str(second)]
+
+    with patch("backend.services.normalizer.settings.data_dir", str(tmp_path)):
+        report = await run_normalization(inputs)
+        assert (report["processed"], report["skipped"]) == (2, 0)
+
+        second.write_text("رَبِّ ٱلْعَٰلَمِينَ\n", encoding="utf-8")
+        report = await run_normalization(inputs)
+        assert (report["processed"], report["skipped"]) == (1, 1)
+
+        with patch("backend.services.normalizer.settings.normalizer_rules", "plain-v1"):
+            report = await run_normalization(inputs)
+        assert (report["processed"], report["skipped"]) == (2, 0)
+
+    with open(report["normalized"][1], encoding="utf-8") as f:
+        assert f.read() == "رب العلمين\n"
+    assert not list(tmp_path.glob("processed/transcripts/*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_same_named_sources_get_distinct_outputs(tmp_path):
+    sources = []
+    for name, text in (("hf_a_quran", "بسم الله"), ("hf_b_quran", "الحمد لله")):
+        staging = tmp_path / "raw" / name
+        staging.mkdir(parents=True)
+        (staging / "transcripts.txt").write_text(text + "\n", encoding="utf-8")
+        sources.append(str(staging / "transcripts.txt"))
+    with patch("backend.services.normalizer.settings.data_dir", str(tmp_path)):
+        report = await run_normalization(sources + [sources[0]])
+
+    assert (report["processed"], report["failed"]) == (2, 1)
+    outputs = sorted(os.path.basename(path) for path in report["normalized"])
+    assert outputs == ["hf_a_quran__transcripts.txt", "hf_b_quran__transcripts.txt"]
+    texts = {open(path, encoding="utf-8").read() for path in report["normalized"]}
+    assert len(texts) == 2
@@ -0,0 +1,101 @@
+import os
+import struct
+import sqlite3
+import wave
+import pytest
+from unittest.mock import patch
+from backend.services.probe import ProbeIndex, probe_file, probe_many
+
+
+def _wav(path, rate=22050, channels=2, frames=22050):
+    with wave.open(str(path), "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        f.writeframes(b"\0" * frames * channels * 2)
+    return str(path)
+
+
+def _raw_wav(path, tag, bits=32, rate=16000, frames=16000):
+    # Hand-built header for format codes the wave module can't write
+    block_align = bits // 8
+    fmt = struct.pack("<HHIIHH", tag, 1, rate, rate * block_align, block_align, bits)
+    if tag == 0xFFFE:
+        # cbSize, valid bits, channel mask, then the subformat GUID (float)
+        fmt += struct.pack("<HHI", 22, bits, 4) + struct.pack("<H", 3) + b"\0" * 14
+    data = b"\0" * frames * block_align
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    body += b"data" + struct.pack("<I", len(data)) + data
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+    return str(path)
+
+
+def _flac(path, rate=16000, channels=1, depth=16, samples=48000):
+    packed = (rate << 44) | ((channels - 1) << 41) | ((depth - 1) << 36) | samples
+    streaminfo = b"\0" * 10 + packed.to_bytes(8, "big") + b"\0" * 16
+    path.write_bytes(b"fLaC" + b"\x80\x00\x00\x22" + streaminfo)
+    return str(path)
+
+
+def _mp3(path, seconds=2):
+    # MPEG-1 layer III, 128 kbps, 44.1 kHz, joint stereo, behind an ID3 tag
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x0a" + b"\0" * 10
+    path.write_bytes(id3 + b"\xff\xfb\x90\x44" + b"\0" * (16000 * seconds - 4))
+    return str(path)
+
+
+def test_probe_formats(tmp_path):
+    wav = probe_file(_wav(tmp_path / "a.wav"))
+    assert (wav.format, wav.sample_rate, wav.channels, wav.bit_depth) == (
+        "wav",
+        22050,
+        2,
+        16,
+    )
+    assert wav.duration == pytest.approx(1.0)
+
+    assert wav.format_tag == 1
+    assert probe_file(_raw_wav(tmp_path / "float.wav", 3)).format_tag == 3
+    extensible = probe_file(_raw_wav(tmp_path / "ext.wav", 0xFFFE))
+    assert (extensible.format_tag, extensible.bit_depth) == (0xFFFE, 32)
+    assert extensible.duration == pytest.approx(1.0)
+
+    flac = probe_file(_flac(tmp_path / "a.flac"))
+    assert (flac.sample_rate, flac.channels, flac.bit_depth) == (16000, 1, 16)
+    assert flac.duration == pytest.approx(3.0)
+
+    # gTTS output is MP3 even when saved under a .wav name
+    mp3 = probe_file(_mp3(tmp_path / "generated.wav"))
+    assert (mp3.format, mp3.sample_rate, mp3.channels) == ("mp3", 44100, 2)
+    assert mp3.duration == pytest.approx(2.0)
+
+
+def test_probe_many_reuses_index_until_file_changes(tmp_path):
+    index = ProbeIndex(str(tmp_path / "probe.sqlite3"))
+    paths = [_wav(tmp_path / "a.wav"), _flac(tmp_path / "b.flac")]
+    broken = tmp_path / "c.mp3"
+    broken.write_bytes(b"not audio")
+
+    first = probe_many(paths + [str(broken)], index)
+    assert first[str(broken)] is None
+    with patch("backend.services.probe.probe_file") as probe:
+        second = probe_many(paths, index)
+    probe.assert_not_called()
+    assert second == {path: first[path] for path in paths}
+
+    _wav(tmp_path / "a.wav", frames=44100)
+    os.utime(paths[0], ns=(0, 1))
+    assert probe_many(paths, index)[paths[0]].duration == pytest.approx(2.0)
+
+
+def test_probe_index_from_an_older_layout_is_rebuilt(tmp_path):
+    path = str(tmp_path / "probe.sqlite3")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE probes (path TEXT PRIMARY KEY, size INTEGER)")
+    db.commit()
+    db.close()
+
+    wav = _wav(tmp_path / "a.wav")
+    info = probe_many([wav], ProbeIndex(path))[wav]
+    assert info.format_tag == 1
+    assert probe_many([wav], ProbeIndex(path))[wav] == info
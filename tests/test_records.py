@@ -0,0 +1,39 @@
+import json
+from unittest.mock import patch
+from backend.models import JsonlEntry, MetadataEntry
+from backend.records import METADATA_FIELDS, MetadataRecord, dumps_line, jsonl_line
+
+FIELDS = {
+    "reciter": "husary",
+    "surah": 2,
+    "ayah": 255,
+    "duration": 3.25,
+    "sampling_rate": 16000,
+    "source": "unknown",
+    "transcript": "ٱللَّهُ لَآ إِلَٰهَ إِلَّا هُوَ",
+    "audio_path": "data/processed/audio/husary/002/255.wav",
+}
+
+
+def test_record_matches_api_schema():
+    assert METADATA_FIELDS == tuple(MetadataEntry.model_fields)
+    expected = MetadataEntry(**FIELDS).model_dump()
+    line = dumps_line(MetadataRecord(**FIELDS))
+    assert line.endswith(b"\n")
+    assert list(json.loads(line).items()) == list(expected.items())
+
+    entry = JsonlEntry(
+        audio_path="x.wav",
+        transcript=FIELDS["transcript"],
+        metadata={
+            k: v for k, v in expected.items() if k not in ("audio_path", "transcript")
+        },
+    )
+    assert json.loads(jsonl_line(expected, "x.wav")) == entry.model_dump()
+
+
+def test_stdlib_fallback_writes_the_same_bytes():
+    record = MetadataRecord(**FIELDS)
+    with patch("backend.records.orjson", None):
+        fallback = dumps_line(record)
+    assert fallback == dumps_line(record)
@@ -0,0 +1,102 @@
+import pytest
+from unittest.mock import patch
+from backend.services import reference
+from backend.services.reference import (
+    TOTAL_AYAT,
+    ReferenceIndex,
+    build_reference_index,
+    edit_distance,
+    get_reference_index,
+    transcript_rows,
+    validate_transcript,
+)
+
+
+def _tanzil(path):
+    lines = []
+    for surah, count in enumerate(reference.AYAH_COUNTS, 1):
+        for ayah in range(1, count + 1):
+            lines.append(f"{surah}|{ayah}|آيَةُ {surah} {ayah}")
+    lines[0] = "1|1|بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"
+    path.write_text("\n".join(lines) + "\n# comment\n", encoding="utf-8")
+    return path
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    with patch("backend.services.reference.settings.data_dir", str(tmp_path)):
+        yield
+    reference._index = None
+
+
+def test_edit_distance():
+    assert edit_distance("", "abc") == 3
+    assert edit_distance("kitten", "sitting") == 3
+    assert edit_distance("الرحمن", "الرحيم") == 2
+    assert edit_distance("a" * 100 + "b", "a" * 101) == 1
+
+
+def test_index_lookup(tmp_path):
+    index_path = build_reference_index(
+        str(_tanzil(tmp_path / "quran.txt")), str(tmp_path / "ref.idx")
+    )
+    index = ReferenceIndex(index_path)
+
+    assert len(index) == TOTAL_AYAT
+    assert index.get(1, 1) == "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"
+    assert index.get(2, 286) == "آيَةُ 2 286"
+    assert index.get(114, 6) == "آيَةُ 114 6"
+    assert index.get(1, 8) is None
+    assert index.get(115, 1) is None
+
+
+def test_validate_transcript_reports_distances(tmp_path):
+    source = _tanzil(tmp_path / "quran.txt")
+    transcript = tmp_path / "transcript.csv"
+    transcript.write_text(
+        "surah_no,ayah_no_surah,ayah_ar\n"
+        "1,1,بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ\n"
+        "1,2,آيَةُ 1 2\n"
+        "1,3,آيَةٌ 1 3\n"
+        "1,9,زائد\n",
+        encoding="utf-8",
+    )
+    with patch("backend.services.reference.settings.reference_text_path", str(source)):
+        report = validate_transcript(str(transcript))
+        assert get_reference_index() is get_reference_index()
+
+    assert report["ayat"] == 3
+    assert report["exact"] == 2
+    assert report["missing"] == 1
+    assert [r["distance"] for r in report["results"]] == [0, 0, 1]
+
+
+def test_transcript_rows_skip_blank_lines_and_bad_rows(tmp_path):
+    text = tmp_path / "transcript.txt"
+    text.write_text("بِسْمِ ٱللَّهِ\n\n   \nٱلْحَمْدُ لِلَّهِ\n", encoding="utf-8")
+    # A blank line must not shift the next ayah to 1:3
+    assert [row[1:3] for row in transcript_rows(str(text))] == [(1, 1), (1, 2)]
+
+    table = tmp_path / "transcript.csv"
+    table.write_text(
+        "surah_no,ayah_no_surah,ayah_ar\n"
+        "1,1,بِسْمِ ٱللَّهِ\n"
+        ",,\n"
+        "one,2,ٱلْحَمْدُ\n"
+        "\n"
+        "1,3,ٱلرَّحْمَٰنِ\n",
+        encoding="utf-8",
+    )
+    assert [row[1:3] for row in transcript_rows(str(table))] == [(1, 1), (1, 3)]
+
+
+def test_validate_transcript_survives_malformed_rows(tmp_path):
+    source = _tanzil(tmp_path / "quran.txt")
+    transcript = tmp_path / "transcript.csv"
+    transcript.write_text(
+        "surah_no,ayah_no_surah,ayah_ar\n1,2,آيَةُ 1 2\n,,\nx,y,z\n",
+        encoding="utf-8",
+    )
+    with patch("backend.services.reference.settings.reference_text_path", str(source)):
+        report = validate_transcript(str(transcript))
+    assert (report["ayat"], report["exact"]) == (1, 1)
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import httpx
+import pytest
+from unittest.mock import patch
+from backend.services.arabic_normalizer import Normalizer
+from backend.services.llm_client import LLMClient
+from backend.services.normalizer import normalize_file, run_normalization
+from backend.services.review_queue import (
+    ReviewQueue,
+    ReviewWorker,
+    review_worker_running,
+)
+
+
+def _suggest(request):
+    ayat = json.loads(json.loads(request.content)["messages"][1]["content"])["ayat"]
+    results = [{"id": a["id"], "text": a["text"].replace("ا", "آ")} for a in ayat]
+    content = json.dumps({"results": results}, ensure_ascii=False)
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}}]})
+
+
+@pytest.fixture(autouse=True)
+def fast_limits(tmp_path):
+    with patch.multiple(
+        "backend.services.llm_client.settings",
+        data_dir=str(tmp_path),
+        llm_backoff_base=0.0,
+        llm_max_retries=0,
+        llm_requests_per_minute=60000.0,
+    ):
+        yield
+
+
+def _client(handler):
+    http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return LLMClient(api_key="test", http_client=http)
+
+
+def test_normalize_file_enqueues_ayat_once(tmp_path):
+    source = tmp_path / "quran.csv"
+    source.write_text(
+        "surah_no,ayah_no_surah,ayah_ar\n1,1,بِسْمِ ٱللَّهِ\n1,2,ٱلْحَمْدُ لِلَّهِ\n",
+        encoding="utf-8",
+    )
+    queue = ReviewQueue(str(tmp_path / "queue.sqlite3"))
+    output = str(tmp_path / "out.csv")
+
+    assert normalize_file(str(source), output, Normalizer(), review=queue) == 2
+    normalize_file(str(source), output, Normalizer(), review=queue)
+
+    progress = queue.progress()
+    assert progress["pending"] == progress["total"] == 2
+    ayat = [row["ayah"] for row in queue.claim(10)]
+    assert ayat == ["1:1", "1:2"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("api_key", [None, "set"])
+async def test_nothing_is_queued_without_a_running_worker(tmp_path, api_key):
+    # As in the Streamlit app: services called directly, no lifespan worker
+    source = tmp_path / "quran.txt"
+    source.write_text("بِسْمِ ٱللَّهِ\n", encoding="utf-8")
+    with (
+        patch.multiple(
+            "backend.services.normalizer.settings",
+            data_dir=str(tmp_path),
+            review_enabled=True,
+            normalize_incremental=False,
+            groq_api_key=api_key,
+        ),
+        patch("backend.services.normalizer.get_process_pool", return_value=None),
+        patch("backend.services.normalizer.get_review_queue") as get_queue,
+    ):
+        report = await run_normalization([str(source)])
+    assert report["processed"] == 1
+    get_queue.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_worker_reports_running_while_its_loop_is_active(tmp_path):
+    queue = ReviewQueue(str(tmp_path / "queue.sqlite3"))
+    stop = asyncio.Event()
+    async with _client(_suggest) as client:
+        task = asyncio.create_task(ReviewWorker(queue, client).run(stop))
+        await asyncio.sleep(0)
+        assert review_worker_running()
+        stop.set()
+        await task
+    assert not review_worker_running()
+
+
+@pytest.mark.asyncio
+async def test_worker_stores_suggestions_and_retries_failures(tmp_path):
+    queue = ReviewQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue([("f.txt", "1", "قل هو الله احد"), ("f.txt", "2", "لم يلد")])
+
+    worker = ReviewWorker(queue, _client(_suggest))
+    assert await worker.run_once() == 2
+    assert await worker.run_once() == 0
+
+    progress = queue.progress()
+    assert progress["done"] == 2
+    assert progress["changed"] == 1
+    [suggestion] = queue.suggestions()
+    assert suggestion["suggestion"] == "قل هو آلله آحد"
+    assert "- الله" in suggestion["diff"]
+
+    queue.enqueue([("f.txt", "3", "ولم يكن")])
+    failing = ReviewWorker(queue, _client(lambda request: httpx.Response(500)))
+    with patch("backend.services.review_queue.settings.review_max_attempts", 2):
+        await failing.run_once()
+        assert queue.progress()["pending"] == 1
+        await failing.run_once()
+    assert queue.progress()["failed"] == 1
@@ -47,7 +47,7 @@ def test_convert_jsonl_endpoint():
     response = client.post(
         "/processing/convert-jsonl",
         json={
-            "metadata": "data/processed/metadata.json",
+            "metadata": "data/processed/metadata.jsonl",
             "audio_dir": "data/processed/audio",
         },
     )
@@ -0,0 +1,49 @@
+import json
+import tarfile
+from unittest.mock import patch
+from backend.services.shards import ShardReader, write_shards
+
+
+def _dataset(tmp_path, count=5):
+    records = []
+    for ayah in range(1, count + 1):
+        audio = tmp_path / f"alafasy_1_{ayah}.wav"
+        audio.write_bytes(bytes([ayah]) * (300 * ayah))
+        records.append(
+            {
+                "audio_path": str(audio),
+                "transcript": f"آية {ayah}",
+                "metadata": {"reciter": "alafasy", "surah": 1, "ayah": ayah},
+            }
+        )
+    records.append({"audio_path": str(tmp_path / "missing.wav"), "transcript": ""})
+    path = tmp_path / "dataset.jsonl"
+    path.write_text(
+        "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records),
+        encoding="utf-8",
+    )
+    return str(path)
+
+
+def test_shards_round_trip_without_copying(tmp_path):
+    jsonl = _dataset(tmp_path)
+    with patch("backend.services.shards.settings.shard_max_bytes", 4096):
+        report = write_shards(jsonl, str(tmp_path / "shards"))
+
+    assert report["records"] == 5
+    assert report["skipped"] == 1
+    assert len(report["shards"]) > 1
+    # Shards are plain tars that WebDataset (or tar) can read
+    with tarfile.open(report["shards"][0]) as tar:
+        assert tar.getnames()[:2] == ["alafasy_001_001.wav", "alafasy_001_001.json"]
+
+    reader = ShardReader(str(tmp_path / "shards"))
+    clip, record = reader.get("alafasy_001_003")
+    assert isinstance(clip, memoryview)
+    assert bytes(clip) == bytes([3]) * 900
+    assert record["transcript"] == "آية 3"
+    assert [key for key, _, _ in reader] == [
+        f"alafasy_001_{a:03d}" for a in range(1, 6)
+    ]
+    del clip
+    reader.close()
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch
+from backend.services import transcript_index
+from backend.services.converter import extract_metadata, iter_metadata
+from backend.services.transcript_index import get_transcript_index
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    transcripts = tmp_path / "processed" / "transcripts"
+    transcripts.mkdir(parents=True)
+    with patch("backend.services.transcript_index.settings.data_dir", str(tmp_path)):
+        with patch("backend.services.transcript_index._index", None):
+            yield transcripts
+
+
+def test_lookup_prefers_reciter_variants(data_dir):
+    (data_dir / "quran.csv").write_text(
+        "surah,ayah,text,reciter\n"
+        "1,1,بسم الله,\n"
+        "1,2,الحمد لله,\n"
+        "1,2,الحمد للّه,warsh\n"
+        "1,2,الحمد لله رب,husary\n",
+        encoding="utf-8",
+    )
+    index = get_transcript_index()
+    assert index.get(1, 1, "husary") == "بسم الله"
+    assert index.get(1, 2) == "الحمد لله"
+    assert index.get(1, 2, "husary") == "الحمد لله رب"
+    with patch.dict(
+        "backend.services.transcript_index.settings.reciter_text_variants",
+        {"ayyub": "warsh"},
+    ):
+        assert index.get(1, 2, "ayyub") == "الحمد للّه"
+    assert index.get(1, 3) is None
+    assert index.get(115, 1) is None
+
+
+def test_index_is_persisted_and_rebuilt_on_change(data_dir):
+    path = data_dir / "quran.txt"
+    path.write_text("بسم الله\n\nالحمد لله\n", encoding="utf-8")
+    assert get_transcript_index().get(1, 2) == "الحمد لله"
+
+    with patch("backend.services.transcript_index._index", None):
+        with patch.object(transcript_index, "build_transcript_index") as build:
+            assert get_transcript_index().get(1, 1) == "بسم الله"
+        build.assert_not_called()
+
+    path.write_text("بسم الله\nالحمد لله رب العالمين\n", encoding="utf-8")
+    assert get_transcript_index().get(1, 2) == "الحمد لله رب العالمين"
+
+
+@pytest.mark.asyncio
+async def test_metadata_joins_transcripts(data_dir, tmp_path):
+    (data_dir / "quran.txt").write_text(
+        "\n".join(f"ayah {n}" for n in range(1, 11)), encoding="utf-8"
+    )
+    with patch("backend.services.converter.settings.data_dir", str(tmp_path)):
+        # Text only: one entry per ayah
+        entries = list(iter_metadata(await extract_metadata([])))
+        assert [(e["surah"], e["ayah"]) for e in entries][6:9] == [
+            (1, 7),
+            (2, 1),
+            (2, 2),
+        ]
+        assert entries[7]["transcript"] == "ayah 8"
+
+        audio = tmp_path / "processed" / "audio" / "husary" / "002" / "003.mp3"
+        audio.parent.mkdir(parents=True)
+        audio.write_bytes(b"")
+        (entry,) = iter_metadata(await extract_metadata([str(audio)]))
+        assert entry["transcript"] == "ayah 10"
+
+
+@pytest.mark.asyncio
+async def test_reciter_keyed_transcripts_join_and_expand(data_dir, tmp_path):
+    # transcripts.csv as written by HF ingest: every row has a reciter
+    (data_dir / "hf_a_b__transcripts.csv").write_text(
+        "key,reciter,surah,ayah,text,audio_path\n"
+        "k1,abdul_basit,1,1,بسم الله,\n"
+        "k2,abdul_basit,1,2,الحمد لله,\n",
+        encoding="utf-8",
+    )
+    index = get_transcript_index()
+    assert index.get(1, 2, "abdul-basit") == "الحمد لله"
+    assert index.get(1, 2, "abdul_basit") == "الحمد لله"
+    assert [ayah for _, ayah, _ in index.ayat()] == [1, 2]
+
+    with patch("backend.services.converter.settings.data_dir", str(tmp_path)):
+        entries = list(iter_metadata(await extract_metadata([])))
+    assert [e["transcript"] for e in entries] == ["بسم الله", "الحمد لله"]
@@ -0,0 +1,66 @@
+import struct
+import wave
+import numpy as np
+import pytest
+from unittest.mock import patch
+from backend.services.conform import write_pcm16
+from backend.services.trimmer import load_trim_manifest, trim_audio, trim_bounds
+
+RATE = 16000
+
+
+def _noise(seconds: float) -> np.ndarray:
+    return 1e-4 * np.random.default_rng(0).standard_normal(int(seconds * RATE))
+
+
+def _clip(lead: float, speech: float, tail: float) -> np.ndarray:
+    t = np.arange(int(speech * RATE)) / RATE
+    voice = 0.5 * np.sin(2 * np.pi * 220 * t)
+    return np.concatenate([_noise(lead), voice, _noise(tail)])
+
+
+def test_trim_bounds_batches_clips():
+    clips = [_clip(1.0, 2.0, 0.5), _clip(0.0, 1.0, 0.0), np.zeros(RATE)]
+    with patch("backend.services.trimmer.settings.trim_padding_ms", 0.0):
+        bounds = trim_bounds(clips, RATE)
+
+    start, end = bounds[0]
+    assert abs(start - RATE) <= 400 and abs(end - 3 * RATE) <= 400
+    assert bounds[1] == (0, RATE)
+    assert bounds[2] == (0, RATE)  # Pure silence is left alone
+
+
+@pytest.mark.asyncio
+async def test_trim_audio_records_durations(tmp_path):
+    (tmp_path / "alafasy" / "001").mkdir(parents=True)
+    path = tmp_path / "alafasy" / "001" / "001.wav"
+    write_pcm16(str(path), _clip(2.0, 3.0, 1.0), RATE)
+
+    with patch("backend.services.trimmer.settings.data_dir", str(tmp_path)):
+        report = await trim_audio(str(tmp_path))
+        rerun = await trim_audio(str(tmp_path))
+
+    assert report["trimmed"] == 1
+    assert report["hours_saved"] == pytest.approx(2.7 / 3600, abs=0.1 / 3600)
+    assert (rerun["trimmed"], rerun["unchanged"]) == (0, 1)
+    entry = load_trim_manifest(str(tmp_path))["alafasy/001/001.wav"]
+    assert entry["original"] == pytest.approx(6.0)
+    with wave.open(str(path), "rb") as f:
+        assert f.getnframes() / RATE == pytest.approx(entry["trimmed"])
+
+
+@pytest.mark.asyncio
+async def test_float_and_extensible_wavs_are_unsupported(tmp_path):
+    for name, tag in [("float.wav", 3), ("extensible.wav", 0xFFFE)]:
+        fmt = struct.pack("<HHIIHH", tag, 1, RATE, RATE * 4, 4, 32)
+        if tag == 0xFFFE:
+            fmt += struct.pack("<HHIH", 22, 32, 4, 1) + b"\0" * 14
+        data = b"\0" * RATE * 4
+        body = b"WAVEfmt " + struct.pack("<I", len(fmt)) + fmt
+        body += b"data" + struct.pack("<I", len(data)) + data
+        (tmp_path / name).write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+    with patch("backend.services.trimmer.settings.data_dir", str(tmp_path)):
+        report = await trim_audio(str(tmp_path))
+
+    assert (report["unsupported"], report["failed"]) == (2, 0)
@@ -0,0 +1,73 @@
+import asyncio
+import json
+import pytest
+from unittest.mock import patch
+from backend.services.converter import convert_to_jsonl
+from backend.services.tts import StubEngine, TTSEngine, TTSScheduler
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path):
+    with patch("backend.services.tts.settings.data_dir", str(tmp_path)):
+        with patch("backend.services.tts.settings.tts_engine", "stub"):
+            yield tmp_path
+
+
+class FailingEngine(StubEngine):
+    name = "failing"
+
+    def synthesize(self, text, lang, output_path):
+        raise RuntimeError("engine down")
+
+
+@pytest.mark.asyncio
+async def test_scheduler_deduplicates_and_caches():
+    tts = TTSScheduler(workers=2)
+    paths = await asyncio.gather(
+        *(tts.synthesize(text) for text in ["بسم الله", "الحمد لله", "بسم الله"])
+    )
+    tts.close()
+    assert paths[0] == paths[2] != paths[1]
+    assert tts.stats == {"synthesized": 2, "cached": 0, "deduplicated": 1, "failed": 0}
+
+    again = TTSScheduler()
+    assert await again.synthesize("بسم الله") == paths[0]
+    again.close()
+    assert again.stats["cached"] == 1 and again.stats["synthesized"] == 0
+
+    failing = TTSScheduler(engine=FailingEngine())
+    assert await failing.synthesize("بسم الله") is None
+    failing.close()
+    assert failing.stats["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_convert_voices_missing_audio(tmp_path):
+    metadata = tmp_path / "metadata.jsonl"
+    with open(metadata, "w", encoding="utf-8") as f:
+        for n, text in enumerate(["بسم الله", "الحمد لله", "بسم الله"], 1):
+            entry = {"audio_path": f"missing/generated_{n}.wav", "transcript": text}
+            f.write(json.dumps({**entry, "surah": 1, "ayah": n}) + "\n")
+    audio_dir = tmp_path / "processed" / "audio"
+    with patch("backend.services.converter.settings.data_dir", str(tmp_path)):
+        jsonl_path = await convert_to_jsonl(str(metadata), str(audio_dir))
+
+    with open(jsonl_path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert [r["audio_path"] for r in records] == [
+        str(audio_dir / f"generated_generated_{n}.wav") for n in (1, 2, 3)
+    ]
+    assert [r["metadata"]["ayah"] for r in records] == [1, 2, 3]
+    # Identical transcripts share one synthesized file
+    first, _, third = (audio_dir / f"generated_generated_{n}.wav" for n in (1, 2, 3))
+    assert first.samefile(third)
+    assert len(list((tmp_path / "cache" / "tts").rglob("*.wav"))) == 2
+
+
+def test_incomplete_engine_fails_when_created():
+    class NoSynthesize(TTSEngine):
+        name = "incomplete"
+        extension = ".wav"
+
+    with pytest.raises(TypeError):
+        NoSynthesize()
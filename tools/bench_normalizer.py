@@ -0,0 +1,61 @@
+import os
+import re
+import sys
+import time
+import zipfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.arabic_normalizer import RULE_SETS, Normalizer  # noqa: E402
+
+BUNDLED_ZIP = "quran_dataset.zip"
+BUNDLED_CSV = "transcripts/The Quran Dataset.csv"
+LEGACY_PATTERN = re.compile(r"[^؀-ۿً-ٟ\s]")
+
+
+def load_lines(path: str | None) -> list[str]:
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read().splitlines()
+    with zipfile.ZipFile(BUNDLED_ZIP) as zf:
+        return zf.read(BUNDLED_CSV).decode("utf-8").splitlines()
+
+
+def bench(
+    name: str, fn, lines: list[str], repeat: int, baseline: float | None = None
+) -> float:
+    size_mb = sum(len(line.encode("utf-8")) + 1 for line in lines) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for line in lines:
+            fn(line)
+        best = min(best, time.perf_counter() - started)
+    rate = size_mb / best
+    print(
+        f"{name:<14} {rate:8.1f} MB/s "
+        f"{len(lines) * 60 / best / 1e6:8.1f} M lines/min "
+        f"{rate / (baseline or rate):6.2f}x baseline"
+    )
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Arabic normalizer throughput")
+    parser.add_argument("--input", help="UTF-8 text file (default: bundled CSV)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    lines = load_lines(args.input)
+    print(f"{len(lines)} lines, best of {args.repeat}")
+    # The pre-Normalizer code path, which legacy-v1 reproduces
+    baseline = bench(
+        "regex-per-line", lambda line: LEGACY_PATTERN.sub("", line), lines, args.repeat
+    )
+    for version in RULE_SETS:
+        bench(version, Normalizer(version).normalize, lines, args.repeat, baseline)
+
+
+if __name__ == "__main__":
+    main()
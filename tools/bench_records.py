@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend import records  # noqa: E402
+from backend.models import JsonlEntry, MetadataEntry  # noqa: E402
+from backend.records import MetadataRecord, dumps_line, jsonl_line  # noqa: E402
+
+TRANSCRIPT = "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ"
+
+
+def synthetic(count: int):
+    # Field values as extract_metadata sees them for organized audio
+    for i in range(count):
+        surah, ayah = i // 286 % 114 + 1, i % 286 + 1
+        yield {
+            "reciter": f"reciter{i % 50}",
+            "surah": surah,
+            "ayah": ayah,
+            "duration": 3.5 + i % 7,
+            "sampling_rate": 16000,
+            "source": "unknown",
+            "transcript": TRANSCRIPT,
+            "audio_path": f"data/processed/audio/r/{surah:03d}/{ayah:03d}.wav",
+        }
+
+
+def pydantic_path(fields: dict, sink) -> None:
+    # Before: validate, dump, write; read back, validate again, dump, write
+    line = json.dumps(MetadataEntry(**fields).model_dump(), ensure_ascii=False)
+    sink.write(line + "\n")
+    item = json.loads(line)
+    entry = JsonlEntry(
+        audio_path=item["audio_path"],
+        transcript=item["transcript"],
+        metadata={
+            k: v for k, v in item.items() if k not in ["audio_path", "transcript"]
+        },
+    )
+    sink.write(json.dumps(entry.model_dump(), ensure_ascii=False) + "\n")
+
+
+def record_path(fields: dict, sink) -> None:
+    line = dumps_line(MetadataRecord(**fields))
+    sink.write(line)
+    item = records.loads(line)
+    sink.write(jsonl_line(item, item["audio_path"]))
+
+
+class Discard:
+    def write(self, data) -> None:
+        pass
+
+
+def bench(name: str, fn, count: int) -> None:
+    sink = Discard()
+    started = time.perf_counter()
+    for fields in synthetic(count):
+        fn(fields, sink)
+    elapsed = time.perf_counter() - started
+    print(f"{name:<10} {count / elapsed:12,.0f} records/s ({elapsed:.1f} s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Metadata + JSONL record throughput, pydantic vs fast path"
+    )
+    parser.add_argument("--count", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"{args.count:,} synthetic records, orjson={records.orjson is not None}")
+    bench("pydantic", pydantic_path, args.count)
+    bench("records", record_path, args.count)
+
+
+if __name__ == "__main__":
+    main()
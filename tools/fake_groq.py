@@ -0,0 +1,118 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.arabic_normalizer import Normalizer  # noqa: E402
+
+# Local stand-in for Groq's OpenAI-compatible chat-completions API, so the LLM
+# path can be load-tested and regression-tested without a key or network.
+# Batch requests (the {"ayat": [...]} format of LLMClient.validate_batch) are
+# answered with the plain-v1 normalization of every ayah; anything else is
+# echoed back.
+
+
+def create_app(
+    latency: float = 0.2,
+    jitter: float = 0.05,
+    error_rate: float = 0.0,
+    rate_limit_rate: float = 0.0,
+    retry_after: float | None = None,
+    seed: int | None = None,
+) -> FastAPI:
+    app = FastAPI(title="Fake Groq")
+    rng = random.Random(seed)
+    normalizer = Normalizer("plain-v1")
+    app.state.stats = {"requests": 0, "errors": 0, "rate_limited": 0}
+
+    def reply_to(messages: list[dict]) -> str:
+        content = messages[-1].get("content", "") if messages else ""
+        try:
+            ayat = json.loads(content)["ayat"]
+        except (ValueError, TypeError, KeyError):
+            return content
+        results = [
+            {"id": a["id"], "text": normalizer.normalize(a["text"])} for a in ayat
+        ]
+        return json.dumps({"results": results}, ensure_ascii=False)
+
+    async def chat_completions(request: Request):
+        stats = app.state.stats
+        stats["requests"] += 1
+        payload = await request.json()
+        await asyncio.sleep(max(0.0, latency + rng.uniform(-jitter, jitter)))
+        roll = rng.random()
+        if roll < rate_limit_rate:
+            stats["rate_limited"] += 1
+            headers = {"Retry-After": str(retry_after)} if retry_after else {}
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                status_code=429,
+                headers=headers,
+            )
+        if roll < rate_limit_rate + error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                {"error": {"message": "Service unavailable"}}, status_code=503
+            )
+        content = reply_to(payload.get("messages", []))
+        return {
+            "id": f"chatcmpl-{stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "fake"),
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }
+            ],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    # Served both at the root and under Groq's /openai/v1 prefix
+    app.post("/chat/completions")(chat_completions)
+    app.post("/openai/v1/chat/completions")(chat_completions)
+
+    @app.get("/stats")
+    def stats():
+        return app.state.stats
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Groq chat-completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds")
+    parser.add_argument("--jitter", type=float, default=0.05, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 share")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="429 share")
+    parser.add_argument("--retry-after", type=float, help="Retry-After on 429s")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    app = create_app(
+        args.latency,
+        args.jitter,
+        args.error_rate,
+        args.rate_limit_rate,
+        args.retry_after,
+        args.seed,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.arabic_normalizer import Normalizer  # noqa: E402
+from backend.services.llm_client import LLMClient  # noqa: E402
+from config.settings import settings  # noqa: E402
+from tools.bench_normalizer import load_lines  # noqa: E402
+from tools.fake_groq import create_app  # noqa: E402
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run(args) -> dict:
+    # The LLM stage of normalization: normalize every line, then validate the
+    # results through LLMClient exactly as the review worker does
+    normalizer = Normalizer(settings.normalizer_rules)
+    lines = load_lines(args.input)[: args.ayat]
+    ayat = [normalizer.normalize(line) for line in lines]
+
+    if args.url:
+        http = httpx.AsyncClient(timeout=settings.llm_timeout)
+        base_url = args.url
+    else:
+        app = create_app(
+            args.latency,
+            args.jitter,
+            args.error_rate,
+            args.rate_limit_rate,
+            seed=args.seed,
+        )
+        http = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), timeout=settings.llm_timeout
+        )
+        base_url = "http://fake-groq"
+    client = LLMClient(api_key="load-test", base_url=base_url, http_client=http)
+    started = time.perf_counter()
+    try:
+        _, ok_flags = await client.validate_many_with_status(ayat)
+    finally:
+        elapsed = time.perf_counter() - started
+        await client.aclose()
+        await http.aclose()
+    latencies = list(client.latencies)
+    return {
+        "ayat": len(ayat),
+        "validated": sum(ok_flags),
+        "seconds": elapsed,
+        "ayat_per_second": len(ayat) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        **client.stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM validation load test")
+    parser.add_argument("--input", help="UTF-8 text file (default: bundled CSV)")
+    parser.add_argument("--ayat", type=int, default=2000)
+    parser.add_argument("--url", help="Running fake_groq server (default: in-process)")
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=settings.llm_concurrency)
+    parser.add_argument("--rpm", type=float, default=settings.llm_requests_per_minute)
+    parser.add_argument("--batch-size", type=int, default=settings.llm_batch_size)
+    parser.add_argument("--batch-chars", type=int, default=settings.llm_batch_chars)
+    args = parser.parse_args()
+
+    settings.llm_concurrency = args.concurrency
+    settings.llm_requests_per_minute = args.rpm
+    settings.llm_batch_size = args.batch_size
+    settings.llm_batch_chars = args.batch_chars
+    settings.llm_cache_enabled = False
+
+    report = asyncio.run(run(args))
+    print(
+        f"{report['validated']}/{report['ayat']} ayat in {report['seconds']:.2f}s "
+        f"({report['ayat_per_second']:.1f} ayat/s)"
+    )
+    print(
+        f"requests {report['requests']}  retries {report['retries']}  "
+        f"failures {report['failures']}"
+    )
+    print(f"latency p50 {report['p50_ms']:.0f} ms  p99 {report['p99_ms']:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()